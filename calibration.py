@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Temperature calibration + model registry I/O (numpy only)
+T is fitted on validation probabilities with the SAME transform the app applies
+(UnifiedMLService._calibrate): softmax(log(clip(p, 1e-6, 1)) / T + bias)
+"""
+
+import json
+import numpy as np
+
+REGISTRY_PATH = 'assets/models/model_registry.json'
+EPS = 1e-6
+T_MIN, T_MAX = 0.25, 10.0
+
+
+def calibrate_probs(probs, temperature, bias=None):
+    """Python twin of UnifiedMLService._calibrate (Dart)"""
+    logits = np.log(np.clip(probs, EPS, 1.0)) / (temperature if temperature > 0 else 1.0)
+    if bias is not None:
+        logits = logits + np.asarray(bias, dtype=logits.dtype)
+    logits = logits - logits.max(axis=-1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+def negative_log_likelihood(probs, labels, temperature, bias=None):
+    calibrated = calibrate_probs(probs, temperature, bias)
+    return float(-np.log(np.clip(calibrated[np.arange(len(labels)), labels], 1e-12, 1.0)).mean())
+
+
+def expected_calibration_error(probs, labels, bins=15):
+    """ECE pe confidence (max prob), bins egale în [0, 1]"""
+    confidence = probs.max(axis=1)
+    correct = probs.argmax(axis=1) == labels
+    bin_ids = np.minimum((confidence * bins).astype(int), bins - 1)
+
+    conf_sum = np.bincount(bin_ids, weights=confidence, minlength=bins)
+    acc_sum = np.bincount(bin_ids, weights=correct.astype(np.float64), minlength=bins)
+
+    return float(np.abs(acc_sum - conf_sum).sum() / max(len(labels), 1))
+
+
+def fit_temperature(probs, labels, bias=None, iterations=60):
+    """
+    T care minimizează NLL pe validare
+    Golden-section search pe log(T) în [T_MIN, T_MAX] - NLL e unimodal în 1/T
+    """
+    probs = np.asarray(probs, dtype=np.float64)
+    labels = np.asarray(labels)
+    if labels.ndim > 1:
+        labels = labels.argmax(axis=1)
+
+    ratio = (np.sqrt(5) - 1) / 2
+    lo, hi = np.log(T_MIN), np.log(T_MAX)
+    a = hi - ratio * (hi - lo)
+    b = lo + ratio * (hi - lo)
+    f_a = negative_log_likelihood(probs, labels, np.exp(a), bias)
+    f_b = negative_log_likelihood(probs, labels, np.exp(b), bias)
+
+    for _ in range(iterations):
+        if f_a < f_b:
+            hi, b, f_b = b, a, f_a
+            a = hi - ratio * (hi - lo)
+            f_a = negative_log_likelihood(probs, labels, np.exp(a), bias)
+        else:
+            lo, a, f_a = a, b, f_b
+            b = lo + ratio * (hi - lo)
+            f_b = negative_log_likelihood(probs, labels, np.exp(b), bias)
+
+    temperature = float(np.exp((lo + hi) / 2))
+    calibrated = calibrate_probs(probs, temperature, bias)
+
+    return {
+        'temp': temperature,
+        'nll_before': negative_log_likelihood(probs, labels, 1.0, bias),
+        'nll_after': negative_log_likelihood(probs, labels, temperature, bias),
+        'ece_before': expected_calibration_error(calibrate_probs(probs, 1.0, bias), labels),
+        'ece_after': expected_calibration_error(calibrated, labels),
+        'samples': int(len(labels)),
+    }
+
+
+def load_registry(path=REGISTRY_PATH):
+    with open(path) as f:
+        return json.load(f)
+
+
+def _is_flat(value):
+    items = value.values() if isinstance(value, dict) else value
+    return all(not isinstance(v, (dict, list)) or (isinstance(v, list) and _is_flat(v)) for v in items)
+
+
+def _format(value, indent):
+    # Obiecte/liste „plate” pe o singură linie (ca în fișierul scris de mână), restul indentat
+    if not isinstance(value, (dict, list)) or _is_flat(value):
+        return json.dumps(value)
+
+    pad = ' ' * (indent + 2)
+    if isinstance(value, list):
+        body = ',\n'.join(pad + _format(v, indent + 2) for v in value)
+        return f"[\n{body}\n{' ' * indent}]"
+
+    body = ',\n'.join(f"{pad}{json.dumps(k)}: {_format(v, indent + 2)}" for k, v in value.items())
+    return f"{{\n{body}\n{' ' * indent}}}"
+
+
+def save_registry(registry, path=REGISTRY_PATH):
+    """Scrie registry-ul păstrând formatul compact (o intrare de model per linie)"""
+    with open(path, 'w') as f:
+        f.write(_format(registry, 0) + '\n')
+
+
+def find_model_entry(registry, model_id):
+    for entry in registry.get('models', []):
+        if entry.get('id') == model_id:
+            return entry
+    return None
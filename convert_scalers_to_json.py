@@ -13,6 +13,8 @@ def convert_scalers():
 
     print(f"Found {len(pkl_files)} scaler .pkl files")
 
+    converted = []
+
     for pkl_path in pkl_files:
         try:
             # Load scaler from .pkl
@@ -30,10 +32,13 @@ def convert_scalers():
                 json.dump(scaler_json, f, indent=2)
 
             print(f"✅ Converted: {os.path.basename(pkl_path)} → {os.path.basename(json_path)}")
+            converted.append(json_path)
 
         except Exception as e:
             print(f"❌ Failed to convert {pkl_path}: {e}")
 
+    return converted
+
 if __name__ == '__main__':
     convert_scalers()
     print("\nDone!")
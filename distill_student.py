@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+KNOWLEDGE DISTILLATION: Transformer teacher → CNN student (on-device)
+- Teacher soft probabilities computed ONCE, in batched offline pass over the training windows
+- Student (train_general.create_general_model) trained on hard labels + temperature-softened teacher outputs
+- Export: builtin-ops TFLite for the general_5m / general_1d slots (no Flex ops)
+"""
+
+import os
+import json
+import shutil
+import argparse
+import logging
+from datetime import datetime
+
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
+from sklearn.model_selection import train_test_split
+
+from scaler_fit import StreamingScaler
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+NUM_CLASSES = 3
+TEACHER_BATCH = 1024
+
+
+def compute_teacher_probs(teacher_path, X, batch_size=TEACHER_BATCH):
+    """
+    One batched pass of the teacher over X (in the teacher's input space)
+    teacher_path: .tflite (Flex ops OK in Python) or a saved Keras model
+    """
+    if not teacher_path.endswith('.tflite'):
+        teacher = keras.models.load_model(teacher_path, compile=False)
+        return teacher.predict(X, batch_size=batch_size, verbose=0).astype(np.float32)
+
+    interpreter = tf.lite.Interpreter(model_path=teacher_path)
+    inp = interpreter.get_input_details()[0]
+    out = interpreter.get_output_details()[0]
+
+    probs = np.empty((len(X), out['shape'][-1]), dtype=np.float32)
+    current_batch = None
+
+    for start in range(0, len(X), batch_size):
+        batch = X[start:start + batch_size].astype(np.float32)
+
+        # Resize doar când se schimbă dimensiunea batch-ului (ultimul batch)
+        if len(batch) != current_batch:
+            interpreter.resize_tensor_input(inp['index'], [len(batch), *inp['shape'][1:]])
+            interpreter.allocate_tensors()
+            current_batch = len(batch)
+
+        interpreter.set_tensor(inp['index'], batch)
+        interpreter.invoke()
+        probs[start:start + len(batch)] = interpreter.get_tensor(out['index'])
+
+    return probs
+
+
+def soften(probs, temperature):
+    """softmax(log(p) / T) - temperature applied to a softmax output"""
+    return tf.nn.softmax(tf.math.log(probs + 1e-7) / temperature, axis=-1)
+
+
+def make_distillation_loss(alpha=0.5, temperature=3.0):
+    """
+    y_true = [hard one-hot (3) | teacher probs (3)]
+    loss = alpha * CE(hard, student) + (1 - alpha) * T² * KL(teacher_T || student_T)
+    """
+
+    def distillation_loss(y_true, y_pred):
+        hard = y_true[:, :NUM_CLASSES]
+        teacher = y_true[:, NUM_CLASSES:]
+
+        hard_loss = keras.losses.categorical_crossentropy(hard, y_pred)
+        soft_loss = keras.losses.KLD(soften(teacher, temperature), soften(y_pred, temperature))  # tf.keras 2 și Keras 3
+
+        return alpha * hard_loss + (1 - alpha) * (temperature ** 2) * soft_loss
+
+    return distillation_loss
+
+
+def hard_accuracy(y_true, y_pred):
+    return keras.metrics.categorical_accuracy(y_true[:, :NUM_CLASSES], y_pred)
+
+
+def teacher_agreement(y_true, y_pred):
+    return keras.metrics.categorical_accuracy(y_true[:, NUM_CLASSES:], y_pred)
+
+
+def distill(timeframe='5m', teacher_path=None, alpha=0.5, temperature=3.0,
+            epochs=100, batch_size=64, output_dir='assets/ml_distilled'):
+    """Distill general_{timeframe} (Transformer) into a CNN student"""
+    from train_transformer import fetch_multi_coin_data, build_grouped_windows, TRAINING_COINS
+    from train_general import create_general_model
+
+    teacher_path = teacher_path or f'assets/ml/general_{timeframe}.tflite'
+    teacher_scaler_path = f'assets/ml/general_{timeframe}_scaler.json'
+
+    logger.info(f"\n{'='*60}")
+    logger.info(f"Distilling general_{timeframe}: {teacher_path} → CNN student")
+    logger.info(f"{'='*60}")
+
+    # 1. Same data + features as the teacher (build_exact_76_features, per coin)
+    limit_per_coin = 1500 if timeframe == '5m' else 1000
+    combined_df = fetch_multi_coin_data(timeframe, limit_per_coin=limit_per_coin)
+    windows = build_grouped_windows(combined_df) if combined_df is not None else None
+    if windows is None:
+        logger.error("Not enough data to distill")
+        return None
+    X, y = windows
+
+    # 2. Teacher's scaler → teacher and student see identical inputs
+    scaler = StreamingScaler.load_json(teacher_scaler_path)
+    X_scaled = scaler.transform(X)
+
+    teacher_metadata_path = teacher_path.replace('.tflite', '_metadata.json')
+    teacher_baked = False
+    if os.path.exists(teacher_metadata_path):
+        with open(teacher_metadata_path) as f:
+            teacher_baked = json.load(f).get('input_normalization') == 'baked'
+
+    # 3. Teacher soft probabilities - one batched offline pass
+    logger.info(f"Teacher pass over {len(X)} windows...")
+    teacher_probs = compute_teacher_probs(teacher_path, X if teacher_baked else X_scaled)
+    X = X_scaled
+
+    y_hard = keras.utils.to_categorical(y, NUM_CLASSES)
+    targets = np.concatenate([y_hard, teacher_probs], axis=1)
+
+    X_train, X_test, t_train, t_test = train_test_split(
+        X, targets, test_size=0.2, random_state=42, stratify=y
+    )
+
+    # 4. Student
+    student = create_general_model()
+    student.compile(
+        optimizer=keras.optimizers.Adam(learning_rate=0.001),
+        loss=make_distillation_loss(alpha, temperature),
+        metrics=[hard_accuracy, teacher_agreement]
+    )
+
+    student.fit(
+        X_train, t_train,
+        validation_data=(X_test, t_test),
+        epochs=epochs,
+        batch_size=batch_size,
+        callbacks=[
+            keras.callbacks.EarlyStopping(monitor='val_loss', patience=10, restore_best_weights=True),
+            keras.callbacks.ReduceLROnPlateau(monitor='val_loss', factor=0.5, patience=5, min_lr=1e-6)
+        ],
+        verbose=1
+    )
+
+    _, test_acc, agreement = student.evaluate(X_test, t_test, verbose=0)
+    teacher_acc = float((np.argmax(t_test[:, NUM_CLASSES:], axis=1) == np.argmax(t_test[:, :NUM_CLASSES], axis=1)).mean())
+
+    logger.info(f"🎯 Student accuracy: {test_acc:.4f} (teacher: {teacher_acc:.4f}, agreement: {agreement:.4f})")
+
+    # 5. Export - builtin ops only
+    converter = tf.lite.TFLiteConverter.from_keras_model(student)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS]
+    tflite_model = converter.convert()
+
+    os.makedirs(output_dir, exist_ok=True)
+    output_name = f'general_{timeframe}'
+
+    tflite_path = os.path.join(output_dir, f'{output_name}.tflite')
+    with open(tflite_path, 'wb') as f:
+        f.write(tflite_model)
+
+    # Student uses the teacher's scaler → same scaler JSON
+    if os.path.abspath(output_dir) != os.path.abspath('assets/ml'):
+        shutil.copy(teacher_scaler_path, os.path.join(output_dir, f'{output_name}_scaler.json'))
+
+    metadata = {
+        'type': 'GENERAL',
+        'architecture': 'CNN_DISTILLED',
+        'teacher': os.path.basename(teacher_path),
+        'distillation': {'alpha': alpha, 'temperature': temperature},
+        'timeframe': timeframe,
+        'trained_on': TRAINING_COINS,
+        'test_accuracy': float(test_acc),
+        'teacher_test_accuracy': teacher_acc,
+        'teacher_agreement': float(agreement),
+        'train_samples': int(len(X_train)),
+        'test_samples': int(len(X_test)),
+        'model_size_kb': len(tflite_model) / 1024,
+        'num_features': X.shape[-1],
+        'num_classes': NUM_CLASSES,
+        'scaler_path': f'{output_name}_scaler.json',
+        'input_normalization': 'scaler_json',
+        'feature_extraction': 'build_exact_76_features',
+        'date': datetime.now().isoformat()
+    }
+
+    metadata_path = os.path.join(output_dir, f'{output_name}_metadata.json')
+    with open(metadata_path, 'w') as f:
+        json.dump(metadata, f, indent=2)
+
+    logger.info(f"✅ Student saved: {tflite_path} ({metadata['model_size_kb']:.1f} KB)")
+    return metadata
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Distill the Transformer teacher into a CNN student')
+    parser.add_argument('--timeframes', default='5m,1d')
+    parser.add_argument('--teacher', help='Teacher model (default: assets/ml/general_{tf}.tflite)')
+    parser.add_argument('--alpha', type=float, default=0.5, help='Weight of the hard-label loss')
+    parser.add_argument('--temperature', type=float, default=3.0)
+    parser.add_argument('--epochs', type=int, default=100)
+    parser.add_argument('--output', default='assets/ml_distilled')
+    args = parser.parse_args()
+
+    for timeframe in args.timeframes.split(','):
+        distill(timeframe, teacher_path=args.teacher, alpha=args.alpha,
+                temperature=args.temperature, epochs=args.epochs, output_dir=args.output)
+
+
+if __name__ == '__main__':
+    main()
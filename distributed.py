@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+MULTI-WORKER DATA-PARALLEL TRAINING (CPU) pentru modelele generale
+- tf.distribute.MultiWorkerMirroredStrategy (all-reduce RING pe gradienți)
+- Cluster din TF_CONFIG sau dintr-un cluster spec local: {"worker": ["host:port", ...]}
+- Chief-ul (worker 0) construiește dataset-ul O SINGURĂ DATĂ, ceilalți îl citesc
+  din cache (path partajat între noduri); fiecare worker antrenează pe shard-ul lui
+- Doar chief-ul scrie .tflite / scaler / metadata
+
+Stack suportat: Keras 2 - TF 2.13 din imaginile Docker, sau TF >= 2.16 cu tf_keras și
+TF_USE_LEGACY_KERAS=1. Keras 3 nu antrenează cu MultiWorkerMirroredStrategy
+(model.fit → ValueError pe valori PerReplica) → get_strategy() se oprește din start
+
+Test local, mai multe procese pe aceeași mașină:
+    python distributed.py --workers 2 train_general.py
+    python distributed.py --workers 3 train_transformer.py -- --bake-scaler
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import logging
+import subprocess
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = 'data/distributed'
+WAIT_TIMEOUT_S = 3600  # Cât așteaptă un worker dataset-ul construit de chief
+
+
+def configure_cluster(cluster=None, task_index=None):
+    """
+    Setează TF_CONFIG dintr-un cluster spec (path JSON sau dict) - înainte de crearea strategiei
+    cluster: {"worker": ["10.0.0.1:23456", "10.0.0.2:23456"]}
+    """
+    if cluster is None:
+        return
+
+    if isinstance(cluster, str):
+        with open(cluster) as f:
+            cluster = json.load(f)
+
+    cluster = cluster.get('cluster', cluster)
+    if task_index is None:
+        task_index = int(os.environ.get('MTM_TASK_INDEX', 0))
+
+    os.environ['TF_CONFIG'] = json.dumps({
+        'cluster': cluster,
+        'task': {'type': 'worker', 'index': int(task_index)},
+    })
+
+
+def _tf_config():
+    return json.loads(os.environ.get('TF_CONFIG', '{}') or '{}')
+
+
+def num_workers():
+    return len(_tf_config().get('cluster', {}).get('worker', [])) or 1
+
+
+def task_index():
+    return int(_tf_config().get('task', {}).get('index', 0))
+
+
+def is_distributed():
+    return num_workers() > 1
+
+
+def is_chief():
+    return task_index() == 0
+
+
+_strategy = None
+
+
+def get_strategy():
+    """
+    MultiWorkerMirroredStrategy când TF_CONFIG are > 1 worker, altfel strategia implicită
+    Se creează o singură dată, la pornire (cerință TF: înainte de alte op-uri)
+    """
+    global _strategy
+    if _strategy is not None:
+        return _strategy
+
+    import tensorflow as tf
+
+    if is_distributed():
+        keras_version = getattr(tf.keras, '__version__', '2')
+        if int(keras_version.split('.')[0]) >= 3:
+            raise SystemExit(f"❌ Multi-worker training needs Keras 2 (found Keras {keras_version}): "
+                             f"use TF 2.13-2.15 or pip install tf_keras + TF_USE_LEGACY_KERAS=1")
+        options = tf.distribute.experimental.CommunicationOptions(
+            implementation=tf.distribute.experimental.CommunicationImplementation.RING
+        )
+        _strategy = tf.distribute.MultiWorkerMirroredStrategy(communication_options=options)
+        logger.info(f"🌐 Worker {task_index()}/{num_workers()} - {_strategy.num_replicas_in_sync} replicas in sync")
+    else:
+        _strategy = tf.distribute.get_strategy()
+
+    return _strategy
+
+
+def share_dataset(name, build, cache_dir=CACHE_DIR, timeout=WAIT_TIMEOUT_S):
+    """
+    Chief: build() → dict de arrays, salvat atomic în {cache_dir}/{name}.npz
+    Ceilalți workeri: așteaptă un cache mai nou decât pornirea procesului și îl încarcă
+    Valorile non-array (ex. scaler-ul) rămân doar la chief; build() → None ajunge None la toți
+    """
+    path = os.path.join(cache_dir, f'{name}.npz')
+    started = time.time()
+
+    if is_chief():
+        data = build()
+        arrays = {'failed': np.array(True)} if data is None else {
+            k: v for k, v in data.items() if isinstance(v, np.ndarray)
+        }
+
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f'{path}.tmp.npz'
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+        return data
+
+    logger.info(f"⏳ Worker {task_index()} waiting for {path}...")
+    while not (os.path.exists(path) and os.path.getmtime(path) >= started):
+        if time.time() - started > timeout:
+            raise TimeoutError(f"Dataset {path} not written by the chief within {timeout}s")
+        time.sleep(2)
+
+    with np.load(path) as npz:
+        if 'failed' in npz.files:
+            return None
+        return {k: npz[k] for k in npz.files}
+
+
+def shard_indices(n, seed=42):
+    """
+    Indicii shard-ului acestui worker: permutare deterministă, shard-uri de lungime EGALĂ
+    (același număr de pași per epocă pe toți workerii - altfel all-reduce-ul se blochează)
+    """
+    workers = num_workers()
+    per_worker = n // workers
+    order = np.random.default_rng(seed).permutation(n)
+    start = task_index() * per_worker
+    return np.sort(order[start:start + per_worker])
+
+
+def make_dataset(X, y, batch_size, shuffle=False, seed=42):
+    """
+    tf.data pe shard-ul acestui worker
+    batch_size = batch-ul GLOBAL: fiecare worker își batch-uiește shard-ul cu el, iar strategia
+    îl împarte la num_replicas_in_sync → per replică batch_size / replicas, per pas batch_size
+    """
+    import tensorflow as tf
+
+    idx = shard_indices(len(X), seed=seed)
+    dataset = tf.data.Dataset.from_tensor_slices((X[idx], y[idx]))
+    if shuffle:
+        dataset = dataset.shuffle(len(idx), seed=seed, reshuffle_each_iteration=True)
+
+    # Shard-uri egale + drop_remainder → același număr de pași pe fiecare worker
+    dataset = dataset.batch(batch_size, drop_remainder=True).prefetch(tf.data.AUTOTUNE)
+
+    options = tf.data.Options()
+    options.experimental_distribute.auto_shard_policy = tf.data.experimental.AutoShardPolicy.OFF
+    return dataset.with_options(options)
+
+
+def add_arguments(parser):
+    """--distributed / --cluster / --task-index pentru scripturile de training"""
+    parser.add_argument('--distributed', action='store_true',
+                        help='MultiWorkerMirroredStrategy (cluster from TF_CONFIG or --cluster)')
+    parser.add_argument('--cluster', help='Cluster spec JSON: {"worker": ["host:port", ...]}')
+    parser.add_argument('--task-index', type=int, help='This worker\'s index in --cluster')
+
+
+def strategy_from_args(args):
+    if not (args.distributed or args.cluster):
+        return None
+    configure_cluster(args.cluster, args.task_index)
+    return get_strategy()
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('localhost', 0))
+        return s.getsockname()[1]
+
+
+def launch_local(script, workers, script_args=()):
+    """N procese pe localhost, fiecare cu TF_CONFIG propriu; întoarce exit code-ul maxim"""
+    cluster = {'worker': [f'localhost:{_free_port()}' for _ in range(workers)]}
+    procs = []
+
+    for index in range(workers):
+        env = dict(os.environ)
+        env['TF_CONFIG'] = json.dumps({'cluster': cluster, 'task': {'type': 'worker', 'index': index}})
+        env.setdefault('CUDA_VISIBLE_DEVICES', '')
+        cmd = [sys.executable, script, '--distributed', *script_args]
+        procs.append(subprocess.Popen(cmd, env=env))
+        logger.info(f"🚀 Worker {index}: {' '.join(cmd)} ({cluster['worker'][index]})")
+
+    codes = [None] * workers
+    try:
+        while any(c is None for c in codes):
+            for i, p in enumerate(procs):
+                if codes[i] is None:
+                    codes[i] = p.poll()
+                    # Un worker picat blochează all-reduce-ul celorlalți → oprim tot
+                    if codes[i] not in (None, 0):
+                        logger.error(f"❌ Worker {i} exited with {codes[i]}, stopping the others")
+                        for other in procs:
+                            if other.poll() is None:
+                                other.terminate()
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        for p in procs:
+            p.terminate()
+        raise
+
+    return max(c or 0 for c in codes)
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description='Launch N local training workers (MultiWorkerMirroredStrategy)')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('script', help='train_general.py or train_transformer.py')
+    parser.add_argument('script_args', nargs=argparse.REMAINDER, help='Extra args after -- for the script')
+    args = parser.parse_args()
+
+    script_args = [a for a in args.script_args if a != '--']
+    sys.exit(launch_local(args.script, args.workers, script_args))
+
+
+if __name__ == '__main__':
+    main()
@@ -2,14 +2,30 @@
 """
 Script pentru downgrade modele TFLite de la TF 2.20 (TFL3) la TF 2.12 (TFL2)
 pentru compatibilitate cu tflite_flutter 0.11.0 pe iOS
+Greutățile constante (int8 per-channel / float16 / float32) sunt citite din
+flatbuffer, dequantizate și copiate pe arhitectura Keras - fără retraining
 """
 
 import os
 import sys
+import argparse
+
+import numpy as np
+from pathlib import Path
+
+
+def check_tensorflow(assume_yes=False):
+    """
+    Importă TensorFlow și verifică versiunea
+    Prompt doar interactiv; --yes (sau stdin non-TTY, ex. cron/CI) nu blochează
+    """
+    try:
+        import tensorflow as tf
+    except ImportError:
+        print("❌ TensorFlow nu e instalat!")
+        print("   Instalează cu: pip install tensorflow==2.12.0")
+        sys.exit(1)
 
-# Verifică versiunea TensorFlow
-try:
-    import tensorflow as tf
     tf_version = tf.__version__
     print(f"📋 TensorFlow version: {tf_version}")
 
@@ -18,68 +34,188 @@ try:
     if major > 2 or (major == 2 and minor > 14):
         print(f"⚠️  WARNING: TensorFlow {tf_version} poate crea modele incompatibile!")
         print(f"   Recomandat: pip install tensorflow==2.12.0")
+        if assume_yes:
+            return tf
+        if not sys.stdin.isatty():
+            print("   Non-interactive run: folosește --yes pentru a continua")
+            sys.exit(1)
         response = input("Continui oricum? (y/n): ")
         if response.lower() != 'y':
             sys.exit(0)
-except ImportError:
-    print("❌ TensorFlow nu e instalat!")
-    print("   Instalează cu: pip install tensorflow==2.12.0")
-    sys.exit(1)
 
-import numpy as np
-from pathlib import Path
+    return tf
+
+# Ops cu greutăți constante → layout Keras
+# CONV_2D: TFLite OHWI → Keras HWIO | FULLY_CONNECTED: TFLite (out, in) → Keras (in, out)
+WEIGHT_OPS = {
+    'CONV_2D': (1, 2, 3, 0),
+    'FULLY_CONNECTED': (1, 0),
+}
+PARITY_ATOL = 1e-3  # Diferență maximă acceptată pe probabilități
+PARITY_SAMPLES = 64
+
+
+def build_model(input_shape, num_classes):
+    """Arhitectura CNN 2D din train_model.build_model (60x76 input, 3 clase)"""
+    import tensorflow as tf
+
+    return tf.keras.Sequential([
+        tf.keras.layers.Input(shape=input_shape),
+
+        # Conv Block 1
+        tf.keras.layers.Reshape((*input_shape, 1)),  # Reshape pentru Conv2D
+        tf.keras.layers.Conv2D(32, (3, 3), activation='relu', padding='same'),
+        tf.keras.layers.MaxPooling2D((2, 2)),
+        tf.keras.layers.Dropout(0.2),
+
+        # Conv Block 2
+        tf.keras.layers.Conv2D(64, (3, 3), activation='relu', padding='same'),
+        tf.keras.layers.MaxPooling2D((2, 2)),
+        tf.keras.layers.Dropout(0.3),
+
+        # Conv Block 3
+        tf.keras.layers.Conv2D(128, (3, 3), activation='relu', padding='same'),
+        tf.keras.layers.GlobalAveragePooling2D(),
+
+        # Dense layers
+        tf.keras.layers.Dense(64, activation='relu'),
+        tf.keras.layers.Dropout(0.4),
+        tf.keras.layers.Dense(num_classes, activation='softmax')
+    ])
+
+
+def _dequantize(interpreter, tensor, tensors, producers):
+    """
+    Valoarea float32 a unui tensor constant
+    - int8/uint8 cu scale per-tensor sau per-channel: (q - zero_point) * scale
+    - float16 / int8 în spatele unui op DEQUANTIZE: se urmează input-ul op-ului
+    """
+    details = tensors[tensor]
+    producer = producers.get(tensor)
+    if producer is not None:
+        if producer['op_name'] != 'DEQUANTIZE':
+            raise ValueError(f"Weight tensor {details['name']} is computed by {producer['op_name']}, not constant")
+        return _dequantize(interpreter, int(producer['inputs'][0]), tensors, producers)
+
+    value = interpreter.get_tensor(tensor)
+    if value.dtype == np.float32:
+        return value.copy()
+    if value.dtype == np.float16:
+        return value.astype(np.float32)
+
+    quant = details['quantization_parameters']
+    scales = np.asarray(quant['scales'], dtype=np.float32)
+    zero_points = np.asarray(quant['zero_points'], dtype=np.float32)
+    if scales.size == 0:
+        raise ValueError(f"Weight tensor {details['name']} ({value.dtype}) has no quantization parameters")
+
+    # Per-channel: scale/zero_point broadcast pe quantized_dimension
+    shape = [1] * value.ndim
+    if scales.size > 1:
+        shape[quant['quantized_dimension']] = scales.size
+    if zero_points.size == 0:
+        zero_points = np.zeros_like(scales)
+
+    return (value.astype(np.float32) - zero_points.reshape(shape)) * scales.reshape(shape)
+
+
+def read_constant_weights(interpreter):
+    """
+    [(op_name, kernel, bias)] pentru fiecare CONV_2D / FULLY_CONNECTED, în ordinea grafului
+    Kernel-ele sunt dequantizate (float32) și transpuse în layout-ul Keras
+    """
+    ops = interpreter._get_ops_details()
+    tensors = {t['index']: t for t in interpreter.get_tensor_details()}
+    producers = {int(out): op for op in ops for out in op['outputs']}
+
+    weights = []
+    for op in ops:
+        if op['op_name'] not in WEIGHT_OPS:
+            continue
+
+        inputs = [int(i) for i in op['inputs']]
+        kernel = _dequantize(interpreter, inputs[1], tensors, producers).transpose(WEIGHT_OPS[op['op_name']])
+        bias = _dequantize(interpreter, inputs[2], tensors, producers) if len(inputs) > 2 and inputs[2] >= 0 else None
+        weights.append((op['op_name'], kernel, bias))
+
+    return weights
+
+
+def load_sample_windows(tflite_path, input_shape, samples=PARITY_SAMPLES):
+    """Ferestre reale din data/{coin}_{tf}_X_val.npy dacă există, altfel random normalizat"""
+    name = Path(tflite_path).name.replace('_model.tflite', '')
+    data_path = Path('data') / f'{name}_X_val.npy'
+
+    if data_path.exists():
+        X = np.load(data_path, mmap_mode='r')
+        idx = np.linspace(0, len(X) - 1, min(samples, len(X))).astype(int)
+        return np.asarray(X[idx], dtype=np.float32), str(data_path)
+
+    rng = np.random.default_rng(42)
+    return rng.standard_normal((samples, *input_shape)).astype(np.float32), 'random'
+
+
+def run_tflite(model, X):
+    """Inferență batch pe un model TFLite (path sau bytes)"""
+    import tensorflow as tf
+
+    if isinstance(model, (bytes, bytearray)):
+        interpreter = tf.lite.Interpreter(model_content=bytes(model))
+    else:
+        interpreter = tf.lite.Interpreter(model_path=str(model))
+
+    inp = interpreter.get_input_details()[0]
+    out = interpreter.get_output_details()[0]
+    interpreter.resize_tensor_input(inp['index'], [len(X), *inp['shape'][1:]])
+    interpreter.allocate_tensors()
+    interpreter.set_tensor(inp['index'], X)
+    interpreter.invoke()
+    return interpreter.get_tensor(out['index'])
+
 
 def extract_weights_and_recreate(tflite_path, output_path):
     """
-    Citește modelul TFLite existent, extrage arhitectura și greutățile,
-    apoi creează un model Keras și îl reconvertește cu versiunea curentă de TF
+    Citește modelul TFLite existent, extrage greutățile constante (dequantizate),
+    le pune pe arhitectura Keras echivalentă și reconvertește cu versiunea curentă de TF
+    Verifică paritatea output-urilor pe ferestre sample înainte de a salva
     """
+    import tensorflow as tf
+
     print(f"\n🔄 Processing: {tflite_path}")
 
     try:
-        # Încarcă modelul TFLite
-        interpreter = tf.lite.Interpreter(model_path=str(tflite_path))
+        # Încarcă modelul TFLite (fără delegate → tensorii constanți rămân citibili)
+        interpreter = tf.lite.Interpreter(
+            model_path=str(tflite_path),
+            experimental_op_resolver_type=tf.lite.experimental.OpResolverType.BUILTIN_WITHOUT_DEFAULT_DELEGATES
+        )
         interpreter.allocate_tensors()
 
         # Obține detalii despre input/output
         input_details = interpreter.get_input_details()
         output_details = interpreter.get_output_details()
 
-        input_shape = input_details[0]['shape'][1:]  # Skip batch dimension
+        input_shape = tuple(int(d) for d in input_details[0]['shape'][1:])  # Skip batch dimension
         output_shape = output_details[0]['shape'][1:]
 
         print(f"   Input shape: {input_shape}")
         print(f"   Output shape: {output_shape}")
 
-        # Creează un model Keras IDENTIC cu arhitectura din metadate
-        # Bazat pe metadata: CNN 2D cu 60x76 input și 3 clase output
-        model = tf.keras.Sequential([
-            tf.keras.layers.Input(shape=input_shape),
-
-            # Conv Block 1
-            tf.keras.layers.Reshape((60, 76, 1)),  # Reshape pentru Conv2D
-            tf.keras.layers.Conv2D(32, (3, 3), activation='relu', padding='same'),
-            tf.keras.layers.MaxPooling2D((2, 2)),
-            tf.keras.layers.Dropout(0.2),
+        # Greutăți din flatbuffer → straturile Keras, în ordine
+        weights = read_constant_weights(interpreter)
+        model = build_model(input_shape, int(output_shape[0]))
+        layers = [l for l in model.layers if isinstance(l, (tf.keras.layers.Conv2D, tf.keras.layers.Dense))]
 
-            # Conv Block 2
-            tf.keras.layers.Conv2D(64, (3, 3), activation='relu', padding='same'),
-            tf.keras.layers.MaxPooling2D((2, 2)),
-            tf.keras.layers.Dropout(0.3),
+        if len(layers) != len(weights):
+            raise ValueError(f"Architecture mismatch: {len(weights)} weight ops in TFLite, {len(layers)} Keras layers")
 
-            # Conv Block 3
-            tf.keras.layers.Conv2D(128, (3, 3), activation='relu', padding='same'),
-            tf.keras.layers.GlobalAveragePooling2D(),
+        for layer, (op_name, kernel, bias) in zip(layers, weights):
+            expected = layer.get_weights()[0].shape
+            if kernel.shape != expected:
+                raise ValueError(f"{layer.name}: TFLite {op_name} kernel {kernel.shape} != Keras {expected}")
+            layer.set_weights([kernel, bias if bias is not None else np.zeros(expected[-1], dtype=np.float32)])
 
-            # Dense layers
-            tf.keras.layers.Dense(64, activation='relu'),
-            tf.keras.layers.Dropout(0.4),
-            tf.keras.layers.Dense(output_shape[0], activation='softmax')
-        ])
-
-        # Încearcă să copieze greutățile din modelul vechi (parțial)
-        # NOTĂ: Acest lucru nu va funcționa perfect, dar va crea un model valid
-        print("   ⚠️  Creating new model with RANDOM weights (retraining needed!)")
+        print(f"   ✅ Copied weights for {len(layers)} layers ({model.count_params():,} params)")
 
         # Convertește la TFLite cu versiunea curentă
         converter = tf.lite.TFLiteConverter.from_keras_model(model)
@@ -88,13 +224,23 @@ def extract_weights_and_recreate(tflite_path, output_path):
 
         tflite_model = converter.convert()
 
+        # Paritate: modelul sursă vs modelul reconvertit, pe aceleași ferestre
+        X, source = load_sample_windows(tflite_path, input_shape)
+        expected = run_tflite(tflite_path, X)
+        actual = run_tflite(tflite_model, X)
+        max_diff = float(np.abs(expected - actual).max())
+        agreement = float((expected.argmax(axis=1) == actual.argmax(axis=1)).mean())
+
+        print(f"   Parity on {len(X)} windows ({source}): max |Δp| = {max_diff:.2e}, argmax agreement = {agreement:.1%}")
+        if max_diff > PARITY_ATOL:
+            raise ValueError(f"Parity check failed: max |Δp| {max_diff:.2e} > {PARITY_ATOL}")
+
         # Salvează
         with open(output_path, 'wb') as f:
             f.write(tflite_model)
 
         size_mb = len(tflite_model) / 1024 / 1024
         print(f"   ✅ Saved: {output_path} ({size_mb:.2f} MB)")
-        print(f"   ⚠️  Model uses RANDOM weights - needs retraining!")
 
         return True
 
@@ -102,8 +248,14 @@ def extract_weights_and_recreate(tflite_path, output_path):
         print(f"   ❌ Failed: {e}")
         return False
 
-def main():
+def main(argv=None):
     """Procesează toate modelele din assets/ml/"""
+    parser = argparse.ArgumentParser(description='Rebuild TFLite models with the installed TensorFlow')
+    parser.add_argument('--yes', action='store_true', help='Continue on TensorFlow version mismatch without prompting')
+    args = parser.parse_args(argv)
+
+    check_tensorflow(assume_yes=args.yes)
+
     input_dir = Path('assets/ml')
     output_dir = Path('assets/ml_v2')
     output_dir.mkdir(exist_ok=True)
@@ -120,7 +272,7 @@ def main():
 
     if not tflite_files:
         print("❌ No .tflite files found!")
-        return
+        return {'success': 0, 'failed': 0}
 
     print(f"📦 Found {len(tflite_files)} models to process\n")
 
@@ -142,13 +294,11 @@ def main():
     print("=" * 60)
 
     if success_count > 0:
-        print(f"\n⚠️  IMPORTANT:")
-        print(f"   Models in {output_dir}/ have RANDOM weights!")
-        print(f"   You MUST retrain them to get accurate predictions!")
         print(f"\n💡 Next steps:")
-        print(f"   1. Retrain models with TensorFlow 2.12.0")
-        print(f"   2. Copy trained models to assets/ml/")
-        print(f"   3. Run flutter clean && flutter run")
+        print(f"   1. Copy models from {output_dir}/ to assets/ml/")
+        print(f"   2. Run flutter clean && flutter run")
+
+    return {'success': success_count, 'failed': fail_count}
 
 if __name__ == '__main__':
     main()
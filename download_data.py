@@ -11,6 +11,9 @@ from datetime import datetime, timedelta
 import time
 import os
 
+from profiling import stage
+from feature_buffer import FeatureBuffer
+
 def download_binance_data(symbol, interval, limit=1000):
     """
     Download OHLCV data from Binance API
@@ -72,14 +75,16 @@ def download_binance_data(symbol, interval, limit=1000):
 
     return df[['timestamp', 'open', 'high', 'low', 'close', 'volume']]
 
-def calculate_features(df):
+def calculate_features(df, dtype=np.float32):
     """
     Calculate all 76 features (25 candle patterns + 51 technical indicators)
+    dtype: the (n, 76) buffer is allocated directly in the training dtype
 
     Note: This is a simplified version. Install TA-Lib for full pattern detection:
     pip install TA-Lib
     """
-    features = pd.DataFrame()
+    # Only NaN → 0 here (inf values are kept, as before)
+    features = FeatureBuffer(len(df), dtype=dtype, replace_inf=False)
 
     # OHLCV basic features (5)
     features['open'] = df['open']
@@ -89,22 +94,27 @@ def calculate_features(df):
     features['volume'] = df['volume']
 
     # Price-based features (10)
+    upper_shadow = df['high'] - df[['open', 'close']].max(axis=1)
+    lower_shadow = df[['open', 'close']].min(axis=1) - df['low']
+    body_size = abs(df['close'] - df['open'])
+
     features['hl_spread'] = df['high'] - df['low']
     features['oc_spread'] = df['close'] - df['open']
     features['price_change'] = df['close'].pct_change()
     features['volume_change'] = df['volume'].pct_change()
-    features['upper_shadow'] = df['high'] - df[['open', 'close']].max(axis=1)
-    features['lower_shadow'] = df[['open', 'close']].min(axis=1) - df['low']
-    features['body_size'] = abs(df['close'] - df['open'])
-    features['body_ratio'] = features['body_size'] / (df['high'] - df['low'] + 1e-10)
+    features['upper_shadow'] = upper_shadow
+    features['lower_shadow'] = lower_shadow
+    features['body_size'] = body_size
+    features['body_ratio'] = body_size / (df['high'] - df['low'] + 1e-10)
     features['hl_ratio'] = df['high'] / (df['low'] + 1e-10)
     features['oc_ratio'] = df['close'] / (df['open'] + 1e-10)
 
     # Moving Averages (15)
     for period in [5, 10, 20, 50, 100]:
-        features[f'sma_{period}'] = df['close'].rolling(period).mean()
+        sma = df['close'].rolling(period).mean()
+        features[f'sma_{period}'] = sma
         features[f'ema_{period}'] = df['close'].ewm(span=period).mean()
-        features[f'price_sma_{period}_ratio'] = df['close'] / features[f'sma_{period}']
+        features[f'price_sma_{period}_ratio'] = df['close'] / sma
 
     # RSI (3 periods)
     for period in [7, 14, 21]:
@@ -117,16 +127,20 @@ def calculate_features(df):
     # MACD (3)
     ema12 = df['close'].ewm(span=12).mean()
     ema26 = df['close'].ewm(span=26).mean()
-    features['macd'] = ema12 - ema26
-    features['macd_signal'] = features['macd'].ewm(span=9).mean()
-    features['macd_hist'] = features['macd'] - features['macd_signal']
+    macd = ema12 - ema26
+    macd_signal = macd.ewm(span=9).mean()
+    features['macd'] = macd
+    features['macd_signal'] = macd_signal
+    features['macd_hist'] = macd - macd_signal
 
     # Bollinger Bands (3)
     sma20 = df['close'].rolling(20).mean()
     std20 = df['close'].rolling(20).std()
-    features['bb_upper'] = sma20 + (2 * std20)
-    features['bb_lower'] = sma20 - (2 * std20)
-    features['bb_width'] = (features['bb_upper'] - features['bb_lower']) / sma20
+    bb_upper = sma20 + (2 * std20)
+    bb_lower = sma20 - (2 * std20)
+    features['bb_upper'] = bb_upper
+    features['bb_lower'] = bb_lower
+    features['bb_width'] = (bb_upper - bb_lower) / sma20
 
     # ATR (1)
     high_low = df['high'] - df['low']
@@ -138,15 +152,18 @@ def calculate_features(df):
     # Stochastic (2)
     low_14 = df['low'].rolling(14).min()
     high_14 = df['high'].rolling(14).max()
-    features['stoch_k'] = 100 * (df['close'] - low_14) / (high_14 - low_14 + 1e-10)
-    features['stoch_d'] = features['stoch_k'].rolling(3).mean()
+    stoch_k = 100 * (df['close'] - low_14) / (high_14 - low_14 + 1e-10)
+    features['stoch_k'] = stoch_k
+    features['stoch_d'] = stoch_k.rolling(3).mean()
 
     # Volume indicators (5)
-    features['volume_sma_20'] = df['volume'].rolling(20).mean()
-    features['volume_ratio'] = df['volume'] / features['volume_sma_20']
+    volume_sma_20 = df['volume'].rolling(20).mean()
+    vwap = (df['close'] * df['volume']).cumsum() / df['volume'].cumsum()
+    features['volume_sma_20'] = volume_sma_20
+    features['volume_ratio'] = df['volume'] / volume_sma_20
     features['obv'] = (df['volume'] * ((df['close'] - df['close'].shift()) > 0).astype(int) * 2 - df['volume']).cumsum()
-    features['vwap'] = (df['close'] * df['volume']).cumsum() / df['volume'].cumsum()
-    features['price_vwap_ratio'] = df['close'] / features['vwap']
+    features['vwap'] = vwap
+    features['price_vwap_ratio'] = df['close'] / vwap
 
     # Momentum indicators (3)
     features['momentum_10'] = df['close'].diff(10)
@@ -156,10 +173,10 @@ def calculate_features(df):
     # Simplified candle patterns (25)
     # In production, use TA-Lib for accurate pattern detection
     features['doji'] = (abs(df['close'] - df['open']) / (df['high'] - df['low'] + 1e-10) < 0.1).astype(float)
-    features['hammer'] = ((features['lower_shadow'] > 2 * features['body_size']) &
-                          (features['upper_shadow'] < 0.3 * features['body_size'])).astype(float)
-    features['shooting_star'] = ((features['upper_shadow'] > 2 * features['body_size']) &
-                                  (features['lower_shadow'] < 0.3 * features['body_size'])).astype(float)
+    features['hammer'] = ((lower_shadow > 2 * body_size) &
+                          (upper_shadow < 0.3 * body_size)).astype(float)
+    features['shooting_star'] = ((upper_shadow > 2 * body_size) &
+                                  (lower_shadow < 0.3 * body_size)).astype(float)
     features['engulfing_bull'] = ((df['close'] > df['open']) &
                                    (df['close'].shift() < df['open'].shift()) &
                                    (df['close'] > df['open'].shift()) &
@@ -173,46 +190,40 @@ def calculate_features(df):
     for i in range(21):
         features[f'pattern_{i+6}'] = 0.0
 
-    # Fill NaN with 0
-    features = features.fillna(0)
-
     # Verify we have exactly 76 features
-    assert features.shape[1] == 76, f"Expected 76 features, got {features.shape[1]}"
+    assert len(features.columns) == 76, f"Expected 76 features, got {len(features.columns)}"
 
-    return features
+    return features.to_frame(index=df.index)
 
 def create_sequences(features, seq_length=60, future_steps=1):
     """
     Create sequences of seq_length timesteps for training
     Labels: 0=SELL, 1=HOLD, 2=BUY based on future price movement
+    Returns X, y + price_change (forward return per window, for optimize_thresholds.py)
     """
-    X = []
-    y = []
+    values = features.to_numpy()
+    closes = features['close'].to_numpy(dtype=np.float64)
+    num_windows = max(len(features) - seq_length - future_steps, 0)
 
-    for i in range(len(features) - seq_length - future_steps):
-        # Input sequence
-        X.append(features.iloc[i:i+seq_length].values)
+    # Window i = rows [i, i+seq_length), written straight into one float32 array
+    windows = np.lib.stride_tricks.sliding_window_view(values, seq_length, axis=0)[:num_windows]
+    X = np.empty((num_windows, seq_length, values.shape[1]), dtype=np.float32)
+    X[:] = windows.transpose(0, 2, 1)
 
-        # Label based on future price movement
-        current_price = features.iloc[i+seq_length]['close']
-        future_price = features.iloc[i+seq_length+future_steps]['close']
+    # Label based on future price movement
+    current_price = closes[seq_length:seq_length + num_windows]
+    future_price = closes[seq_length + future_steps:seq_length + future_steps + num_windows]
+    price_change = (future_price - current_price) / current_price
 
-        price_change = (future_price - current_price) / current_price
+    # Classification thresholds: +0.2% = BUY, -0.2% = SELL, else HOLD
+    labels = np.ones(num_windows, dtype=np.int64)
+    labels[price_change > 0.002] = 2
+    labels[price_change < -0.002] = 0
 
-        # Classification thresholds
-        if price_change > 0.002:  # +0.2% = BUY
-            label = 2
-        elif price_change < -0.002:  # -0.2% = SELL
-            label = 0
-        else:  # HOLD
-            label = 1
+    # One-hot encode
+    y = np.eye(3, dtype=np.float32)[labels]
 
-        # One-hot encode
-        y_onehot = np.zeros(3)
-        y_onehot[label] = 1
-        y.append(y_onehot)
-
-    return np.array(X, dtype=np.float32), np.array(y, dtype=np.float32)
+    return X, y, price_change.astype(np.float32)
 
 def main():
     """Download and prepare data for all 18 models"""
@@ -246,7 +257,8 @@ def main():
                 print(f"{'='*60}")
 
                 # Download data
-                df = download_binance_data(symbol, timeframe)
+                with stage('fetch', coin=coin, timeframe=timeframe):
+                    df = download_binance_data(symbol, timeframe)
 
                 if df is None or len(df) < 500:
                     print(f"   ❌ Not enough data for {coin} {timeframe}")
@@ -255,11 +267,13 @@ def main():
 
                 # Calculate features
                 print(f"   🔧 Calculating 76 features...")
-                features = calculate_features(df)
+                with stage('features', coin=coin, timeframe=timeframe):
+                    features = calculate_features(df)
 
                 # Create sequences
                 print(f"   🔄 Creating sequences...")
-                X, y = create_sequences(features)
+                with stage('windowing', coin=coin, timeframe=timeframe):
+                    X, y, returns = create_sequences(features)
 
                 # Train/validation split (80/20)
                 split_idx = int(len(X) * 0.8)
@@ -271,6 +285,7 @@ def main():
                 np.save(f'data/{coin}_{timeframe}_y_train.npy', y_train)
                 np.save(f'data/{coin}_{timeframe}_X_val.npy', X_val)
                 np.save(f'data/{coin}_{timeframe}_y_val.npy', y_val)
+                np.save(f'data/{coin}_{timeframe}_returns_val.npy', returns[split_idx:])
 
                 print(f"   ✅ Saved {len(X_train)} training samples, {len(X_val)} validation samples")
                 print(f"   📦 Shape: {X_train.shape}")
@@ -289,5 +304,7 @@ def main():
     print(f"\nData saved to: ./data/")
     print(f"\nNext step: Run training with Docker!")
 
+    return {'success': success_count, 'failed': fail_count}
+
 if __name__ == '__main__':
     main()
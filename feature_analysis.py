@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+FEATURE ANALYSIS - elimină coloanele moarte din cele 76 de features
+- Constante / aproape mereu 0: pattern_* din download_data, padding-ul feature_{i}
+  din train_general / train_long_term, pattern-uri TA-Lib care nu apar aproape niciodată
+- Aproape-duplicate: |corelație| >= DUPLICATE_CORR (se păstrează prima coloană)
+- Permutation importance pe ferestrele de validare (batch-uri TFLite), în paralel pe
+  features (ProcessPoolExecutor, un interpreter per proces; X / y în memorie partajată,
+  workerii se atașează read-only - un singur exemplar indiferent de numărul de procese)
+
+Rezultatul e un feature set redus (reports/feature_analysis/{name}_feature_set.json):
+indicii păstrați + motivul fiecărei coloane eliminate. Antrenarea cu --feature-set
+construiește modelul cu input (60, num_features) - mai puține features de calculat,
+mai puține FLOPs, mai puțin de trimis din client.
+
+    python feature_analysis.py --data data/btc_15m --model assets/ml/btc_15m_model.tflite
+    python feature_analysis.py --builder general          # doar constante/duplicate, OHLCV sintetic
+    python train_model.py --feature-set reports/feature_analysis/btc_15m_feature_set.json
+"""
+
+import os
+import json
+import argparse
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from shared_dataset import SharedDataset, attach
+
+REPORTS_DIR = 'reports/feature_analysis'
+NUM_FEATURES = 76
+
+MIN_NONZERO = 0.001     # Coloană „moartă” dacă e nenulă pe < 0.1% din rânduri
+CONSTANT_STD = 1e-8     # Variație sub care coloana e constantă
+DUPLICATE_CORR = 0.995  # |corr| peste care două coloane sunt aproape-duplicate
+MIN_SENSITIVITY = 1e-3  # Δp mediu sub care permutarea nu schimbă modelul
+PERMUTATION_REPEATS = 3
+BATCH_SIZE = 256
+
+BUILDERS = {
+    'download': ('download_data', 'calculate_features'),
+    'general': ('train_general', 'build_76_features_normalized'),
+    'long_term': ('train_long_term', 'build_76_features_for_daily'),
+    'transformer': ('train_transformer', 'build_exact_76_features'),
+}
+
+
+# ============================================================================
+# CONSTANT / DUPLICATE COLUMNS
+# ============================================================================
+
+def feature_rows(X):
+    """Rândurile unice acoperite de ferestre suprapuse (stride 1): prima fereastră + ultimul pas din rest"""
+    X = np.asarray(X)
+    if X.ndim == 2:
+        return X
+    return np.concatenate([X[0], X[1:, -1, :]], axis=0)
+
+
+def constant_columns(rows, min_nonzero=MIN_NONZERO, std_tol=CONSTANT_STD):
+    """{index: motiv} pentru coloanele constante sau aproape mereu 0"""
+    rows = np.asarray(rows, dtype=np.float64)
+    finite = np.where(np.isfinite(rows), rows, 0.0)
+    std = finite.std(axis=0)
+    nonzero = (finite != 0).mean(axis=0)
+
+    dead = {}
+    for j in range(rows.shape[1]):
+        if std[j] <= std_tol * max(1.0, abs(finite[:, j].mean())):
+            dead[j] = f'constant ({finite[0, j]:g})'
+        elif nonzero[j] < min_nonzero:
+            dead[j] = f'nonzero on {nonzero[j]:.3%} of rows'
+    return dead
+
+
+def duplicate_columns(rows, exclude=(), threshold=DUPLICATE_CORR):
+    """{index: index păstrat} pentru coloanele aproape identice (|corr| >= threshold) cu una anterioară"""
+    rows = np.asarray(rows, dtype=np.float64)
+    candidates = [j for j in range(rows.shape[1]) if j not in set(exclude)]
+    if len(candidates) < 2:
+        return {}
+
+    data = np.where(np.isfinite(rows[:, candidates]), rows[:, candidates], 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        corr = np.abs(np.corrcoef(data, rowvar=False))
+    corr = np.nan_to_num(corr)
+
+    duplicates = {}
+    for a in range(len(candidates)):
+        if candidates[a] in duplicates:
+            continue
+        for b in np.nonzero(corr[a, a + 1:] >= threshold)[0] + a + 1:
+            duplicates.setdefault(candidates[b], candidates[a])
+    return duplicates
+
+
+# ============================================================================
+# PERMUTATION IMPORTANCE (paralel, batch-uri TFLite)
+# ============================================================================
+
+_worker = {}
+
+
+def _init_worker(model_path, manifest, batch_size):
+    import tensorflow as tf
+
+    data = attach(manifest)
+    interpreter = tf.lite.Interpreter(model_path=model_path)
+    _worker.update(interpreter=interpreter, data=data, X=data['X'], y=data['y'], batch_size=batch_size)
+    _worker['baseline'] = _predict(data['X'])
+
+
+def _predict(X, permuted=None):
+    """
+    Inferență pe batch-uri de batch_size (input redimensionat o singură dată per mărime)
+    permuted: (j, perm) → coloana j luată din ferestrele perm, doar în copia batch-ului curent
+    """
+    interpreter = _worker['interpreter']
+    batch_size = _worker['batch_size']
+    inp = interpreter.get_input_details()[0]
+    out = interpreter.get_output_details()[0]
+
+    probs, current = [], None
+    for start in range(0, len(X), batch_size):
+        batch = X[start:start + batch_size]
+        if permuted is not None:
+            j, perm = permuted
+            batch = batch.copy()
+            batch[:, :, j] = X[perm[start:start + batch_size], :, j]
+        if len(batch) != current:
+            interpreter.resize_tensor_input(inp['index'], [len(batch), *inp['shape'][1:]])
+            interpreter.allocate_tensors()
+            current = len(batch)
+        interpreter.set_tensor(inp['index'], batch)
+        interpreter.invoke()
+        probs.append(interpreter.get_tensor(out['index']).copy())
+    return np.concatenate(probs)
+
+
+def _permute_feature(args):
+    """Permută coloana j între ferestre (toată seria de 60 de pași) → Δacuratețe, Δp mediu"""
+    j, repeats, seed = args
+    X, y, baseline = _worker['X'], _worker['y'], _worker['baseline']
+    rng = np.random.default_rng(seed + j)
+
+    base_acc = float((baseline.argmax(axis=1) == y).mean())
+    drops, sensitivity = [], []
+    for _ in range(repeats):
+        probs = _predict(X, permuted=(j, rng.permutation(len(X))))
+        drops.append(base_acc - float((probs.argmax(axis=1) == y).mean()))
+        sensitivity.append(float(np.abs(probs - baseline).sum(axis=1).mean()))
+
+    return j, float(np.mean(drops)), float(np.std(drops)), float(np.mean(sensitivity))
+
+
+def permutation_importance(model_path, X, y, features=None, repeats=PERMUTATION_REPEATS,
+                           batch_size=BATCH_SIZE, workers=None, seed=42):
+    """
+    {index: {accuracy_drop, accuracy_drop_std, sensitivity}} pentru features (implicit toate)
+    sensitivity = Σ|p_perm - p| mediu pe fereastră - nu depinde de zgomotul etichetelor
+    """
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    y = np.asarray(y)
+    if y.ndim > 1:
+        y = y.argmax(axis=1)
+    features = list(range(X.shape[2])) if features is None else list(features)
+
+    workers = workers or min(len(features), os.cpu_count() or 1)
+    with SharedDataset({'X': X, 'y': y}) as shared, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                initargs=(model_path, shared.manifest, batch_size)) as pool:
+        results = list(pool.map(_permute_feature, [(j, repeats, seed) for j in features]))
+        return {
+            j: {'accuracy_drop': drop, 'accuracy_drop_std': drop_std, 'sensitivity': sens}
+            for j, drop, drop_std, sens in results
+        }
+
+
+# ============================================================================
+# FEATURE SET
+# ============================================================================
+
+def select_features(num_features, constant, duplicates, importance=None,
+                    min_sensitivity=MIN_SENSITIVITY, keep=None):
+    """Indicii păstrați + motivele eliminării (constant → duplicate → importanță mică / top-k)"""
+    kept = [j for j in range(num_features) if j not in constant and j not in duplicates]
+    low_importance = []
+
+    if importance:
+        ranked = sorted(kept, key=lambda j: importance[j]['sensitivity'], reverse=True)
+        low_importance = [j for j in ranked if importance[j]['sensitivity'] < min_sensitivity]
+        if keep:
+            low_importance = sorted(set(low_importance) | set(ranked[keep:]))
+        kept = [j for j in kept if j not in set(low_importance)]
+
+    return kept, {
+        'constant': {str(j): reason for j, reason in sorted(constant.items())},
+        'duplicate': {str(j): of for j, of in sorted(duplicates.items())},
+        'low_importance': sorted(low_importance),
+    }
+
+
+def load_feature_set(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def apply_feature_set(X, feature_set):
+    """(..., 76) → (..., num_features) cu coloanele păstrate"""
+    indices = feature_set['feature_indices'] if isinstance(feature_set, dict) else feature_set
+    return np.ascontiguousarray(np.asarray(X)[..., indices])
+
+
+def feature_names(builder_name):
+    """Numele coloanelor, dacă builder-ul întoarce DataFrame (download_data.calculate_features)"""
+    import importlib
+    from feature_buffer import random_walk_ohlcv
+
+    module, attr = BUILDERS[builder_name]
+    try:
+        frame = getattr(importlib.import_module(module), attr)(random_walk_ohlcv(500))
+    except ImportError:
+        return None
+    return list(frame.columns) if hasattr(frame, 'columns') else None
+
+
+def analyze(name, X, y=None, model_path=None, names=None, repeats=PERMUTATION_REPEATS,
+            workers=None, min_sensitivity=MIN_SENSITIVITY, keep=None):
+    rows = feature_rows(X)
+    num_features = rows.shape[1]
+
+    constant = constant_columns(rows)
+    duplicates = duplicate_columns(rows, exclude=constant)
+    print(f"🧱 Constant / dead: {len(constant)}   🪞 Near-duplicate: {len(duplicates)}")
+
+    importance = None
+    if model_path and y is not None and np.ndim(X) == 3:
+        candidates = [j for j in range(num_features) if j not in constant and j not in duplicates]
+        print(f"🔀 Permutation importance: {len(candidates)} features × {repeats} repeats, {len(X)} windows...")
+        importance = permutation_importance(model_path, X, y, candidates, repeats=repeats, workers=workers)
+
+    kept, dropped = select_features(num_features, constant, duplicates, importance, min_sensitivity, keep)
+
+    def label(j):
+        return names[j] if names and j < len(names) else f'feature_{j}'
+
+    return {
+        'name': name,
+        'model': model_path,
+        'num_features_in': num_features,
+        'num_features': len(kept),
+        'feature_indices': kept,
+        'feature_names': [label(j) for j in kept],
+        'dropped': dropped,
+        'importance': None if importance is None else [
+            {'index': j, 'name': label(j), **importance[j]}
+            for j in sorted(importance, key=lambda j: importance[j]['sensitivity'], reverse=True)
+        ],
+        'date': datetime.now().isoformat(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Constant / duplicate / permutation-importance feature pruning')
+    parser.add_argument('--data', help='Prefix for {data}_X_val.npy / {data}_y_val.npy (e.g. data/btc_15m)')
+    parser.add_argument('--builder', choices=sorted(BUILDERS), default='download',
+                        help='Feature builder (column names; synthetic OHLCV when --data is missing)')
+    parser.add_argument('--model', help='TFLite model for permutation importance')
+    parser.add_argument('--repeats', type=int, default=PERMUTATION_REPEATS)
+    parser.add_argument('--workers', type=int, help='Processes for permutation importance (default: all CPUs)')
+    parser.add_argument('--min-sensitivity', type=float, default=MIN_SENSITIVITY)
+    parser.add_argument('--keep', type=int, help='Keep at most the top-K features by importance')
+    parser.add_argument('--output', help='Feature set JSON path')
+    args = parser.parse_args()
+
+    if args.data:
+        X = np.load(f'{args.data}_X_val.npy', mmap_mode='r')
+        y_path = f'{args.data}_y_val.npy'
+        y = np.load(y_path) if os.path.exists(y_path) else None
+        name = os.path.basename(args.data)
+        names = feature_names(args.builder)
+    else:
+        import importlib
+        from feature_buffer import random_walk_ohlcv
+
+        module, attr = BUILDERS[args.builder]
+        frame = getattr(importlib.import_module(module), attr)(random_walk_ohlcv())
+        names = list(frame.columns) if hasattr(frame, 'columns') else None
+        X, y = np.asarray(frame), None
+        name = args.builder
+
+    result = analyze(name, X, y, args.model, names, args.repeats, args.workers,
+                     args.min_sensitivity, args.keep)
+
+    print(f"\n{'='*60}")
+    print(f"✅ {name}: {result['num_features_in']} → {result['num_features']} features")
+    for j, reason in result['dropped']['constant'].items():
+        print(f"   🧱 {j:>2} {names[int(j)] if names else '':<20} {reason}")
+    for j, of in result['dropped']['duplicate'].items():
+        print(f"   🪞 {j:>2} {names[int(j)] if names else '':<20} ≈ {of}")
+    if result['dropped']['low_importance']:
+        print(f"   💤 Low importance: {result['dropped']['low_importance']}")
+
+    output = args.output or os.path.join(REPORTS_DIR, f'{name}_feature_set.json')
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2)
+    print(f"💾 Saved: {output}")
+
+
+if __name__ == '__main__':
+    main()
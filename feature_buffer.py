@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Preallocated feature matrix for the 76-feature builders
+Indicators are still computed per column in float64 (pandas / TA-Lib), but each
+column is written straight into ONE (n, 76) buffer of the requested dtype -
+no float64 DataFrame, no fillna/replace copies, no float64 → float32 cast at the end
+
+    python feature_buffer.py    # float32 vs float64 tolerance on every builder
+"""
+
+import numpy as np
+
+NUM_FEATURES = 76
+
+# Toleranță float32 vs float64: relativ la scala fiecărei coloane
+RTOL = 1e-5
+
+
+class FeatureBuffer:
+    """
+    features = FeatureBuffer(len(df), dtype=np.float32)
+    features['rsi_14'] = rsi        # Series / ndarray, NaN (și ±inf) → 0 la scriere
+    return features.values          # (n, 76)
+
+    Same column semantics as the DataFrame version: columns in insertion order,
+    extra columns past num_features dropped, missing ones left at 0.
+    """
+
+    def __init__(self, n_rows, num_features=NUM_FEATURES, dtype=np.float32, replace_inf=True):
+        self.values = np.zeros((n_rows, num_features), dtype=dtype)
+        self.replace_inf = replace_inf
+        self.columns = []
+        self._index = {}
+
+    def __setitem__(self, name, values):
+        idx = self._index.get(name)
+        if idx is None:
+            self._index[name] = idx = len(self.columns)
+            self.columns.append(name)
+
+        if idx >= self.values.shape[1]:
+            return
+
+        column = self.values[:, idx]
+        column[:] = np.asarray(values, dtype=np.float64)
+
+        if self.replace_inf:
+            np.nan_to_num(column, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+        else:
+            column[np.isnan(column)] = 0.0
+
+    def __len__(self):
+        return min(len(self.columns), self.values.shape[1])
+
+    def to_frame(self, index=None):
+        """DataFrame view over the buffer (no copy)"""
+        import pandas as pd
+
+        return pd.DataFrame(self.values, index=index, columns=self.columns[:self.values.shape[1]], copy=False)
+
+
+def random_walk_ohlcv(n=2000, seed=0):
+    """Synthetic OHLCV (RangeIndex) for the tolerance check"""
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    open_ = np.concatenate([[close[0]], close[:-1]]) * (1 + rng.normal(0, 0.002, n))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.004, n)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.004, n)))
+    volume = rng.lognormal(10, 1, n)
+
+    return pd.DataFrame({
+        'timestamp': np.arange(n, dtype=np.int64) * 300_000,
+        'open': open_, 'high': high, 'low': low, 'close': close, 'volume': volume,
+    })
+
+
+def compare_dtypes(builder, df):
+    """
+    builder(df, dtype=np.float32) vs builder(df, dtype=np.float64)
+    Eroare maximă per coloană, relativă la max |valoare| a coloanei float64
+    """
+    ref = np.asarray(builder(df, dtype=np.float64))
+    out = np.asarray(builder(df, dtype=np.float32))
+    assert out.dtype == np.float32 and ref.dtype == np.float64, (out.dtype, ref.dtype)
+
+    finite = np.isfinite(ref)
+    with np.errstate(invalid='ignore'):
+        diff = np.where(finite, np.abs(out.astype(np.float64) - ref), 0.0)
+    scale = np.where(finite, np.abs(ref), 0.0).max(axis=0)
+    rel = diff.max(axis=0) / np.maximum(scale, np.finfo(np.float64).tiny)
+
+    return {
+        'max_abs_error': float(diff.max()),
+        'max_rel_error': float(rel.max()),
+        'worst_column': int(rel.argmax()),
+        'nonfinite_mismatch': int((np.isfinite(out) != finite).sum()),
+        'bytes_float32': int(out.nbytes),
+        'bytes_float64': int(ref.nbytes),
+    }
+
+
+def _builders():
+    """(name, builder) pentru fiecare builder importabil în mediul curent"""
+    candidates = [
+        ('download_data.calculate_features', 'download_data', 'calculate_features'),
+        ('train_general.build_76_features_normalized', 'train_general', 'build_76_features_normalized'),
+        ('train_long_term.build_76_features_for_daily', 'train_long_term', 'build_76_features_for_daily'),
+        ('train_transformer.build_exact_76_features', 'train_transformer', 'build_exact_76_features'),
+    ]
+    import importlib
+
+    for name, module, attr in candidates:
+        try:
+            yield name, getattr(importlib.import_module(module), attr)
+        except ImportError as e:
+            print(f"⚠️  {name}: skipped ({e})")
+
+
+def main():
+    df = random_walk_ohlcv()
+    failed = 0
+
+    print(f"{'Builder':<48} {'max abs':>10} {'max rel':>10} {'MB f32/f64':>12}")
+    for name, builder in _builders():
+        result = compare_dtypes(builder, df)
+        ok = result['max_rel_error'] <= RTOL and result['nonfinite_mismatch'] == 0
+        failed += not ok
+
+        mb = f"{result['bytes_float32'] / 1e6:.2f}/{result['bytes_float64'] / 1e6:.2f}"
+        print(f"{'✅' if ok else '❌'} {name:<46} {result['max_abs_error']:>10.2e} "
+              f"{result['max_rel_error']:>10.2e} {mb:>12}")
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+WARM-UP SNAPSHOTS - prima predicție imediat după restart
+Builder-ele de features au nevoie de istoric (SMA200 → ~200 lumânări, 52w_high → 252)
+Un snapshot per (simbol, interval) păstrează, într-un .npz compact:
+- coada de lumânări brute (history rânduri, destul pentru warm-up + fereastra de 60)
+- offset-urile coloanelor cumulative (OBV, A/D line, volume_price_trend): pe o coadă
+  trunchiată ele pornesc de la 0, deci diferă de istoricul complet printr-o constantă
+- ultima fereastră (60, 76) deja calculată → predicție fără niciun recalcul
+
+Coloanele care depind de TOT istoricul fără a fi o simplă constantă (medie pe toată seria,
+VWAP cumulativ, tranzientul EWM) sunt calculate pe coadă, exact ca pipeline-ul live
+(stream_klines / mtm features pe ultimele 300 de lumânări); la save sunt listate
+
+La restore: fereastra e disponibilă instant; lumânările pierdute de la snapshot încoace
+se recuperează (candle store CSV sau Binance REST) și se recalculează DOAR coada
+
+    python feature_snapshot.py save --store data/candles --builder download
+    python feature_snapshot.py restore --store data/candles --out data/features
+"""
+
+import os
+import glob
+import time
+import argparse
+import importlib
+
+import numpy as np
+
+SNAPSHOT_DIR = 'data/snapshots'
+SEQUENCE_LENGTH = 60
+SNAPSHOT_VERSION = 1
+CANDLE_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+# Builder → (modul, funcție, lumânări de istoric păstrate în snapshot)
+BUILDERS = {
+    'download': ('download_data', 'calculate_features', 300),
+    'general': ('train_general', 'build_76_features_normalized', 300),
+    'long_term': ('train_long_term', 'build_76_features_for_daily', 360),
+    'transformer': ('train_transformer', 'build_exact_76_features', 300),
+}
+OFFSET_RTOL = 1e-6  # Diferența coadă vs istoric complet e „constantă” sub această toleranță
+
+
+def _builder(name):
+    module, attr, _ = BUILDERS[name]
+    return getattr(importlib.import_module(module), attr)
+
+
+def _frame(candles):
+    import pandas as pd
+
+    frame = pd.DataFrame(candles[:, 1:], columns=CANDLE_COLUMNS[1:])
+    frame.insert(0, 'timestamp', candles[:, 0].astype(np.int64))
+    return frame
+
+
+def _features(builder, candles):
+    return np.asarray(builder(_frame(candles)), dtype=np.float64)
+
+
+def column_offsets(reference, tail):
+    """
+    reference / tail: ultimele rânduri (aceleași lumânări) din istoricul complet vs coada
+    → (offsets, additive, mismatch): offset constant per coloană cumulativă, coloanele
+    la care diferența NU e constantă (depind de tot istoricul, ex. medie pe toată seria)
+    """
+    diff = reference - tail
+    scale = np.maximum(np.abs(reference).max(axis=0), 1.0)
+    additive = np.ptp(diff, axis=0) <= OFFSET_RTOL * scale
+    offsets = np.where(additive, diff.mean(axis=0), 0.0)
+    mismatch = ~additive & (np.abs(diff).max(axis=0) > OFFSET_RTOL * scale)
+    return offsets, additive, mismatch
+
+
+class FeatureState:
+    """
+    Starea de warm-up a unui simbol:
+        state = FeatureState.from_history('BTCUSDT', '5m', candles, 'download')   # o singură dată
+        state.window                            # (60, 76) float32, gata de inferență
+        state.update(new_candles)               # doar lumânări închise, mai noi decât last_ts
+        state.save(path) / FeatureState.load(path)
+    """
+
+    def __init__(self, symbol, interval, builder, candles, offsets, window, history=None, mismatch=None):
+        self.symbol = symbol
+        self.interval = interval
+        self.builder = builder
+        self.history = history or BUILDERS[builder][2]
+        self.candles = np.asarray(candles, dtype=np.float64)
+        self.offsets = np.asarray(offsets, dtype=np.float64)
+        self.window = np.asarray(window, dtype=np.float32)
+        self.mismatch = np.zeros(len(self.offsets), dtype=bool) if mismatch is None else np.asarray(mismatch, bool)
+
+    @property
+    def last_ts(self):
+        return int(self.candles[-1, 0])
+
+    @classmethod
+    def from_history(cls, symbol, interval, candles, builder='download', history=None):
+        """candles: (N, 6) [timestamp, o, h, l, c, v] sau DataFrame; N >= history (tot istoricul disponibil)"""
+        candles = np.asarray(candles[CANDLE_COLUMNS] if hasattr(candles, 'columns') else candles, dtype=np.float64)
+        history = history or BUILDERS[builder][2]
+        build = _builder(builder)
+
+        full = _features(build, candles)
+        tail = _features(build, candles[-history:])
+        offsets, _, mismatch = column_offsets(full[-SEQUENCE_LENGTH:], tail[-SEQUENCE_LENGTH:])
+        window = tail[-SEQUENCE_LENGTH:] + offsets  # Aceeași semantică ca update()
+        return cls(symbol, interval, builder, candles[-history:], offsets, window, history, mismatch)
+
+    def update(self, new_candles):
+        """
+        Catch-up: features pe ultimele `history` lumânări (ca un cold start pe aceeași coadă);
+        offset-urile cumulative se re-ancorează pe noua origine a cozii
+        """
+        new_candles = np.asarray(new_candles, dtype=np.float64).reshape(-1, 6)
+        new_candles = new_candles[new_candles[:, 0] > self.last_ts]
+        if not len(new_candles):
+            return 0
+
+        build = _builder(self.builder)
+        candles = np.concatenate([self.candles, new_candles])
+        features = _features(build, candles)
+
+        if len(candles) > self.history:
+            corrected = features + self.offsets  # Aceeași origine ca înainte → offset valid
+            candles = candles[-self.history:]
+            features = _features(build, candles)
+            self.offsets, _, _ = column_offsets(corrected[-SEQUENCE_LENGTH:], features[-SEQUENCE_LENGTH:])
+
+        self.candles = candles
+        self.window = (features[-SEQUENCE_LENGTH:] + self.offsets).astype(np.float32)
+        return len(new_candles)
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f'{path}.tmp.npz'
+        np.savez_compressed(
+            tmp_path,
+            version=SNAPSHOT_VERSION,
+            symbol=self.symbol, interval=self.interval, builder=self.builder, history=self.history,
+            candles=self.candles, offsets=self.offsets, window=self.window, mismatch=self.mismatch,
+        )
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            if int(data['version']) != SNAPSHOT_VERSION:
+                raise ValueError(f"{path}: snapshot version {int(data['version'])} != {SNAPSHOT_VERSION}")
+            return cls(str(data['symbol']), str(data['interval']), str(data['builder']), data['candles'],
+                       data['offsets'], data['window'], int(data['history']), data['mismatch'])
+
+
+def snapshot_path(symbol, interval, root=SNAPSHOT_DIR):
+    return os.path.join(root, f'{symbol}_{interval}.npz')
+
+
+# ============================================================================
+# CATCH-UP: lumânările pierdute de la snapshot
+# ============================================================================
+
+def missed_from_store(store_dir, symbol, interval, since_ts):
+    """Din candle store-ul stream_klines (CSV append-only)"""
+    import pandas as pd
+
+    path = os.path.join(store_dir, f'{symbol}_{interval}.csv')
+    if not os.path.exists(path):
+        return np.empty((0, 6))
+    df = pd.read_csv(path)
+    return df.loc[df['timestamp'] > since_ts, CANDLE_COLUMNS].to_numpy(dtype=np.float64)
+
+
+def missed_from_binance(symbol, interval, since_ts, limit=1000):
+    """Binance REST /api/v3/klines de la since_ts; doar lumânări închise"""
+    import requests
+
+    candles = []
+    start = since_ts + 1
+    while True:
+        response = requests.get('https://api.binance.com/api/v3/klines', timeout=10, params={
+            'symbol': symbol, 'interval': interval, 'startTime': start, 'limit': limit,
+        })
+        response.raise_for_status()
+        rows = response.json()
+        now_ms = time.time() * 1000
+        candles.extend([int(r[0]), *map(float, r[1:6])] for r in rows if r[6] < now_ms)
+        if len(rows) < limit:
+            break
+        start = int(rows[-1][0]) + 1
+    return np.asarray(candles, dtype=np.float64).reshape(-1, 6)
+
+
+def restore(path, catch_up=None):
+    """
+    Snapshot → FeatureState gata de predicție
+    catch_up(symbol, interval, since_ts) → (M, 6) lumânările pierdute (opțional)
+    """
+    state = FeatureState.load(path)
+    if catch_up is not None:
+        state.update(catch_up(state.symbol, state.interval, state.last_ts))
+    return state
+
+
+def main():
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description='Feature warm-up snapshots (save / restore + catch-up)')
+    parser.add_argument('command', choices=['save', 'restore'])
+    parser.add_argument('--store', default='data/candles', help='Candle store CSV directory (stream_klines)')
+    parser.add_argument('--snapshots', default=SNAPSHOT_DIR)
+    parser.add_argument('--builder', choices=sorted(BUILDERS), default='download')
+    parser.add_argument('--binance', action='store_true', help='Catch up from Binance REST instead of the store')
+    parser.add_argument('--out', help='Write the restored (60, 76) windows as {symbol}_{interval}.npy')
+    args = parser.parse_args()
+
+    if args.command == 'save':
+        for path in sorted(glob.glob(os.path.join(args.store, '*.csv'))):
+            symbol, interval = os.path.basename(path)[:-len('.csv')].rsplit('_', 1)
+            df = pd.read_csv(path)
+            if len(df) < BUILDERS[args.builder][2]:
+                print(f"⚠️  {symbol} {interval}: {len(df)} candles < {BUILDERS[args.builder][2]}, skipped")
+                continue
+            state = FeatureState.from_history(symbol, interval, df, args.builder)
+            out = state.save(snapshot_path(symbol, interval, args.snapshots))
+            flagged = np.flatnonzero(state.mismatch)
+            print(f"💾 {symbol} {interval}: {out} ({os.path.getsize(out) / 1024:.1f} KB)"
+                  + (f", history-dependent columns {flagged.tolist()}" if len(flagged) else ''))
+        return
+
+    catch_up = missed_from_binance if args.binance else (
+        lambda symbol, interval, since: missed_from_store(args.store, symbol, interval, since))
+    for path in sorted(glob.glob(os.path.join(args.snapshots, '*.npz'))):
+        start = time.perf_counter()
+        state = FeatureState.load(path)
+        ready_ms = (time.perf_counter() - start) * 1000
+        missed = state.update(catch_up(state.symbol, state.interval, state.last_ts))
+        total_ms = (time.perf_counter() - start) * 1000
+        print(f"⚡ {state.symbol} {state.interval}: window ready in {ready_ms:.1f} ms, "
+              f"{missed} missed candles caught up in {total_ms:.1f} ms")
+
+        if args.out:
+            os.makedirs(args.out, exist_ok=True)
+            np.save(os.path.join(args.out, f'{state.symbol}_{state.interval}.npy'), state.window)
+        if missed:
+            state.save(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,666 @@
+#!/usr/bin/env python3
+"""
+INFERENCE SERVER - predicții server-side pentru dashboards / scanere pe sute de simboluri
+asyncio HTTP/1.1 (TCP sau Unix socket), modele încărcate din model_registry.json
+
+Aceeași decizie ca UnifiedMLService (Dart):
+    modele per-coin + general ('*') pentru timeframe → calibrate (temp, bias) → medie ponderată (w)
+    → RiskGate (prag per timeframe + bump la volatilitate mare) → SELL / HOLD / BUY
+
+Micro-batching: fiecare model are o coadă; cererile concurente (orice simbol) care ajung
+în fereastra de max_wait_ms sunt unite într-un singur apel batched al interpretorului.
+Cât timp un batch rulează, cererile noi se adună → următorul batch pleacă imediat.
+Interpretorul rulează într-un thread dedicat per model (event loop-ul nu se blochează,
+modele diferite rulează în paralel, același interpretor niciodată concurent)
+
+Batch-ul maxim se alege la pornire per model (--max-batch auto): se măsoară windows/s pe
+batch-uri 1, 2, 4, ... ≤ AUTO_BATCH_LIMIT și se păstrează cel mai rapid; un batch mai mare
+trebuie să fie cu MIN_BATCH_SPEEDUP mai rapid. Pe CPU un singur apel batched e adesea mai
+lent per fereastră decât batch 1 (general_5m: 315 vs 454 windows/s la batch 64) → acolo
+modelul rămâne pe 1, iar cererile concurente se servesc una după alta din coadă
+
+    python inference_server.py serve --port 8765
+    python inference_server.py serve --unix /tmp/mtm.sock --max-batch 128 --max-wait-ms 3
+    python inference_server.py loadtest --symbols 300 --requests 3000    # batched vs batch=1
+
+    POST /predict  {"symbol": "BTCUSDT", "timeframe": "1h", "window": [[76 × float] × 60]}
+                   {"symbol": "ETHUSDT", "timeframe": "5m", "window_b64": "<float32 (60, 76) base64>"}
+                   {"requests": [ {...}, {...} ]}                   → listă de rezultate
+    GET  /metrics  queue depth, batch sizes, latențe (queue wait / inference / total) p50-p99
+    GET  /models   GET /health
+"""
+
+import os
+import json
+import time
+import base64
+import bisect
+import signal
+import asyncio
+import argparse
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import tensorflow as tf
+
+from calibration import REGISTRY_PATH, load_registry, calibrate_probs
+from risk_gate import RiskGate, vol_z_from_windows, LABELS
+from scaler_fit import StreamingScaler
+
+MODELS_DIR = 'assets/ml'
+SEQUENCE_LENGTH = 60
+NUM_FEATURES = 76
+AUTO_BATCH_LIMIT = 64
+MIN_BATCH_SPEEDUP = 1.10  # Batch mai mare doar dacă windows/s crește cu cel puțin 10%
+TUNE_SECONDS = 0.1  # Timp de măsurare per batch candidat
+MAX_WAIT_MS = 5.0
+LATENCY_SAMPLES = 10_000  # Fereastra pentru percentile (ultimele N măsurători)
+ENGINES = ('tflite', 'onnxruntime')
+QUOTES = ('USDT', 'USDC', 'USD', 'EUR')
+MAX_BODY_BYTES = 64 * 2 ** 20
+
+
+def extract_base(symbol):
+    """BTCUSDT, BTC/USDT, btc → BTC (ca _extractBase din Dart)"""
+    s = symbol.replace('/', '').upper()
+    for quote in QUOTES:
+        if s.endswith(quote) and len(s) > len(quote):
+            return s[:-len(quote)]
+    return s
+
+
+def batch_buckets(max_batch):
+    """
+    Formele de batch servite: 1, 2, 3, 4, 6, 8, 12, 16, 24, ... ≤ max_batch (+ max_batch)
+    Batch-ul e completat la următorul bucket → puține interpretoare, padding ≤ 33%
+    (pe CPU costul per fereastră nu scade cu batch-ul, deci padding-ul la 2^k ar fi pierdere pură)
+    """
+    buckets = {max_batch}
+    power = 1
+    while power <= max_batch:
+        buckets.update(b for b in (power, power * 3 // 2) if 0 < b <= max_batch)
+        power *= 2
+    return sorted(buckets)
+
+
+def batch_arg(value):
+    """--max-batch: număr fix sau 'auto' (None → măsurat per model la pornire)"""
+    return None if value == 'auto' else int(value)
+
+
+def decode_window(request):
+    """"window": listă JSON (60, 76) sau "window_b64": float32 row-major în base64 (de ~10× mai ieftin)"""
+    if 'window_b64' in request:
+        raw = base64.b64decode(request['window_b64'])
+        return np.frombuffer(raw, dtype=np.float32).reshape(SEQUENCE_LENGTH, -1)
+    return np.asarray(request['window'], dtype=np.float32)
+
+
+def encode_window(window):
+    return base64.b64encode(np.ascontiguousarray(window, dtype=np.float32).tobytes()).decode('ascii')
+
+
+class LatencyStats:
+    """Percentile pe ultimele LATENCY_SAMPLES măsurători (ms) + total cumulativ"""
+
+    def __init__(self, maxlen=LATENCY_SAMPLES):
+        self.samples = deque(maxlen=maxlen)
+        self.count = 0
+
+    def add(self, ms):
+        self.samples.append(ms)
+        self.count += 1
+
+    def summary(self):
+        if not self.samples:
+            return {'count': self.count}
+        values = np.fromiter(self.samples, dtype=np.float64)
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        return {'count': self.count, 'mean_ms': float(values.mean()), 'p50_ms': float(p50),
+                'p95_ms': float(p95), 'p99_ms': float(p99), 'max_ms': float(values.max())}
+
+
+# ============================================================================
+# MODELE
+# ============================================================================
+
+class ServedModel:
+    """
+    Un model din registry: fișier (.tflite sau .onnx), scaler, feature set, calibrare
+    predict(X) rulează pe (N, 60, F) deja preprocesat → (N, 3) în label_order-ul registry-ului
+    """
+
+    def __init__(self, entry, models_dir=MODELS_DIR, engine='tflite', threads=1, max_batch=None,
+                 label_order=LABELS):
+        self.id = entry['id']
+        self.coin = entry.get('coin', '*').upper()
+        self.tf = entry['tf'].lower()
+        self.temp = float(entry.get('temp', 1.0))
+        self.bias = entry.get('bias')
+        self.w = float(entry.get('w', 1.0))
+        self.engine = engine
+        self.threads = threads
+        self.max_batch = max_batch or AUTO_BATCH_LIMIT
+        self.buckets = batch_buckets(self.max_batch)
+
+        self.path = next((p for p in (os.path.join(models_dir, f'{self.id}_model.tflite'),
+                                      os.path.join(models_dir, f'{self.id}.tflite')) if os.path.exists(p)), None)
+        if self.path is None:
+            raise FileNotFoundError(f"no .tflite for {self.id} in {models_dir}")
+
+        metadata_path = self.path.replace('_model.tflite', '_metadata.json').replace('.tflite', '_metadata.json')
+        metadata = {}
+        if os.path.exists(metadata_path):
+            with open(metadata_path) as f:
+                metadata = json.load(f)
+
+        self.feature_indices = metadata.get('feature_indices')
+        self.scaler = None
+        if metadata.get('input_normalization') != 'baked':
+            scaler_path = os.path.join(models_dir, metadata.get('scaler_path') or f'{self.id}_scaler.json')
+            if os.path.exists(scaler_path):
+                self.scaler = StreamingScaler.load_json(scaler_path)
+                if self.feature_indices:
+                    self.scaler = self.scaler.select(self.feature_indices)
+
+        labels = entry.get('labels') or list(LABELS)
+        self.order = [labels.index(label) for label in label_order]
+
+        if engine == 'onnxruntime':
+            from onnx_export import OnnxRunner, onnx_path_for
+
+            self.path = onnx_path_for(self.path)
+            self._onnx = OnnxRunner(self.path, threads=threads)
+        else:
+            with open(self.path, 'rb') as f:
+                self._content = f.read()
+            self._interpreters = {}
+            try:
+                self._interpreter(self.max_batch)
+            except (RuntimeError, ValueError):
+                print(f"⚠️  {self.id}: input not resizable, serving with batch 1")
+                self.max_batch = 1
+                self.buckets = [1]
+                return
+
+        if max_batch is None:
+            self.max_batch = self.tune_batch()
+            self.buckets = batch_buckets(self.max_batch)
+
+    def tune_batch(self, limit=AUTO_BATCH_LIMIT, seconds=TUNE_SECONDS):
+        """
+        Batch-ul maxim cu cel mai mare windows/s măsurat (1, 2, 4, ... ≤ limit)
+        Interpretoarele create la măsurare se eliberează; rămân doar cele folosite la servire
+        """
+        rng = np.random.default_rng(0)
+        window = self.prepare(rng.standard_normal((SEQUENCE_LENGTH, NUM_FEATURES)).astype(np.float32) * 0.01)
+        candidates = sorted({1 << k for k in range(limit.bit_length()) if 1 << k <= limit} | {limit})
+
+        best, best_rate, rates = 1, 0.0, {}
+        for batch in candidates:
+            X = np.ascontiguousarray(np.broadcast_to(window, (batch, *window.shape)), dtype=np.float32)
+            self.max_batch, self.buckets = batch, [batch]
+            self.predict(X)  # Warm-up (alocare)
+            calls, start = 0, time.perf_counter()
+            while calls < 3 or time.perf_counter() - start < seconds:
+                self.predict(X)
+                calls += 1
+            rates[batch] = batch * calls / (time.perf_counter() - start)
+            if rates[batch] > best_rate * MIN_BATCH_SPEEDUP:
+                best, best_rate = batch, rates[batch]
+
+        if self.engine != 'onnxruntime':
+            self._interpreters.clear()
+        print(f"📏 {self.id}: max batch {best} ({best_rate:,.0f} windows/s; "
+              + ', '.join(f'{b}: {r:,.0f}' for b, r in rates.items()) + ')')
+        return best
+
+    def _interpreter(self, batch):
+        """Un interpretor per bucket (creat la prima folosire)"""
+        interpreter = self._interpreters.get(batch)
+        if interpreter is None:
+            interpreter = tf.lite.Interpreter(model_content=self._content, num_threads=self.threads)
+            inp = interpreter.get_input_details()[0]
+            if inp['shape'][0] != batch:
+                interpreter.resize_tensor_input(inp['index'], [batch, *inp['shape'][1:]])
+            interpreter.allocate_tensors()
+            self._interpreters[batch] = interpreter
+        return interpreter
+
+    def prepare(self, window):
+        """Fereastra brută (60, 76) → input-ul modelului (feature set + scaler)"""
+        if self.feature_indices:
+            window = window[:, self.feature_indices]
+        return self.scaler.transform(window) if self.scaler is not None else window
+
+    def predict(self, X):
+        n = len(X)
+        if self.engine == 'onnxruntime':
+            probs = self._onnx.run(X)
+        else:
+            batch = self.buckets[bisect.bisect_left(self.buckets, n)]
+            if batch != n:
+                X = np.concatenate([X, np.zeros((batch - n, *X.shape[1:]), dtype=X.dtype)])
+            interpreter = self._interpreter(batch)
+            interpreter.set_tensor(interpreter.get_input_details()[0]['index'], X)
+            interpreter.invoke()
+            probs = interpreter.get_tensor(interpreter.get_output_details()[0]['index'])
+        return probs[:n, self.order]
+
+
+class MicroBatcher:
+    """
+    Coada unui model: submit(x) → future; bucla run() unește cererile în batch-uri
+    Batch-ul pleacă la max_batch cereri sau la max_wait_ms după cea mai veche cerere
+    """
+
+    def __init__(self, model, max_wait_ms=MAX_WAIT_MS):
+        self.model = model
+        self.max_wait = max_wait_ms / 1000
+        self._pending = deque()
+        self._wakeup = asyncio.Event()
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix=f'infer-{model.id}')
+
+        self.batches = 0
+        self.items = 0
+        self.max_depth = 0
+        self.batch_sizes = Counter()
+        self.queue_wait = LatencyStats()
+        self.inference = LatencyStats()
+
+    @property
+    def depth(self):
+        return len(self._pending)
+
+    def submit(self, x):
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((x, future, time.perf_counter()))
+        self.max_depth = max(self.max_depth, len(self._pending))
+        self._wakeup.set()
+        return future
+
+    async def _collect(self):
+        while not self._pending:
+            self._wakeup.clear()
+            await self._wakeup.wait()
+
+        # Fereastra de coalescing: măsurată de la cea mai veche cerere din coadă
+        while len(self._pending) < self.model.max_batch:
+            remaining = self._pending[0][2] + self.max_wait - time.perf_counter()
+            if remaining <= 0:
+                break
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+
+        batch = [self._pending.popleft() for _ in range(min(len(self._pending), self.model.max_batch))]
+        return [item for item in batch if not item[1].done()]  # Clienți deconectați
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            if not batch:
+                continue
+
+            start = time.perf_counter()
+            for _, _, enqueued in batch:
+                self.queue_wait.add((start - enqueued) * 1000)
+            try:
+                X = np.stack([x for x, _, _ in batch])
+                probs = await loop.run_in_executor(self._executor, self.model.predict, X)
+            except Exception as e:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.inference.add((time.perf_counter() - start) * 1000)
+            self.batches += 1
+            self.items += len(batch)
+            self.batch_sizes[len(batch)] += 1
+            for (_, future, _), p in zip(batch, probs):
+                if not future.done():
+                    future.set_result(p)
+
+    def metrics(self):
+        return {
+            'engine': self.model.engine,
+            'queue_depth': self.depth,
+            'max_queue_depth': self.max_depth,
+            'batches': self.batches,
+            'items': self.items,
+            'mean_batch_size': self.items / self.batches if self.batches else 0.0,
+            'batch_sizes': {str(k): v for k, v in sorted(self.batch_sizes.items())},
+            'queue_wait': self.queue_wait.summary(),
+            'inference': self.inference.summary(),
+        }
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# ============================================================================
+# SERVICIU: selecție modele + ensemble + risk gate
+# ============================================================================
+
+class InferenceService:
+    """Twin server-side al UnifiedMLService.predict, cu un MicroBatcher per model"""
+
+    def __init__(self, registry=None, registry_path=REGISTRY_PATH, models_dir=MODELS_DIR, engine='tflite',
+                 threads=1, max_batch=None, max_wait_ms=MAX_WAIT_MS):
+        self.registry = registry if registry is not None else load_registry(registry_path)
+        self.label_order = list(self.registry.get('label_order', LABELS))
+        self.tf_map = {k.lower(): v.lower() for k, v in self.registry.get('tf_map', {}).items()}
+        self.fallback = self.registry.get('fallback', {'action': 'HOLD', 'confidence': 0.33})
+        self.gate = RiskGate.from_registry(self.registry)
+
+        self.batchers = {}
+        for entry in self.registry.get('models', []):
+            try:
+                model = ServedModel(entry, models_dir, engine, threads, max_batch, self.label_order)
+            except (FileNotFoundError, ValueError) as e:
+                print(f"⚠️  {entry.get('id')}: {e} - skipped")
+                continue
+            self.batchers[model.id] = MicroBatcher(model, max_wait_ms)
+
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.latency = LatencyStats()
+        self._tasks = []
+
+    def start(self):
+        self._tasks = [asyncio.create_task(b.run()) for b in self.batchers.values()]
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        for batcher in self.batchers.values():
+            batcher.close()
+
+    def normalize_timeframe(self, timeframe):
+        tf_ = timeframe.lower()
+        return self.tf_map.get(tf_, tf_)
+
+    def select(self, coin, timeframe):
+        """Per-coin + general pentru timeframe (registry.selectModels)"""
+        return [b for b in self.batchers.values()
+                if b.model.tf == timeframe and b.model.coin in ('*', coin)]
+
+    def _fallback(self, coin, timeframe, reason, used=()):
+        action = self.fallback.get('action', 'HOLD')
+        probs = [1.0 if label == action else 0.0 for label in self.label_order]
+        return {'coin': coin, 'timeframe': timeframe, 'action': action,
+                'confidence': float(self.fallback.get('confidence', 0.33)), 'probabilities': probs,
+                'threshold': self.gate.base_threshold(timeframe), 'models': list(used), 'reason': reason}
+
+    async def predict(self, symbol, timeframe, window):
+        window = np.asarray(window, dtype=np.float32)
+        if window.shape != (SEQUENCE_LENGTH, NUM_FEATURES):
+            raise ValueError(f"window must be ({SEQUENCE_LENGTH}, {NUM_FEATURES}), got {window.shape}")
+
+        coin, tf_ = extract_base(symbol), self.normalize_timeframe(timeframe)
+        selected = self.select(coin, tf_)
+        if not selected:
+            return self._fallback(coin, tf_, 'model_unavailable')
+
+        outputs = await asyncio.gather(*(b.submit(b.model.prepare(window)) for b in selected),
+                                       return_exceptions=True)
+        total, weights, used = np.zeros(len(self.label_order)), 0.0, []
+        for batcher, probs in zip(selected, outputs):
+            if isinstance(probs, Exception):
+                print(f"⚠️  {batcher.model.id} failed: {probs}")
+                continue
+            model = batcher.model
+            total += calibrate_probs(np.asarray(probs, dtype=np.float64), model.temp, model.bias) * model.w
+            weights += model.w
+            used.append(model.id)
+
+        if weights <= 0:
+            return self._fallback(coin, tf_, 'no_active_models', used)
+
+        probs = total / weights
+        vol_z = float(vol_z_from_windows(window[None])[0])
+        action, confidence, threshold, reason = self.gate.apply(probs, tf_, vol_z)
+        return {'coin': coin, 'timeframe': tf_, 'action': action, 'confidence': confidence,
+                'probabilities': probs.tolist(), 'threshold': float(threshold), 'vol_z': vol_z,
+                'models': used, 'reason': reason}
+
+    async def handle(self, request):
+        """Un request JSON → rezultat; latența totală include coada și ensemble-ul"""
+        start = time.perf_counter()
+        self.requests += 1
+        self.in_flight += 1
+        try:
+            return await self.predict(request.get('symbol') or request['coin'], request['timeframe'],
+                                      decode_window(request))
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self.latency.add((time.perf_counter() - start) * 1000)
+
+    def models(self):
+        return [{'id': b.model.id, 'coin': b.model.coin, 'tf': b.model.tf, 'engine': b.model.engine,
+                 'path': b.model.path, 'max_batch': b.model.max_batch, 'w': b.model.w, 'temp': b.model.temp}
+                for b in self.batchers.values()]
+
+    def metrics(self):
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'in_flight': self.in_flight,
+            'queue_depth': sum(b.depth for b in self.batchers.values()),
+            'latency': self.latency.summary(),
+            'models': {model_id: b.metrics() for model_id, b in self.batchers.items()},
+        }
+
+
+# ============================================================================
+# HTTP/1.1 (stdlib, keep-alive)
+# ============================================================================
+
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+               413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+async def _route(service, method, path, body):
+    if path == '/predict':
+        if method != 'POST':
+            return 405, {'error': 'POST only'}
+        try:
+            payload = json.loads(body or b'{}')
+        except json.JSONDecodeError as e:
+            return 400, {'error': f'invalid JSON: {e}'}
+        try:
+            if 'requests' in payload:
+                results = await asyncio.gather(*(service.handle(r) for r in payload['requests']),
+                                               return_exceptions=True)
+                return 200, {'results': [{'error': f'{type(r).__name__}: {r}'} if isinstance(r, Exception) else r
+                                         for r in results]}
+            return 200, await service.handle(payload)
+        except (KeyError, ValueError, TypeError) as e:
+            return 400, {'error': f'{type(e).__name__}: {e}'}
+
+    if method != 'GET':
+        return 405, {'error': 'GET only'}
+    if path == '/metrics':
+        return 200, service.metrics()
+    if path == '/models':
+        return 200, {'models': service.models()}
+    if path == '/health':
+        return 200, {'status': 'ok', 'models': len(service.batchers)}
+    return 404, {'error': f'unknown path {path}'}
+
+
+async def handle_connection(service, reader, writer):
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            method, target, _ = request_line.decode('latin-1').split(' ', 2)
+
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                key, _, value = line.decode('latin-1').partition(':')
+                headers[key.strip().lower()] = value.strip()
+
+            length = int(headers.get('content-length', 0))
+            if length > MAX_BODY_BYTES:
+                status, payload = 413, {'error': f'body > {MAX_BODY_BYTES} bytes'}
+                body = None
+            else:
+                body = await reader.readexactly(length) if length else b''
+                try:
+                    status, payload = await _route(service, method.upper(), target.split('?', 1)[0], body)
+                except Exception as e:
+                    status, payload = 500, {'error': f'{type(e).__name__}: {e}'}
+
+            data = json.dumps(payload).encode()
+            keep_alive = headers.get('connection', '').lower() != 'close' and body is not None
+            writer.write(
+                f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data
+            )
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+async def start_server(service, host='127.0.0.1', port=8765, unix=None):
+    handler = lambda r, w: handle_connection(service, r, w)  # noqa: E731
+    if unix:
+        if os.path.exists(unix):
+            os.remove(unix)
+        return await asyncio.start_unix_server(handler, path=unix)
+    return await asyncio.start_server(handler, host, port)
+
+
+async def serve(args):
+    service = InferenceService(registry_path=args.registry, models_dir=args.models_dir, engine=args.engine,
+                               threads=args.threads, max_batch=args.max_batch, max_wait_ms=args.max_wait_ms)
+    service.start()
+    server = await start_server(service, args.host, args.port, args.unix)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    where = args.unix or f'http://{args.host}:{args.port}'
+    print(f"🚀 Serving {len(service.batchers)} models on {where} "
+          f"(engine {args.engine}, max batch {args.max_batch or 'auto'}, max wait {args.max_wait_ms} ms)")
+    async with server:
+        await stop.wait()
+    await service.close()
+    if args.unix and os.path.exists(args.unix):
+        os.remove(args.unix)
+    print("👋 Stopped")
+
+
+# ============================================================================
+# LOAD TEST: batched vs batch=1 pe același server, prin socket
+# ============================================================================
+
+async def _client(host, port, unix, jobs, latencies):
+    reader, writer = await (asyncio.open_unix_connection(unix) if unix else asyncio.open_connection(host, port))
+    try:
+        while jobs:
+            body = jobs.pop()
+            start = time.perf_counter()
+            writer.write(f"POST /predict HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                         f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+            await writer.drain()
+            await reader.readline()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b''):
+                    break
+                if line.lower().startswith(b'content-length'):
+                    length = int(line.split(b':')[1])
+            json.loads(await reader.readexactly(length))
+            latencies.append((time.perf_counter() - start) * 1000)
+    finally:
+        writer.close()
+
+
+async def load_test(args, max_batch):
+    registry = load_registry(args.registry)
+    service = InferenceService(registry, models_dir=args.models_dir, engine=args.engine, threads=args.threads,
+                               max_batch=max_batch, max_wait_ms=args.max_wait_ms)
+    service.start()
+    server = await start_server(service, '127.0.0.1', 0, args.unix)
+    port = None if args.unix else server.sockets[0].getsockname()[1]
+
+    rng = np.random.default_rng(0)
+    timeframes = sorted({b.model.tf for b in service.batchers.values()})
+    coins = ['BTC', 'ETH', 'BNB', 'SOL'] + [f'SYM{i}' for i in range(max(args.symbols - 4, 0))]
+    windows = rng.standard_normal((args.symbols, SEQUENCE_LENGTH, NUM_FEATURES)).astype(np.float32) * 0.01
+    jobs = [json.dumps({'symbol': f'{coins[i % args.symbols]}USDT', 'timeframe': timeframes[i % len(timeframes)],
+                        'window_b64': encode_window(windows[i % args.symbols])}).encode()
+            for i in range(args.requests)]
+
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(_client('127.0.0.1', port, args.unix, jobs, latencies) for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+
+    metrics = service.metrics()
+    server.close()
+    await server.wait_closed()
+    await service.close()
+
+    calls = sum(m['batches'] for m in metrics['models'].values())
+    p50, p99 = np.percentile(latencies, [50, 99])
+    print(f"   max_batch={max_batch or 'auto':<4} {len(latencies) / elapsed:>8,.0f} req/s   client p50 {p50:7.2f} ms  "
+          f"p99 {p99:7.2f} ms   {calls} interpreter calls, max queue "
+          f"{max(m['max_queue_depth'] for m in metrics['models'].values())}")
+    return metrics
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Micro-batching inference server (registry models)')
+    parser.add_argument('command', choices=['serve', 'loadtest'])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', help='Unix socket path instead of TCP')
+    parser.add_argument('--registry', default=REGISTRY_PATH)
+    parser.add_argument('--models-dir', default=MODELS_DIR)
+    parser.add_argument('--engine', choices=ENGINES, default='tflite',
+                        help='onnxruntime needs <model>.onnx next to the .tflite (onnx_export.py)')
+    parser.add_argument('--threads', type=int, default=1, help='Interpreter threads per model')
+    parser.add_argument('--max-batch', type=batch_arg, default=None,
+                        help="Per-model batch cap, or 'auto' to pick the fastest measured at startup")
+    parser.add_argument('--max-wait-ms', type=float, default=MAX_WAIT_MS,
+                        help='Coalescing window after the oldest queued request')
+    parser.add_argument('--symbols', type=int, default=200, help='loadtest: distinct symbols')
+    parser.add_argument('--requests', type=int, default=2000, help='loadtest: total requests')
+    parser.add_argument('--concurrency', type=int, default=128, help='loadtest: concurrent connections')
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        asyncio.run(serve(args))
+        return None
+
+    print(f"⏱️  {args.requests} requests, {args.symbols} symbols, {args.concurrency} connections")
+    return {str(batch or 'auto'): asyncio.run(load_test(args, batch)) for batch in (1, args.max_batch)}
+
+
+if __name__ == '__main__':
+    main()
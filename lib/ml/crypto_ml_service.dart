@@ -252,6 +252,24 @@ class CryptoMLService {
       final decoded = json.decode(metadataString) as Map<String, dynamic>;
       _metadata[key] = decoded;
 
+      // Feature set redus (feature_analysis.py): coloanele din cele 76 pe care le așteaptă modelul.
+      // General → în metadata; per-coin (train_model.py) → {coin}_{timeframe}_feature_set.json
+      if (decoded['feature_indices'] == null && coin != 'general') {
+        try {
+          final featureSetString = await rootBundle.loadString('assets/ml/${coinLower}_${timeframe}_feature_set.json');
+          decoded['feature_indices'] = (json.decode(featureSetString) as Map<String, dynamic>)['feature_indices'];
+        } catch (_) {
+          // Fără feature set → toate cele 76 features
+        }
+      }
+      final featureIndices = (decoded['feature_indices'] as List?)?.map((i) => (i as num).toInt()).toList();
+      if (featureIndices != null) {
+        decoded['feature_indices'] = featureIndices;
+        decoded['num_features'] = featureIndices.length;
+        // ignore: avoid_print
+        print('   ✂️  Feature set: ${featureIndices.length}/76 features');
+      }
+
       // 3. Încarcă scaler din JSON (FIX: nu mai folosim identity scaler!)
       final expectedLen = (_metadata[key]?['num_features'] as num?)?.toInt() ?? 76;
       final scalerPath = _metadata[key]?['scaler_path'] as String? ??
@@ -259,22 +277,40 @@ class CryptoMLService {
               ? 'general_${timeframe}_scaler.json'
               : '${coinLower}_${timeframe}_scaler.json');
 
-      try {
-        final scalerString = await rootBundle.loadString('assets/ml/$scalerPath');
-        final scalerData = json.decode(scalerString) as Map<String, dynamic>;
-        _scalers[key] = {
-          'mean': (scalerData['mean'] as List).cast<double>(),
-          'std': (scalerData['std'] as List).cast<double>(),
-        };
-        // ignore: avoid_print
-        print('   📊 Loaded scaler: ${_scalers[key]!['mean']!.length} features (mean[0]=${_scalers[key]!['mean']![0].toStringAsFixed(4)}, std[0]=${_scalers[key]!['std']![0].toStringAsFixed(4)})');
-      } catch (e) {
-        // ignore: avoid_print
-        print('   ⚠️  Could not load scaler from $scalerPath, using identity: $e');
+      if (decoded['input_normalization'] == 'baked') {
+        // Modelul conține deja normalizarea (mean/std) ca prim op → fără scaler în Dart
         _scalers[key] = {
           'mean': List<double>.filled(expectedLen, 0.0),
           'std': List<double>.filled(expectedLen, 1.0),
+          'baked': true,
         };
+        // ignore: avoid_print
+        print('   📊 Scaler baked into model graph (raw features input)');
+      } else {
+        try {
+          final scalerString = await rootBundle.loadString('assets/ml/$scalerPath');
+          final scalerData = json.decode(scalerString) as Map<String, dynamic>;
+          var mean = (scalerData['mean'] as List).map((v) => (v as num).toDouble()).toList();
+          var std = (scalerData['std'] as List).map((v) => (v as num).toDouble()).toList();
+          // Scaler pe toate cele 76 features + model redus → doar coloanele păstrate
+          if (featureIndices != null && mean.length != expectedLen) {
+            mean = [for (final i in featureIndices) mean[i]];
+            std = [for (final i in featureIndices) std[i]];
+          }
+          _scalers[key] = {
+            'mean': mean,
+            'std': std,
+          };
+          // ignore: avoid_print
+          print('   📊 Loaded scaler: ${_scalers[key]!['mean']!.length} features (mean[0]=${_scalers[key]!['mean']![0].toStringAsFixed(4)}, std[0]=${_scalers[key]!['std']![0].toStringAsFixed(4)})');
+        } catch (e) {
+          // ignore: avoid_print
+          print('   ⚠️  Could not load scaler from $scalerPath, using identity: $e');
+          _scalers[key] = {
+            'mean': List<double>.filled(expectedLen, 0.0),
+            'std': List<double>.filled(expectedLen, 1.0),
+          };
+        }
       }
 
       final acc = (decoded['test_accuracy'] as num?)?.toDouble() ?? 0.0;
@@ -554,14 +590,18 @@ class CryptoMLService {
       throw Exception('Need exactly 60 timesteps, got ${priceData.length}');
     }
 
-    // Noile modele acceptă 76 features
+    // Noile modele acceptă 76 features; modelele cu feature set redus doar coloanele păstrate
+    final featureIndices = metadata['feature_indices'] as List<int>?;
+    final features = featureIndices != null && priceData[0].length == 76
+        ? [for (final row in priceData) [for (final i in featureIndices) row[i]]]
+        : priceData;
     final expectedFeatures = (metadata['num_features'] as num?)?.toInt() ?? 76;
-    if (priceData[0].length != expectedFeatures) {
-      throw Exception('Need exactly $expectedFeatures features per timestep, got ${priceData[0].length}');
+    if (features[0].length != expectedFeatures) {
+      throw Exception('Need exactly $expectedFeatures features per timestep, got ${features[0].length}');
     }
 
-    // Normalizare
-    final normalizedData = _normalizeData(priceData, scaler);
+    // Normalizare (sărită dacă modelul are scaler-ul inclus în graf)
+    final normalizedData = scaler['baked'] == true ? features : _normalizeData(features, scaler);
 
     // Input: [1, 60, 76]
     final List<List<List<double>>> input = [normalizedData];
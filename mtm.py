@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+MyTradeMate ML CLI - un singur entry point pentru pipeline-ul Python
+
+    python mtm.py models --json
+    python mtm.py download
+    python mtm.py features --store data/candles
+    python mtm.py train general -- --bake-scaler
+    python mtm.py convert scalers
+    python mtm.py validate
+    python mtm.py bench --pattern 'btc_*'
+    python mtm.py profile assets/ml/btc_1h_model.tflite
+    python mtm.py calibrate btc_1h --data data/btc_1h
+    python mtm.py thresholds -- --coins btc,eth --data 'data/{coin}_5m'
+    python mtm.py onnx -- bench assets/ml/general_5m.tflite --data data/btc_5m
+    python mtm.py serve -- --unix /tmp/mtm.sock --max-batch 64
+    python mtm.py selfcheck
+
+Top-level importă DOAR stdlib: TensorFlow / pandas / sklearn / ccxt se încarcă
+în subcomanda care are nevoie de ele → `models`, `convert scalers` și
+`selfcheck` pornesc instant (cron / CI).
+"""
+
+import os
+import sys
+import json
+import glob
+import time
+import argparse
+import contextlib
+import subprocess
+
+MODELS_DIR = 'assets/ml'
+REGISTRY_PATH = 'assets/models/model_registry.json'
+
+# Buget de import pentru `import mtm` (cumulativ, -X importtime)
+IMPORT_BUDGET_MS = 150
+HEAVY_MODULES = ('tensorflow', 'keras', 'numpy', 'pandas', 'sklearn', 'ccxt', 'talib', 'joblib', 'websockets')
+
+TRAIN_TARGETS = {
+    'coin': 'train_model',
+    'general': 'train_general',
+    'transformer': 'train_transformer',
+    'long-term': 'train_long_term',
+    'multi-timeframe': 'train_multi_timeframe',
+    'streaming': 'train_streaming',
+}
+
+
+def cmd_models(args):
+    """Modelele din registry + fișierele .tflite de pe disc (fără TF)"""
+    registry = {}
+    if os.path.exists(args.registry):
+        with open(args.registry) as f:
+            registry = json.load(f)
+    entries = {m['id']: m for m in registry.get('models', [])}
+
+    models = []
+    for path in sorted(glob.glob(os.path.join(args.models_dir, '*.tflite'))):
+        model_id = os.path.basename(path)[:-len('.tflite')].replace('_model', '')
+        metadata_path = path.replace('_model.tflite', '_metadata.json').replace('.tflite', '_metadata.json')
+        metadata = {}
+        if os.path.exists(metadata_path):
+            with open(metadata_path) as f:
+                metadata = json.load(f)
+
+        entry = entries.get(model_id, {})
+        models.append({
+            'id': model_id,
+            'path': path,
+            'size_kb': os.path.getsize(path) / 1024,
+            'accuracy': metadata.get('test_accuracy', metadata.get('accuracy')),
+            'in_registry': model_id in entries,
+            'temp': entry.get('temp'),
+            'weight': entry.get('w'),
+        })
+
+    if not args.json:
+        print(f"{'Model':<20} {'Size KB':>9} {'Accuracy':>9} {'Registry':>9} {'Temp':>6}")
+        for m in models:
+            acc = f"{m['accuracy']:.2%}" if isinstance(m['accuracy'], (int, float)) else '-'
+            temp = f"{m['temp']:.2f}" if m['temp'] is not None else '-'
+            print(f"{m['id']:<20} {m['size_kb']:>9.1f} {acc:>9} {'yes' if m['in_registry'] else 'no':>9} {temp:>6}")
+
+    return {'models': models}
+
+
+def cmd_download(args):
+    import download_data
+    return download_data.main()
+
+
+def cmd_features(args):
+    """Ultima fereastră (60, 76) per CSV din candle store → data/features/*.npy"""
+    import numpy as np
+    import pandas as pd
+    from download_data import calculate_features
+
+    os.makedirs(args.out, exist_ok=True)
+    written = []
+
+    for path in sorted(glob.glob(os.path.join(args.store, '*.csv'))):
+        name = os.path.basename(path)[:-len('.csv')]
+        df = pd.read_csv(path).tail(args.tail).reset_index(drop=True)
+        if len(df) < args.sequence_length:
+            print(f"⚠️  {name}: {len(df)} candles < {args.sequence_length}, skipped")
+            continue
+
+        features = calculate_features(df)
+        window = features.values[-args.sequence_length:].astype(np.float32)
+        out_path = os.path.join(args.out, f'{name}.npy')
+        np.save(out_path, window)
+        written.append({'name': name, 'path': out_path, 'shape': list(window.shape)})
+        print(f"✅ {name}: {window.shape}")
+
+    return {'features': written}
+
+
+def cmd_train(args):
+    import importlib
+
+    module = importlib.import_module(TRAIN_TARGETS[args.target])
+    extra = [a for a in args.extra if a != '--']
+
+    result = module.main(extra)
+    return {'target': args.target, 'result': result}
+
+
+def cmd_convert(args):
+    if args.target == 'scalers':
+        from convert_scalers_to_json import convert_scalers
+        return {'converted': convert_scalers()}
+
+    import downgrade_tflite_models
+    return downgrade_tflite_models.main(['--yes'] if args.yes else [])
+
+
+def cmd_validate(args):
+    from validate_models import test_model_inference
+
+    results = []
+    for timeframe in args.timeframes.split(','):
+        model_path = os.path.join(args.models_dir, f'general_{timeframe}.tflite')
+        metadata_path = os.path.join(args.models_dir, f'general_{timeframe}_metadata.json')
+
+        if os.path.exists(model_path) and os.path.exists(metadata_path):
+            results.append(test_model_inference(model_path, metadata_path))
+        else:
+            print(f"❌ Missing: general_{timeframe}")
+
+    return {'results': results}
+
+
+def cmd_bench(args):
+    """Latență TFLite (batch 1) per model"""
+    from prune_models import measure_latency
+
+    results = []
+    for path in sorted(glob.glob(os.path.join(args.models_dir, f'{args.pattern}.tflite'))):
+        with open(path, 'rb') as f:
+            tflite_model = f.read()
+
+        try:
+            mean_ms, p95_ms = measure_latency(tflite_model, runs=args.runs)
+            results.append({'model': os.path.basename(path), 'latency_ms_mean': mean_ms, 'latency_ms_p95': p95_ms})
+            print(f"{os.path.basename(path):<32} mean={mean_ms:.3f} ms  p95={p95_ms:.3f} ms")
+        except Exception as e:
+            results.append({'model': os.path.basename(path), 'error': str(e)})
+            print(f"❌ {os.path.basename(path)}: {e}")
+
+    return {'results': results}
+
+
+def cmd_profile(args):
+    """Timp per op / nod, arena și Flex ops (profile_tflite)"""
+    from profile_tflite import profile_model, print_report
+
+    reports = []
+    for path in sorted({p for pattern in args.models for p in (glob.glob(pattern) or [pattern])}):
+        report = profile_model(path, data=args.data, runs=args.runs)
+        print_report(report, top=args.top)
+        reports.append(report)
+
+    return {'reports': reports}
+
+
+def cmd_calibrate(args):
+    """Temperature scaling pe validare → 'temp' (și 'ece') în model_registry.json"""
+    import numpy as np
+    from calibration import fit_temperature, load_registry, save_registry, find_model_entry
+    from distill_student import compute_teacher_probs
+
+    registry = load_registry(args.registry)
+    entry = find_model_entry(registry, args.model_id)
+    if entry is None:
+        raise SystemExit(f"❌ {args.model_id} not in {args.registry}")
+
+    model_path = args.model or next(
+        (p for p in (os.path.join(args.models_dir, f'{args.model_id}_model.tflite'),
+                     os.path.join(args.models_dir, f'{args.model_id}.tflite')) if os.path.exists(p)),
+        None
+    )
+    if model_path is None:
+        raise SystemExit(f"❌ No .tflite found for {args.model_id} in {args.models_dir}")
+
+    X_val = np.load(f'{args.data}_X_val.npy')
+    y_val = np.load(f'{args.data}_y_val.npy')
+
+    if args.scaler:
+        from scaler_fit import StreamingScaler
+        X_val = StreamingScaler.load_json(args.scaler).transform(X_val)
+
+    probs = compute_teacher_probs(model_path, X_val)
+    result = fit_temperature(probs, y_val, bias=entry.get('bias'))
+    result['model'] = args.model_id
+
+    print(f"🌡️  {args.model_id}: T={result['temp']:.3f} "
+          f"NLL {result['nll_before']:.4f} → {result['nll_after']:.4f}, "
+          f"ECE {result['ece_before']:.4f} → {result['ece_after']:.4f}")
+
+    if not args.dry_run:
+        entry['temp'] = round(result['temp'], 4)
+        entry['ece'] = round(result['ece_after'], 4)
+        save_registry(registry, args.registry)
+        print(f"✅ Updated {args.registry}")
+
+    return result
+
+
+def cmd_thresholds(args):
+    """Grid search BUY/SELL → action_thresholds_v2 + coin_threshold_overrides"""
+    from optimize_thresholds import main as optimize_main
+
+    return optimize_main([a for a in args.extra if a != '--'])
+
+
+def cmd_onnx(args):
+    """Export ONNX / benchmark TFLite vs ONNX Runtime pe CPU"""
+    from onnx_export import main as onnx_main
+
+    return onnx_main([a for a in args.extra if a != '--'])
+
+
+def cmd_serve(args):
+    """Server de inferență cu micro-batching (modelele din registry)"""
+    from inference_server import main as server_main
+
+    extra = [a for a in args.extra if a != '--']
+    return server_main(extra if extra[:1] in (['serve'], ['loadtest']) else ['serve', *extra])
+
+
+def cmd_selfcheck(args):
+    """Măsoară `import mtm` într-un proces nou: timp cumulativ + module grele încărcate"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    probe = (
+        "import sys, json, mtm; "
+        f"print(json.dumps(sorted(m for m in {HEAVY_MODULES!r} if m in sys.modules)))"
+    )
+
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', probe],
+                          cwd=here, capture_output=True, text=True)
+    wall_ms = (time.perf_counter() - start) * 1000
+
+    # -X importtime: "import time: self [us] | cumulative | imported package"
+    import_ms = None
+    for line in proc.stderr.splitlines():
+        parts = line.split('|')
+        if len(parts) == 3 and parts[2].strip() == 'mtm':
+            import_ms = int(parts[1]) / 1000
+
+    heavy = json.loads(proc.stdout.strip().splitlines()[-1]) if proc.returncode == 0 else None
+    ok = proc.returncode == 0 and not heavy and import_ms is not None and import_ms <= args.budget_ms
+
+    result = {
+        'ok': ok,
+        'import_ms': import_ms,
+        'budget_ms': args.budget_ms,
+        'process_wall_ms': wall_ms,
+        'heavy_modules_loaded': heavy,
+    }
+    if not ok and proc.returncode != 0:
+        result['error'] = proc.stderr.strip().splitlines()[-1:]
+
+    print(f"{'✅' if ok else '❌'} import mtm: {import_ms} ms (budget {args.budget_ms} ms), "
+          f"process {wall_ms:.0f} ms, heavy modules: {heavy or 'none'}")
+    return result
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='mtm', description='MyTradeMate ML pipeline')
+    parser.add_argument('--json', action='store_true', help='Machine-readable result on stdout (logs → stderr)')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('models', help='List models on disk and in the registry')
+    p.add_argument('--models-dir', default=MODELS_DIR)
+    p.add_argument('--registry', default=REGISTRY_PATH)
+    p.set_defaults(func=cmd_models)
+
+    p = sub.add_parser('download', help='Download Binance candles and build the per-coin .npy datasets')
+    p.set_defaults(func=cmd_download)
+
+    p = sub.add_parser('features', help='Latest 60x76 feature window per candle-store CSV')
+    p.add_argument('--store', default='data/candles')
+    p.add_argument('--out', default='data/features')
+    p.add_argument('--tail', type=int, default=300, help='Candles used for the indicators')
+    p.add_argument('--sequence-length', type=int, default=60)
+    p.set_defaults(func=cmd_features)
+
+    p = sub.add_parser('train', help='Train models (extra args after -- go to the training script)')
+    p.add_argument('target', choices=sorted(TRAIN_TARGETS))
+    p.add_argument('extra', nargs=argparse.REMAINDER)
+    p.set_defaults(func=cmd_train)
+
+    p = sub.add_parser('convert', help='scalers: .pkl → .json | downgrade: rebuild TFLite models')
+    p.add_argument('target', choices=['scalers', 'downgrade'])
+    p.add_argument('--yes', action='store_true', help='Do not prompt on TensorFlow version mismatch')
+    p.set_defaults(func=cmd_convert)
+
+    p = sub.add_parser('validate', help='Inference sanity check for the general models')
+    p.add_argument('--models-dir', default=MODELS_DIR)
+    p.add_argument('--timeframes', default='5m,15m,1h')
+    p.set_defaults(func=cmd_validate)
+
+    p = sub.add_parser('bench', help='TFLite latency per model')
+    p.add_argument('--models-dir', default=MODELS_DIR)
+    p.add_argument('--pattern', default='*', help='Glob on the model name, e.g. btc_*')
+    p.add_argument('--runs', type=int, default=200)
+    p.set_defaults(func=cmd_bench)
+
+    p = sub.add_parser('profile', help='Per-op TFLite profile (time per op type / node, arena, Flex ops)')
+    p.add_argument('models', nargs='+', help='.tflite paths or globs')
+    p.add_argument('--data', help='Prefix for {prefix}_X_val.npy sample windows')
+    p.add_argument('--runs', type=int, default=100)
+    p.add_argument('--top', type=int, default=20)
+    p.set_defaults(func=cmd_profile)
+
+    p = sub.add_parser('calibrate', help='Fit temperature on validation data → registry "temp"')
+    p.add_argument('model_id', help='Registry id, e.g. btc_1h or general_5m')
+    p.add_argument('--data', required=True, help='Prefix for {prefix}_X_val.npy / _y_val.npy')
+    p.add_argument('--model', help='TFLite path (default: {models-dir}/{id}_model.tflite or {id}.tflite)')
+    p.add_argument('--scaler', help='Scaler JSON applied to X_val before inference')
+    p.add_argument('--models-dir', default=MODELS_DIR)
+    p.add_argument('--registry', default=REGISTRY_PATH)
+    p.add_argument('--dry-run', action='store_true')
+    p.set_defaults(func=cmd_calibrate)
+
+    p = sub.add_parser('thresholds', help='Optimize confidence thresholds (extra args go to optimize_thresholds.py)')
+    p.add_argument('extra', nargs=argparse.REMAINDER)
+    p.set_defaults(func=cmd_thresholds)
+
+    p = sub.add_parser('onnx', help='ONNX export / TFLite vs ONNX Runtime benchmark (extra args go to onnx_export.py)')
+    p.add_argument('extra', nargs=argparse.REMAINDER)
+    p.set_defaults(func=cmd_onnx)
+
+    p = sub.add_parser('serve', help='Micro-batching inference server (extra args go to inference_server.py)')
+    p.add_argument('extra', nargs=argparse.REMAINDER)
+    p.set_defaults(func=cmd_serve)
+
+    p = sub.add_parser('selfcheck', help='Check the CLI import-time budget')
+    p.add_argument('--budget-ms', type=float, default=IMPORT_BUDGET_MS)
+    p.set_defaults(func=cmd_selfcheck)
+
+    return parser
+
+
+def _json_default(value):
+    # numpy scalars / arrays fără a importa numpy aici
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return str(value)
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    if not args.json:
+        result = args.func(args)
+        return 0 if not isinstance(result, dict) or result.get('ok', True) else 1
+
+    # --json: tot ce printează subcomanda merge pe stderr, stdout = un singur obiect JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        result = args.func(args)
+
+    print(json.dumps({'command': args.command, 'result': result}, default=_json_default, indent=2))
+    return 0 if not isinstance(result, dict) or result.get('ok', True) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
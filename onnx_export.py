@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+ONNX EXPORT + TFLite vs ONNX Runtime pe CPU (scanere backend x86)
+TFLite rămâne formatul de deployment pe telefon; pentru scoring batch pe server
+comparăm aceleași ferestre pe ambele engine-uri:
+- latență p50 / p95 per apel și throughput (ferestre/s) pe batch sizes × thread counts
+- paritate output: max |Δp| și acord argmax TFLite vs ONNX Runtime
+  (TFLite e cuantizat dynamic-range → diferențe mici sunt normale, argmax trebuie să coincidă)
+
+Export: din trainere cu --onnx (train_general, train_long_term, train_transformer, train_model)
+→ același path ca .tflite, cu extensia .onnx; paritatea Keras vs ORT e verificată la export
+
+    python onnx_export.py bench assets/ml/general_5m.tflite --data data/btc_5m
+    python onnx_export.py bench 'assets/ml/*.tflite' --batch-sizes 1,32,256 --threads 1,4
+    python onnx_export.py export saved_models/btc_1h.keras --out assets/ml/btc_1h_model.onnx
+
+Dependențe opționale: pip install tf2onnx onnxruntime
+"""
+
+import os
+import glob
+import json
+import time
+import argparse
+
+import numpy as np
+import tensorflow as tf
+
+from profile_tflite import load_windows
+
+REPORTS_DIR = 'reports/onnx_bench'
+ONNX_OPSET = 17
+BATCH_SIZES = (1, 8, 64, 256)
+THREADS = (1, 2, 4)
+DEFAULT_RUNS = 50
+WARMUP = 5
+KERAS_ATOL = 1e-4  # Keras (float32) vs ORT (float32): doar ordinea operațiilor diferă
+MIN_ARGMAX_AGREEMENT = 0.99  # TFLite cuantizat vs ORT
+
+
+def _require(module):
+    try:
+        return __import__(module)
+    except ImportError:
+        raise SystemExit(f"❌ {module} not installed: pip install tf2onnx onnxruntime")
+
+
+def check_dependencies():
+    """Apelat din trainere la parsarea --onnx: eșuează înainte de antrenare, nu după"""
+    _require('tf2onnx')
+    _require('onnxruntime')
+
+
+def _outputs(names, values):
+    """Output-uri (listă / dict / array) → {nume: ndarray}"""
+    if isinstance(values, dict):
+        return {name: np.asarray(value) for name, value in values.items()}
+    if not isinstance(values, (list, tuple)):
+        values = [values]
+    return {name: np.asarray(value) for name, value in zip(names, values)}
+
+
+def compare_outputs(reference, candidate):
+    """
+    {nume: (N, C)} × 2 → max |Δ| și acord argmax pe output-urile comune
+    Output-uri unice pe fiecare parte (nume generate diferit) → comparate în ordine
+    """
+    common = [name for name in reference if name in candidate]
+    pairs = [(reference[n], candidate[n]) for n in common] or list(zip(reference.values(), candidate.values()))
+
+    max_abs, agreement = 0.0, 1.0
+    for ref, cand in pairs:
+        ref, cand = ref.reshape(len(ref), -1), cand.reshape(len(cand), -1)
+        max_abs = max(max_abs, float(np.abs(ref - cand).max()))
+        if ref.shape[1] > 1:
+            agreement = min(agreement, float((ref.argmax(axis=1) == cand.argmax(axis=1)).mean()))
+    return {'max_abs_diff': max_abs, 'argmax_agreement': agreement, 'outputs': len(pairs)}
+
+
+# ============================================================================
+# EXPORT
+# ============================================================================
+
+def export_onnx(model, output_path, reference=None, opset=ONNX_OPSET):
+    """
+    Keras → ONNX cu batch dinamic (None); intrările păstrează numele din Keras
+    reference: ferestre (N, ...) în spațiul de intrare al modelului → paritate Keras vs ORT
+    """
+    tf2onnx = _require('tf2onnx')
+
+    signature = [
+        tf.TensorSpec((None, *inp.shape[1:]), inp.dtype, name=inp.name.split(':')[0])
+        for inp in model.inputs
+    ]
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    tf2onnx.convert.from_keras(model, input_signature=signature, opset=opset, output_path=output_path)
+
+    info = {'path': output_path, 'opset': opset, 'size_kb': os.path.getsize(output_path) / 1024}
+    if reference is None:
+        return info
+
+    inputs = reference if isinstance(reference, (list, tuple)) else [reference]
+    inputs = [np.asarray(x, dtype=tf.as_dtype(inp.dtype).as_numpy_dtype) for x, inp in zip(inputs, model.inputs)]
+    expected = _outputs(model.output_names, model(inputs if len(inputs) > 1 else inputs[0], training=False))
+
+    session = OnnxRunner(output_path, threads=1)
+    actual = session.run_all(inputs)
+    parity = compare_outputs(expected, actual)
+    parity['ok'] = parity['max_abs_diff'] <= KERAS_ATOL
+    info['parity'] = parity
+
+    status = '✅' if parity['ok'] else '⚠️ '
+    print(f"{status} ONNX {output_path}: {info['size_kb']:.1f} KB, "
+          f"Keras vs ORT max |Δ| {parity['max_abs_diff']:.2e}, argmax {parity['argmax_agreement']:.2%}")
+    return info
+
+
+def onnx_path_for(tflite_path):
+    return os.path.splitext(tflite_path)[0] + '.onnx'
+
+
+# ============================================================================
+# ENGINES
+# ============================================================================
+
+class TFLiteRunner:
+    """tf.lite.Interpreter cu num_threads; input-ul e redimensionat la fiecare batch size nou"""
+
+    engine = 'tflite'
+
+    def __init__(self, path, threads=1):
+        self.interpreter = tf.lite.Interpreter(model_path=path, num_threads=threads)
+        self.interpreter.allocate_tensors()
+        self.inputs = self.interpreter.get_input_details()
+        self.outputs = self.interpreter.get_output_details()
+        if len(self.inputs) != 1:
+            raise ValueError(f"{path}: {len(self.inputs)} inputs, benchmark supports single-input models")
+        self.input_shape = tuple(int(d) for d in self.inputs[0]['shape'][1:])
+        self._batch = int(self.inputs[0]['shape'][0])
+
+    def _resize(self, batch):
+        if batch != self._batch:
+            self.interpreter.resize_tensor_input(self.inputs[0]['index'], (batch, *self.input_shape))
+            self.interpreter.allocate_tensors()
+            self.outputs = self.interpreter.get_output_details()
+            self._batch = batch
+
+    def run(self, X):
+        self._resize(len(X))
+        self.interpreter.set_tensor(self.inputs[0]['index'], X)
+        self.interpreter.invoke()
+        return self.interpreter.get_tensor(self.outputs[0]['index'])
+
+    def run_all(self, X):
+        self.run(X)
+        return {o['name']: self.interpreter.get_tensor(o['index']) for o in self.outputs}
+
+
+class OnnxRunner:
+    """onnxruntime.InferenceSession pe CPU: intra-op = threads, inter-op = 1, optimizări complete"""
+
+    engine = 'onnxruntime'
+
+    def __init__(self, path, threads=1):
+        ort = _require('onnxruntime')
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        self.output_names = [o.name for o in self.session.get_outputs()]
+
+    def run(self, X):
+        return self.session.run(self.output_names[:1], {self.input_names[0]: X})[0]
+
+    def run_all(self, inputs):
+        inputs = inputs if isinstance(inputs, (list, tuple)) else [inputs]
+        values = self.session.run(None, dict(zip(self.input_names, inputs)))
+        return dict(zip(self.output_names, values))
+
+
+def _available_engines():
+    engines = [TFLiteRunner]
+    try:
+        import onnxruntime  # noqa: F401
+        engines.append(OnnxRunner)
+    except ImportError:
+        print("⚠️  onnxruntime not installed - TFLite only (pip install onnxruntime)")
+    return engines
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def time_runner(runner, X, runs=DEFAULT_RUNS, warmup=WARMUP):
+    """Latență per apel (ms) pe batch-ul X → p50, p95, ferestre/s"""
+    for _ in range(warmup):
+        runner.run(X)
+
+    times = np.empty(runs)
+    for i in range(runs):
+        start = time.perf_counter()
+        runner.run(X)
+        times[i] = time.perf_counter() - start
+
+    return {
+        'p50_ms': float(np.percentile(times, 50) * 1000),
+        'p95_ms': float(np.percentile(times, 95) * 1000),
+        'samples_per_sec': float(len(X) / times.mean()),
+    }
+
+
+def benchmark(tflite_path, onnx_path=None, data=None, batch_sizes=BATCH_SIZES, threads=THREADS,
+              runs=DEFAULT_RUNS):
+    """Grila engine × threads × batch size + paritate TFLite vs ORT pe aceleași ferestre"""
+    onnx_path = onnx_path or onnx_path_for(tflite_path)
+    engines = [(TFLiteRunner, tflite_path)]
+    if OnnxRunner in _available_engines():
+        if os.path.exists(onnx_path):
+            engines.append((OnnxRunner, onnx_path))
+        else:
+            print(f"⚠️  {onnx_path} missing - train with --onnx or run `onnx_export.py export`")
+
+    probe = TFLiteRunner(tflite_path)
+    windows, source = load_windows(tflite_path, probe.input_shape, data, samples=max(batch_sizes))
+    reps = -(-max(batch_sizes) // len(windows))
+    windows = np.ascontiguousarray(np.tile(windows, (reps,) + (1,) * (windows.ndim - 1))[:max(batch_sizes)])
+
+    results = []
+    for runner_cls, path in engines:
+        for t in threads:
+            runner = runner_cls(path, threads=t)
+            for batch in batch_sizes:
+                stats = time_runner(runner, windows[:batch], runs=runs)
+                results.append({'engine': runner_cls.engine, 'threads': t, 'batch_size': batch, **stats})
+                print(f"   {runner_cls.engine:<12} threads={t:<2} batch={batch:<4} "
+                      f"p50 {stats['p50_ms']:8.3f} ms  p95 {stats['p95_ms']:8.3f} ms  "
+                      f"{stats['samples_per_sec']:>10,.0f} windows/s")
+
+    parity = None
+    if len(engines) > 1:
+        X = windows[:min(64, len(windows))]
+        parity = compare_outputs(TFLiteRunner(tflite_path).run_all(X), OnnxRunner(onnx_path).run_all(X))
+        parity['ok'] = parity['argmax_agreement'] >= MIN_ARGMAX_AGREEMENT
+        print(f"{'✅' if parity['ok'] else '⚠️ '} parity TFLite vs ORT: max |Δ| {parity['max_abs_diff']:.2e}, "
+              f"argmax agreement {parity['argmax_agreement']:.2%}")
+
+    # Cel mai rapid (engine, threads) per batch size
+    fastest = {}
+    for batch in batch_sizes:
+        best = max((r for r in results if r['batch_size'] == batch), key=lambda r: r['samples_per_sec'])
+        fastest[str(batch)] = {k: best[k] for k in ('engine', 'threads', 'samples_per_sec', 'p50_ms')}
+
+    return {
+        'model': tflite_path,
+        'onnx': onnx_path if len(engines) > 1 else None,
+        'data': source,
+        'input_shape': list(probe.input_shape),
+        'cpu_count': os.cpu_count(),
+        'runs': runs,
+        'results': results,
+        'parity': parity,
+        'fastest': fastest,
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def _ints(value):
+    return tuple(int(v) for v in value.split(','))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='ONNX export + TFLite vs ONNX Runtime CPU benchmark')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    bench = sub.add_parser('bench', help='Latency / throughput grid and output parity')
+    bench.add_argument('models', nargs='+', help='TFLite model paths or glob patterns')
+    bench.add_argument('--onnx', help='ONNX model path (default: <tflite>.onnx, single model only)')
+    bench.add_argument('--data', help='Validation windows prefix ({data}_X_val.npy)')
+    bench.add_argument('--batch-sizes', type=_ints, default=BATCH_SIZES)
+    bench.add_argument('--threads', type=_ints, default=THREADS)
+    bench.add_argument('--runs', type=int, default=DEFAULT_RUNS)
+    bench.add_argument('--out', default=REPORTS_DIR)
+
+    export = sub.add_parser('export', help='Saved Keras model (.keras / .h5 / SavedModel) → ONNX')
+    export.add_argument('model')
+    export.add_argument('--out', required=True)
+    export.add_argument('--data', help='Reference windows .npy for the Keras vs ORT parity check')
+    export.add_argument('--opset', type=int, default=ONNX_OPSET)
+    args = parser.parse_args(argv)
+
+    if args.command == 'export':
+        model = tf.keras.models.load_model(args.model, compile=False)
+        reference = np.load(args.data, mmap_mode='r')[:64] if args.data else None
+        info = export_onnx(model, args.out, reference, opset=args.opset)
+        return info
+
+    paths = sorted({p for pattern in args.models for p in (glob.glob(pattern) or [pattern])})
+    if args.onnx and len(paths) > 1:
+        parser.error('--onnx requires a single TFLite model')
+
+    os.makedirs(args.out, exist_ok=True)
+    reports = []
+    for path in paths:
+        print(f"\n⏱️  {path}")
+        report = benchmark(path, args.onnx, args.data, args.batch_sizes, args.threads, args.runs)
+        name = os.path.splitext(os.path.basename(path))[0]
+        out_path = os.path.join(args.out, f'{name}.json')
+        with open(out_path, 'w') as f:
+            json.dump(report, f, indent=2)
+
+        for batch, best in report['fastest'].items():
+            print(f"🏁 batch {batch:>4}: {best['engine']} × {best['threads']} threads "
+                  f"({best['samples_per_sec']:,.0f} windows/s)")
+        print(f"💾 {out_path}")
+        reports.append(report)
+
+    return reports
+
+
+if __name__ == '__main__':
+    main()
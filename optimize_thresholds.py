@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""
+THRESHOLD OPTIMIZER - action_thresholds_v2 + coin_threshold_overrides (numpy only)
+Aceeași regulă ca ConfidenceThresholdFilter (Dart): acțiunea = argmax, se execută doar
+dacă confidence >= prag(acțiune, monedă); altfel NO ACTION
+
+Toate combinațiile (BUY, SELL) din grid sunt evaluate dintr-o dată prin broadcasting:
+BUY și SELL cad pe rânduri disjuncte → sumele (P&L, pătrate, trades, wins) sunt separabile
+pe cele două axe; drawdown-ul parcurge semnalele o dată, cu tot gridul per pas
+
+Scor = metricile din ModelManager / backtest: Sharpe (mean / std pe semnal), P&L, max drawdown
+Global = sumele tuturor monedelor; drawdown-ul = maximul per monedă (fiecare are curba ei)
+Probabilitățile trec prin temp / bias din registry (calibrate_probs) - app-ul aplică pragurile
+pe probabilități calibrate, nu pe output-ul brut al modelului
+Gridul se caută pe primele (1 - holdout) din fiecare monedă (cronologic); un optim se scrie
+doar dacă pe holdout are Sharpe > 0 și bate pragurile curente cu cel puțin min_improvement
+Pragul HOLD rămâne neschimbat - HOLD și NO ACTION sunt ambele flat, P&L identic
+
+    python optimize_thresholds.py --coins btc,eth,sol --data 'data/{coin}_5m' \\
+        --model 'assets/ml/{coin}_5m_model.tflite'
+    python optimize_thresholds.py --inputs 'reports/thresholds/*_5m.npz' --dry-run
+"""
+
+import os
+import glob
+import json
+import argparse
+from datetime import datetime
+
+import numpy as np
+
+from calibration import REGISTRY_PATH, calibrate_probs, load_registry, save_registry
+
+SELL, HOLD, BUY = 0, 1, 2  # label_order din registry
+GRID = np.round(np.arange(0.34, 0.951, 0.01), 2)  # 62 × 62 = 3844 combinații
+FEE = 0.002  # Round trip (0.1% / side, Binance spot)
+MIN_TRADES = 30
+MIN_SAMPLES = 500  # Sub atât, moneda folosește pragurile globale
+HOLDOUT = 0.3  # Ultimele 30% din fiecare monedă: validare out-of-sample
+MIN_IMPROVEMENT = 0.10  # Câștig minim pe holdout, relativ la |obiectiv curent|
+OBJECTIVES = ('sharpe', 'pnl', 'calmar')
+OUTPUT_DIR = 'reports/thresholds'
+
+
+def evaluate_grid(probs, returns, buy_grid=GRID, sell_grid=GRID, fee=FEE):
+    """
+    probs: (N, 3) SELL/HOLD/BUY, în ordine cronologică
+    returns: (N,) randamentul forward pe orizontul label-ului
+    → dict de matrici (len(buy_grid), len(sell_grid))
+    """
+    return _grid_metrics(_grid_sums(probs, returns, buy_grid, sell_grid, fee))
+
+
+def evaluate_pooled(samples, buy_grid=GRID, sell_grid=GRID, fee=FEE):
+    """
+    samples: {COIN: (probs, returns)} → metricile pe toate monedele
+    Sumele se adună; drawdown-ul nu - concatenarea monedelor nu e o curbă de equity reală,
+    deci max drawdown = cel mai mare drawdown al unei monede
+    """
+    pooled = None
+    for probs, returns in samples.values():
+        sums = _grid_sums(probs, returns, buy_grid, sell_grid, fee)
+        if pooled is None:
+            pooled = sums
+            continue
+        for name, value in sums.items():
+            pooled[name] = np.maximum(pooled[name], value) if name == 'max_drawdown' else pooled[name] + value
+    return _grid_metrics(pooled)
+
+
+def _grid_sums(probs, returns, buy_grid, sell_grid, fee):
+    probs = np.asarray(probs, dtype=np.float64)
+    returns = np.asarray(returns, dtype=np.float64)
+    buy_grid = np.asarray(buy_grid, dtype=np.float64)
+    sell_grid = np.asarray(sell_grid, dtype=np.float64)
+    n = len(returns)
+
+    action = probs.argmax(axis=1)
+    confidence = probs.max(axis=1)
+
+    # P&L per semnal executat: long la BUY, short la SELL, minus fee; (N, T) per axă
+    buy_taken = (action == BUY)[:, None] & (confidence[:, None] >= buy_grid[None, :])
+    sell_taken = (action == SELL)[:, None] & (confidence[:, None] >= sell_grid[None, :])
+    buy_pnl = np.where(buy_taken, (returns - fee)[:, None], 0.0)
+    sell_pnl = np.where(sell_taken, (-returns - fee)[:, None], 0.0)
+
+    # Statistici separabile: (Tb, 1) + (1, Ts)
+    pnl = buy_pnl.sum(axis=0)[:, None] + sell_pnl.sum(axis=0)[None, :]
+    sum_sq = (buy_pnl ** 2).sum(axis=0)[:, None] + (sell_pnl ** 2).sum(axis=0)[None, :]
+    trades = buy_taken.sum(axis=0)[:, None] + sell_taken.sum(axis=0)[None, :]
+    wins = (buy_pnl > 0).sum(axis=0)[:, None] + (sell_pnl > 0).sum(axis=0)[None, :]
+
+    # Max drawdown: cumsum-ul e separabil (curba = CB[:, i] + CS[:, j]) → un pas pe tot gridul
+    # per semnal; rândurile fără semnal (HOLD / sub grid) nu mișcă nicio curbă
+    rows = (action != HOLD) & (confidence >= min(buy_grid.min(), sell_grid.min()))
+    buy_curve = np.cumsum(buy_pnl[rows], axis=0)
+    sell_curve = np.cumsum(sell_pnl[rows], axis=0)
+    peak = np.zeros_like(pnl)
+    max_drawdown = np.zeros_like(pnl)
+    for b, s in zip(buy_curve, sell_curve):
+        curve = b[:, None] + s[None, :]
+        np.maximum(peak, curve, out=peak)
+        np.maximum(max_drawdown, peak - curve, out=max_drawdown)
+
+    return {'n': n, 'pnl': pnl, 'sum_sq': sum_sq, 'trades': trades, 'wins': wins, 'max_drawdown': max_drawdown}
+
+
+def _grid_metrics(sums):
+    n, pnl, trades = max(sums['n'], 1), sums['pnl'], sums['trades']
+    mean = pnl / n
+    std = np.sqrt(np.maximum(sums['sum_sq'] / n - mean ** 2, 0.0))
+
+    return {
+        'sharpe': np.divide(mean, std, out=np.zeros_like(mean), where=std > 0),
+        'pnl': pnl,
+        'max_drawdown': sums['max_drawdown'],
+        'trades': trades,
+        'win_rate': np.divide(sums['wins'], trades, out=np.zeros_like(pnl), where=trades > 0),
+    }
+
+
+def objective_value(metrics, objective='sharpe'):
+    """Valoarea brută a obiectivului (matrice din evaluate_grid sau dict pentru o pereche)"""
+    if objective == 'calmar':
+        return metrics['pnl'] / np.maximum(metrics['max_drawdown'], 1e-9)
+    return np.asarray(metrics[objective], dtype=np.float64)
+
+
+def improves(after, before, objective='sharpe', margin=MIN_IMPROVEMENT):
+    """after are Sharpe > 0 și bate before pe obiectiv cu cel puțin margin × |before|"""
+    current = float(objective_value(before, objective))
+    gain = float(objective_value(after, objective)) - current
+    return after['sharpe'] > 0 and gain > margin * abs(current)
+
+
+def score(metrics, objective='sharpe', min_trades=MIN_TRADES, smooth=1):
+    """
+    Scor per combinație; sub min_trades → invalid (-inf)
+    smooth: media pe vecinătatea (2r+1)² - preferă platouri în locul unui vârf izolat
+    """
+    raw = objective_value(metrics, objective)
+    valid = metrics['trades'] >= min_trades
+    if not valid.any():
+        return np.full(raw.shape, -np.inf)
+
+    if smooth:
+        filled = np.where(valid, raw, raw[valid].min())
+        padded = np.pad(filled, smooth, mode='edge')
+        size = 2 * smooth + 1
+        raw = sum(
+            padded[i:i + raw.shape[0], j:j + raw.shape[1]] for i in range(size) for j in range(size)
+        ) / size ** 2
+
+    return np.where(valid, raw, -np.inf)
+
+
+def best_thresholds(metrics, objective='sharpe', min_trades=MIN_TRADES, smooth=1):
+    """metrics: evaluate_grid / evaluate_pooled pe GRID → perechea cu scorul maxim"""
+    scores = score(metrics, objective, min_trades, smooth)
+    if not np.isfinite(scores).any():
+        return None
+
+    i, j = np.unravel_index(np.argmax(scores), scores.shape)
+    return _pair(metrics, float(GRID[i]), float(GRID[j]), i, j)
+
+
+def evaluate_thresholds(probs, returns, buy, sell, fee=FEE):
+    """Metricile pentru o singură pereche de praguri (ex. cele curente din registry)"""
+    return _pair(evaluate_grid(probs, returns, [buy], [sell], fee=fee), buy, sell)
+
+
+def _pair(metrics, buy, sell, i=0, j=0):
+    return {'BUY': buy, 'SELL': sell, **{name: _scalar(values[i, j]) for name, values in metrics.items()}}
+
+
+def _scalar(value):
+    return int(value) if np.issubdtype(np.asarray(value).dtype, np.integer) else float(value)
+
+
+def current_thresholds(registry, coin):
+    base = registry.get('action_thresholds_v2', {})
+    override = registry.get('coin_threshold_overrides', {}).get(coin, {})
+    return override.get('BUY', base.get('BUY', 0.60)), override.get('SELL', base.get('SELL', 0.60))
+
+
+def registry_calibration(registry, coin, timeframe):
+    """
+    temp / bias ale intrării pe care app-ul o folosește pentru (coin, tf):
+    modelul monedei dacă există, altfel cel general (coin '*') → (temp, bias, id)
+    """
+    timeframe = registry.get('tf_map', {}).get(timeframe, timeframe)
+    models = [m for m in registry.get('models', []) if m.get('tf') == timeframe]
+    entry = (next((m for m in models if str(m.get('coin', '*')).upper() == coin), None)
+             or next((m for m in models if m.get('coin', '*') == '*'), None))
+    if entry is None:
+        return 1.0, None, None
+    return entry.get('temp', 1.0), entry.get('bias'), entry.get('id')
+
+
+def calibrate_samples(samples, registry, timeframe):
+    """Aceeași transformare ca UnifiedMLService._calibrate, per monedă"""
+    calibrated = {}
+    for coin, (probs, returns) in samples.items():
+        temp, bias, model_id = registry_calibration(registry, coin, timeframe)
+        if model_id is None:
+            print(f"⚠️  {coin}: no {timeframe} model in the registry, raw probabilities")
+        calibrated[coin] = (calibrate_probs(np.asarray(probs, dtype=np.float64), temp, bias), returns)
+    return calibrated
+
+
+def split_holdout(samples, holdout=HOLDOUT):
+    """Cronologic per monedă: (căutare, holdout); holdout = 0 → ambele = toate datele (in-sample)"""
+    if holdout <= 0:
+        return samples, samples
+    search, test = {}, {}
+    for coin, (probs, returns) in samples.items():
+        cut = int(len(returns) * (1 - holdout))
+        search[coin] = (probs[:cut], returns[:cut])
+        test[coin] = (probs[cut:], returns[cut:])
+    return search, test
+
+
+def load_inputs(args):
+    """{COIN: (probs, returns)} din .npz precalculate sau model + date de validare"""
+    samples = {}
+
+    if args.inputs:
+        for path in sorted(p for pattern in args.inputs for p in glob.glob(pattern)):
+            data = np.load(path)
+            coin = str(data['coin']) if 'coin' in data else os.path.splitext(os.path.basename(path))[0].split('_')[0]
+            samples[coin.upper()] = (data['probs'], data['returns'])
+        return samples
+
+    from distill_student import compute_teacher_probs
+
+    for coin in args.coins.split(','):
+        prefix = args.data.format(coin=coin)
+        returns_path = f'{prefix}_returns_val.npy'
+        if not os.path.exists(returns_path):
+            print(f"⚠️  {coin.upper()}: no {returns_path} (re-run download_data.py), skipped")
+            continue
+
+        X_val = np.load(f'{prefix}_X_val.npy')
+        if args.scaler:
+            from scaler_fit import StreamingScaler
+            X_val = StreamingScaler.load_json(args.scaler.format(coin=coin)).transform(X_val)
+
+        probs = compute_teacher_probs(args.model.format(coin=coin), X_val)
+        samples[coin.upper()] = (probs, np.load(returns_path))
+
+        # Cache → re-tuning fără inferență (--inputs)
+        if args.save_inputs:
+            os.makedirs(args.save_inputs, exist_ok=True)
+            np.savez(os.path.join(args.save_inputs, f'{coin}.npz'), coin=coin.upper(), probs=probs,
+                     returns=samples[coin.upper()][1])
+
+    return samples
+
+
+def optimize(samples, registry, objective='sharpe', fee=FEE, min_trades=MIN_TRADES, smooth=1,
+             holdout=HOLDOUT, margin=MIN_IMPROVEMENT):
+    """
+    Praguri globale pe toate monedele + override doar unde optimul per monedă e mai bun
+    Gridul se caută pe partea de căutare; before / after se compară pe holdout → ce nu bate
+    pragurile curente cu margin (sau are Sharpe <= 0) nu se scrie, rămân cele din registry
+    """
+    search, test = split_holdout(samples, holdout)
+    best = best_thresholds(evaluate_pooled(search, fee=fee), objective, min_trades, smooth)
+    if best is None:
+        raise SystemExit(f"❌ No threshold pair reaches {min_trades} trades")
+
+    def pooled_at(buy, sell):
+        return _pair(evaluate_pooled(test, [buy], [sell], fee=fee), buy, sell)
+
+    base = registry.get('action_thresholds_v2', {})
+    before = pooled_at(base.get('BUY', 0.60), base.get('SELL', 0.60))
+    candidate = pooled_at(best['BUY'], best['SELL'])
+    accepted = improves(candidate, before, objective, margin)
+    pooled = {'before': before, 'after': candidate if accepted else before, 'accepted': accepted, 'in_sample': best}
+    thresholds = (pooled['after']['BUY'], pooled['after']['SELL'])
+
+    coins = {}
+    overrides = registry.get('coin_threshold_overrides', {})
+    for coin, (probs, returns) in test.items():
+        before = evaluate_thresholds(probs, returns, *current_thresholds(registry, coin), fee=fee)
+        fallback = evaluate_thresholds(probs, returns, *thresholds, fee=fee)
+        best = None
+        if len(samples[coin][1]) >= MIN_SAMPLES:
+            found = best_thresholds(evaluate_grid(*search[coin], fee=fee), objective, min_trades, smooth)
+            best = found and evaluate_thresholds(probs, returns, found['BUY'], found['SELL'], fee=fee)
+
+        # Candidații: pragurile globale (fără override) sau optimul monedei; la egalitate globalul
+        candidates = [c for c in (fallback, best) if c is not None and improves(c, before, objective, margin)]
+        if candidates:
+            after = max(candidates, key=lambda c: float(objective_value(c, objective)))
+            override = (after['BUY'], after['SELL']) != thresholds
+        else:
+            # Nimic mai bun → override-ul existent rămâne; fără override moneda urmează globalul
+            override = coin in overrides
+            after = before if override else fallback
+        coins[coin] = {
+            'samples': int(len(samples[coin][1])),
+            'holdout_samples': int(len(returns)),
+            'before': before,
+            'after': after,
+            'accepted': bool(candidates),
+            'override': override,
+        }
+
+    return {'global': pooled, 'coins': coins}
+
+
+def apply_to_registry(registry, result):
+    """Scrie doar ce s-a schimbat; monedele fără date / neatinse păstrează override-ul vechi"""
+    if result['global']['accepted']:
+        thresholds = registry.setdefault('action_thresholds_v2', {})
+        thresholds['BUY'] = result['global']['after']['BUY']
+        thresholds['SELL'] = result['global']['after']['SELL']
+
+    overrides = dict(registry.get('coin_threshold_overrides', {}))
+    for coin, info in result['coins'].items():
+        if info['override']:
+            after = {'BUY': info['after']['BUY'], 'SELL': info['after']['SELL']}
+            overrides[coin] = {**overrides.get(coin, {}), **after}
+        else:
+            overrides.pop(coin, None)
+    if overrides or 'coin_threshold_overrides' in registry:
+        registry['coin_threshold_overrides'] = overrides
+    return registry
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Grid-search BUY/SELL confidence thresholds → model_registry.json')
+    parser.add_argument('--inputs', nargs='+', help='.npz globs with probs (N, 3) + returns (N,), coin = filename prefix')
+    parser.add_argument('--coins', default='btc,eth,bnb,sol,trump,wlfi')
+    parser.add_argument('--data', default='data/{coin}_5m', help='Prefix for _X_val.npy / _returns_val.npy ({coin})')
+    parser.add_argument('--model', default='assets/ml/{coin}_5m_model.tflite', help='TFLite model ({coin})')
+    parser.add_argument('--scaler', help='Scaler JSON applied to X_val ({coin})')
+    parser.add_argument('--save-inputs', help='Directory to cache {coin}.npz (probs + returns) for --inputs')
+    parser.add_argument('--objective', choices=OBJECTIVES, default='sharpe')
+    parser.add_argument('--fee', type=float, default=FEE, help='Round-trip fee per executed signal')
+    parser.add_argument('--min-trades', type=int, default=MIN_TRADES)
+    parser.add_argument('--smooth', type=int, default=1, help='Neighbourhood radius for score smoothing (0 = off)')
+    parser.add_argument('--timeframe', default='5m', help='Registry models whose temp / bias calibrate the probabilities')
+    parser.add_argument('--no-calibrate', action='store_true', help='Optimize on raw model probabilities')
+    parser.add_argument('--holdout', type=float, default=HOLDOUT,
+                        help='Last fraction of each coin used only to accept / reject (0 = in-sample)')
+    parser.add_argument('--min-improvement', type=float, default=MIN_IMPROVEMENT,
+                        help='Required holdout gain, relative to |current objective|')
+    parser.add_argument('--registry', default=REGISTRY_PATH)
+    parser.add_argument('--output', default=os.path.join(OUTPUT_DIR, 'thresholds_report.json'))
+    parser.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args(argv)
+
+    samples = load_inputs(args)
+    if not samples:
+        raise SystemExit("❌ No probabilities / returns to optimize on")
+
+    registry = load_registry(args.registry)
+    if not args.no_calibrate:
+        samples = calibrate_samples(samples, registry, args.timeframe)
+    result = optimize(samples, registry, args.objective, args.fee, args.min_trades, args.smooth,
+                      args.holdout, args.min_improvement)
+
+    g = result['global']['after']
+    print(f"{'🎯' if result['global']['accepted'] else '⏸️ '} Global: BUY {g['BUY']:.2f} / SELL {g['SELL']:.2f} "
+          f"(Sharpe {g['sharpe']:.3f}, P&L {g['pnl']:+.2%}, max coin DD {g['max_drawdown']:.2%}, {g['trades']} trades)"
+          f"{'' if result['global']['accepted'] else ' - unchanged, no better pair'}")
+    print(f"   holdout {args.holdout:.0%}, min improvement {args.min_improvement:.0%}"
+          f"{'' if args.no_calibrate else f', calibrated with {args.timeframe} temp / bias'}")
+    print(f"{'Coin':<6} {'before':>11} {'Sharpe':>7} {'P&L':>8}   {'after':>11} {'Sharpe':>7} {'P&L':>8} {'DD':>7}")
+    for coin, info in result['coins'].items():
+        b, a = info['before'], info['after']
+        print(f"{coin:<6} {b['BUY']:.2f}/{b['SELL']:.2f}   {b['sharpe']:>7.3f} {b['pnl']:>+8.2%}   "
+              f"{a['BUY']:.2f}/{a['SELL']:.2f}   {a['sharpe']:>7.3f} {a['pnl']:>+8.2%} {a['max_drawdown']:>7.2%}"
+              f"{'  (override)' if info['override'] else ''}{'' if info['accepted'] else '  (no better pair)'}")
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump({
+            'objective': args.objective,
+            'fee': args.fee,
+            'min_trades': args.min_trades,
+            'holdout': args.holdout,
+            'min_improvement': args.min_improvement,
+            'calibration': None if args.no_calibrate else args.timeframe,
+            'grid': [float(GRID[0]), float(GRID[-1]), len(GRID)],
+            **result,
+            'date': datetime.now().isoformat(),
+        }, f, indent=2)
+    print(f"📄 Report: {args.output}")
+
+    if not args.dry_run:
+        save_registry(apply_to_registry(registry, result), args.registry)
+        print(f"✅ Updated {args.registry}")
+
+    return result
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+PER-OP PROFILER pentru modelele TFLite
+- Timp per tip de op și per nod (benchmark_model) sau pondere de cost estimată, pe ferestre reale (data/{coin}_{tf}_X_val.npy) sau random
+- Memorie: arena estimată (tensori intermediari vii simultan) + greutăți constante
+- Detectează op-urile Flex (SELECT_TF_OPS) care nu rulează în tflite_flutter fără Flex delegate
+
+Timpii per op vin din benchmark_model (--enable_op_profiling, output CSV) dacă binarul
+e disponibil (--benchmark-binary sau PATH); altfel nu există timpi per op măsurați →
+raportul dă doar ponderea costului estimat (MACs / elemente), în %, fără coloane ms
+('estimated'); singurul timp măsurat rămâne latența totală a invoke()
+
+    python profile_tflite.py assets/ml/btc_1h_model.tflite --data data/btc_1h
+    python profile_tflite.py 'assets/ml/general_*.tflite' --sort count --top 15
+"""
+
+import os
+import csv
+import glob
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+from collections import defaultdict
+
+import numpy as np
+import tensorflow as tf
+
+REPORTS_DIR = 'reports/tflite_profile'
+DEFAULT_RUNS = 100
+DEFAULT_SAMPLES = 32
+
+# Op-uri care se execută prin runtime-ul TF complet (Flex delegate)
+FLEX_PREFIX = 'Flex'
+# Noduri fără cost propriu (înlocuite de delegate / metadate)
+SKIP_OPS = {'DELEGATE'}
+
+
+def _interpreter(model_path, delegates=True):
+    kwargs = {}
+    if not delegates:
+        kwargs['experimental_op_resolver_type'] = tf.lite.experimental.OpResolverType.BUILTIN_WITHOUT_DEFAULT_DELEGATES
+    return tf.lite.Interpreter(model_path=model_path, **kwargs)
+
+
+def load_windows(model_path, input_shape, data=None, samples=DEFAULT_SAMPLES):
+    """Ferestre reale ({data}_X_val.npy sau data/{coin}_{tf}_X_val.npy), altfel random normalizat"""
+    name = os.path.basename(model_path).replace('_model.tflite', '').replace('.tflite', '')
+    path = f'{data}_X_val.npy' if data else os.path.join('data', f'{name}_X_val.npy')
+
+    if os.path.exists(path):
+        X = np.load(path, mmap_mode='r')
+        idx = np.linspace(0, len(X) - 1, min(samples, len(X))).astype(int)
+        return np.asarray(X[idx], dtype=np.float32), path
+
+    rng = np.random.default_rng(42)
+    return rng.standard_normal((samples, *input_shape)).astype(np.float32), 'random'
+
+
+def graph_nodes(model_path):
+    """
+    Nodurile grafului (fără delegate) cu shape-uri, cost estimat și tensori
+    Cost: MACs pentru CONV/FC/BATCH_MATMUL, număr de elemente de output pentru restul
+    """
+    interpreter = _interpreter(model_path, delegates=False)
+    ops = interpreter._get_ops_details()
+    flex_ops = sorted({op['op_name'] for op in ops if op['op_name'].startswith(FLEX_PREFIX)})
+
+    try:
+        interpreter.allocate_tensors()
+    except (RuntimeError, ValueError):
+        # Flex ops → e nevoie de delegate-urile implicite pentru alocare
+        interpreter = _interpreter(model_path)
+        interpreter.allocate_tensors()
+        ops = interpreter._get_ops_details()
+
+    tensors = {t['index']: t for t in interpreter.get_tensor_details()}
+    input_indices = [int(d['index']) for d in interpreter.get_input_details()]
+
+    def shape(i):
+        return [int(d) for d in tensors[i]['shape']] if i in tensors else []
+
+    def size(i):
+        return int(np.prod(shape(i))) if i in tensors else 0
+
+    nodes = []
+    for op in ops:
+        name = op['op_name']
+        if name in SKIP_OPS:
+            continue
+
+        inputs = [int(i) for i in op['inputs'] if i >= 0]
+        outputs = [int(i) for i in op['outputs']]
+        out_elems = sum(size(i) for i in outputs)
+
+        if name in ('CONV_2D', 'DEPTHWISE_CONV_2D') and len(inputs) > 1:
+            kernel = shape(inputs[1])  # OHWI / 1HWO
+            per_output = kernel[1] * kernel[2] * (kernel[3] if name == 'CONV_2D' else 1)
+            cost = out_elems * per_output
+        elif name == 'FULLY_CONNECTED' and len(inputs) > 1:
+            cost = out_elems * shape(inputs[1])[-1]
+        elif name == 'BATCH_MATMUL' and len(inputs) > 1:
+            cost = out_elems * shape(inputs[0])[-1]
+        else:
+            cost = out_elems
+
+        nodes.append({
+            'index': int(op['index']),
+            'op': name,
+            'name': tensors[outputs[0]]['name'] if outputs and outputs[0] in tensors else '',
+            'output_shape': shape(outputs[0]) if outputs else [],
+            'estimated_cost': int(cost),
+            'flex': name.startswith(FLEX_PREFIX),
+            'inputs': inputs,
+            'outputs': outputs,
+        })
+
+    return nodes, tensors, input_indices, flex_ops
+
+
+def arena_estimate(nodes, tensors, input_indices):
+    """
+    Memorie:
+      arena_peak_bytes: max peste noduri al sumei tensorilor vii (input + intermediari),
+                        liveness pe ordinea de execuție - limita inferioară a arenei
+      constant_bytes: greutăți / constante din flatbuffer (nu ocupă arena)
+    """
+    produced = {t: 0 for t in input_indices}
+    last_use = {}
+    for step, node in enumerate(nodes):
+        for t in node['outputs']:
+            produced.setdefault(t, step)
+            last_use[t] = max(last_use.get(t, step), step)
+        for t in node['inputs']:
+            last_use[t] = step
+
+    def nbytes(t):
+        d = tensors.get(t)
+        return int(np.prod(d['shape'])) * np.dtype(d['dtype']).itemsize if d is not None else 0
+
+    constants = {t for node in nodes for t in node['inputs']} - set(produced)
+
+    peak = 0
+    for step in range(len(nodes)):
+        live = sum(nbytes(t) for t, start in produced.items() if start <= step <= last_use.get(t, start))
+        peak = max(peak, live)
+
+    return {'arena_peak_bytes': int(peak), 'constant_bytes': int(sum(nbytes(t) for t in constants))}
+
+
+def measure_invoke(model_path, X, runs=DEFAULT_RUNS, warmup=10):
+    """Latență invoke() batch 1 (delegate-urile implicite, ca în app) pe ferestrele sample"""
+    interpreter = _interpreter(model_path)
+    interpreter.allocate_tensors()
+    inp = interpreter.get_input_details()[0]
+
+    for i in range(warmup):
+        interpreter.set_tensor(inp['index'], X[i % len(X)][None])
+        interpreter.invoke()
+
+    times = []
+    for i in range(runs):
+        interpreter.set_tensor(inp['index'], X[i % len(X)][None])
+        start = time.perf_counter()
+        interpreter.invoke()
+        times.append((time.perf_counter() - start) * 1000)
+
+    return float(np.mean(times)), float(np.percentile(times, 95))
+
+
+def _find_benchmark_binary(path=None):
+    for candidate in (path, os.environ.get('TFLITE_BENCHMARK_MODEL'), shutil.which('benchmark_model')):
+        if candidate and os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def _normalize(cell):
+    return cell.strip().strip('[]').strip().lower().replace(' ', '_')
+
+
+def parse_op_profile_csv(path):
+    """
+    CSV-ul din benchmark_model --op_profiling_output_mode=csv
+    Primul tabel (Run Order) = un rând per nod: node type, first, avg ms, %, cdf%, mem KB, times called, name
+    """
+    with open(path, newline='') as f:
+        rows = list(csv.reader(f))
+
+    header = None
+    nodes = []
+
+    for row in rows:
+        cells = [_normalize(c) for c in row]
+        if header is None:
+            if 'node_type' in cells:
+                header = cells
+            continue
+
+        # Sfârșitul primului tabel: rând gol, separator sau alt header
+        if not any(cells) or len(row) < len(header) or 'node_type' in cells:
+            break
+
+        record = dict(zip(header, (c.strip() for c in row)))
+        try:
+            nodes.append({
+                'op': record['node_type'],
+                'name': record.get('name', '').strip('[]'),
+                'avg_ms': float(record.get('avg_ms') or 0),
+                'mem_kb': float(record.get('mem_kb') or 0),
+            })
+        except ValueError:
+            break
+
+    return nodes
+
+
+def run_benchmark_model(binary, model_path, X, runs=DEFAULT_RUNS):
+    """Profiling op-level cu binarul benchmark_model; input = prima fereastră sample"""
+    interpreter = _interpreter(model_path)
+    inp = interpreter.get_input_details()[0]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path = os.path.join(tmp, 'input.bin')
+        csv_path = os.path.join(tmp, 'ops.csv')
+        X[:1].astype(np.float32).tofile(input_path)
+
+        cmd = [
+            binary,
+            f'--graph={model_path}',
+            f'--num_runs={runs}',
+            '--enable_op_profiling=true',
+            '--op_profiling_output_mode=csv',
+            f'--op_profiling_output_file={csv_path}',
+            f"--input_layer={inp['name']}",
+            f"--input_layer_shape={','.join(str(int(d)) for d in inp['shape'])}",
+            f"--input_layer_value_files={inp['name']}:{input_path}",
+        ]
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        if proc.returncode != 0 or not os.path.exists(csv_path):
+            raise RuntimeError(f"benchmark_model failed: {proc.stderr.strip()[-500:]}")
+
+        nodes = parse_op_profile_csv(csv_path)
+
+    memory_mb = None
+    for line in (proc.stdout + proc.stderr).splitlines():
+        if 'Memory footprint' in line and 'overall=' in line:
+            memory_mb = float(line.split('overall=')[1].split()[0].rstrip(','))
+
+    return nodes, memory_mb
+
+
+def profile_model(model_path, data=None, runs=DEFAULT_RUNS, samples=DEFAULT_SAMPLES, benchmark_binary=None):
+    nodes, tensors, input_indices, flex_ops = graph_nodes(model_path)
+
+    interpreter = _interpreter(model_path)
+    input_shape = tuple(int(d) for d in interpreter.get_input_details()[0]['shape'][1:])
+    X, source = load_windows(model_path, input_shape, data=data, samples=samples)
+
+    mean_ms, p95_ms = measure_invoke(model_path, X, runs=runs)
+    memory = arena_estimate(nodes, tensors, input_indices)
+
+    binary = _find_benchmark_binary(benchmark_binary)
+    method = 'estimated'
+    if binary:
+        try:
+            measured, memory['benchmark_overall_mb'] = run_benchmark_model(binary, model_path, X, runs=runs)
+            if measured:
+                per_node = [{'index': i, 'op': n['op'], 'name': n['name'], 'time_ms': n['avg_ms'],
+                             'mem_kb': n['mem_kb'], 'flex': n['op'].startswith(FLEX_PREFIX)}
+                            for i, n in enumerate(measured)]
+                method = 'benchmark_model'
+        except RuntimeError as e:
+            print(f"⚠️  {e} → falling back to estimates")
+
+    if method == 'estimated':
+        # Fără timpi per op măsurați: doar ponderea costului estimat, nu milisecunde
+        per_node = [{'index': n['index'], 'op': n['op'], 'name': n['name'],
+                     'estimated_cost': n['estimated_cost'], 'output_shape': n['output_shape'],
+                     'flex': n['flex']}
+                    for n in nodes]
+
+    # 'percent' = % din timpul măsurat (benchmark_model) sau % din costul estimat
+    weight = 'time_ms' if method == 'benchmark_model' else 'estimated_cost'
+    total = sum(n[weight] for n in per_node) or 1.0
+    for n in per_node:
+        n['percent'] = 100 * n[weight] / total
+
+    by_type = defaultdict(lambda: {'count': 0, weight: 0.0})
+    for n in per_node:
+        by_type[n['op']]['count'] += 1
+        by_type[n['op']][weight] += n[weight]
+    for agg in by_type.values():
+        agg['percent'] = 100 * agg[weight] / total
+
+    return {
+        'model': model_path,
+        'method': method,
+        'samples': source,
+        'invoke_ms_mean': mean_ms,
+        'invoke_ms_p95': p95_ms,
+        'memory': memory,
+        'flex_ops': flex_ops,
+        'by_op_type': dict(by_type),
+        'nodes': per_node,
+    }
+
+
+SORT_KEYS = {
+    'time': lambda item: -item[1]['percent'],
+    'count': lambda item: -item[1]['count'],
+    'name': lambda item: item[0],
+}
+
+
+def print_report(report, sort='time', top=20):
+    memory = report['memory']
+    print(f"\n{'='*72}")
+    print(f"📊 {report['model']}  ({report['method']}, samples: {report['samples']})")
+    print(f"   invoke: mean {report['invoke_ms_mean']:.3f} ms, p95 {report['invoke_ms_p95']:.3f} ms")
+    print(f"   arena (est.): {memory['arena_peak_bytes'] / 1024:.1f} KB, constants: {memory['constant_bytes'] / 1024:.1f} KB")
+    if report['flex_ops']:
+        print(f"   ⚠️  Flex ops (need SELECT_TF_OPS / Flex delegate): {', '.join(report['flex_ops'])}")
+    else:
+        print("   ✅ No Flex ops (builtins only)")
+    print(f"{'='*72}")
+
+    measured = report['method'] == 'benchmark_model'
+    if not measured:
+        print("\n⚠️  No benchmark_model → per-op times NOT measured; shares below are estimated cost (MACs / elements)")
+
+    share = '% time' if measured else '% est. cost'
+    print(f"\n{'Op type':<28} {'Count':>6} {'Time ms' if measured else '':>10} {share:>12}")
+    for op, agg in sorted(report['by_op_type'].items(), key=SORT_KEYS[sort])[:top]:
+        time_col = f"{agg['time_ms']:>10.4f}" if measured else ' ' * 10
+        print(f"{op:<28} {agg['count']:>6} {time_col} {agg['percent']:>11.1f}%")
+
+    print(f"\n{'#':>4} {'Op':<22} {'Time ms' if measured else '':>10} {share:>12}  Name")
+    hottest = sorted(report['nodes'], key=lambda n: -n['percent'])[:top]
+    for n in hottest:
+        flag = ' [FLEX]' if n['flex'] else ''
+        time_col = f"{n['time_ms']:>10.4f}" if measured else ' ' * 10
+        print(f"{n['index']:>4} {n['op']:<22} {time_col} {n['percent']:>11.1f}%  {n['name'][:60]}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-op TFLite profiler')
+    parser.add_argument('models', nargs='+', help='.tflite paths or globs')
+    parser.add_argument('--data', help='Prefix for {prefix}_X_val.npy sample windows (default: data/{model}_X_val.npy)')
+    parser.add_argument('--runs', type=int, default=DEFAULT_RUNS)
+    parser.add_argument('--samples', type=int, default=DEFAULT_SAMPLES)
+    parser.add_argument('--benchmark-binary', help='Path to the TFLite benchmark_model binary')
+    parser.add_argument('--sort', choices=sorted(SORT_KEYS), default='time', help='Op-type table order')
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--output', default=REPORTS_DIR, help='Directory for the JSON reports')
+    args = parser.parse_args()
+
+    paths = sorted({p for pattern in args.models for p in (glob.glob(pattern) or [pattern])})
+    os.makedirs(args.output, exist_ok=True)
+
+    for path in paths:
+        report = profile_model(path, data=args.data, runs=args.runs, samples=args.samples,
+                               benchmark_binary=args.benchmark_binary)
+        print_report(report, sort=args.sort, top=args.top)
+
+        json_path = os.path.join(args.output, os.path.basename(path).replace('.tflite', '_profile.json'))
+        with open(json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 {json_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+STAGE PROFILING pentru pipeline-uri (fetch, features, windowing, scaler, fit, convert, validate)
+Per stage și per (coin, timeframe): wall time, CPU time, peak RSS, top alocări tracemalloc
+Output: JSON + Chrome trace (chrome://tracing sau https://ui.perfetto.dev)
+
+Activare fără modificări de cod:
+    MTM_PROFILE=profiles/run python train_general.py
+    → profiles/run.json + profiles/run.trace.json
+"""
+
+import os
+import json
+import time
+import atexit
+import resource
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+PROFILE_ENV = 'MTM_PROFILE'
+TOP_ALLOCATIONS_ENV = 'MTM_PROFILE_TOP'  # 0 = fără tracemalloc (overhead minim)
+
+# Alocările profiler-ului însuși nu apar în top
+_SELF_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+)
+
+
+def _read_status_kb(field):
+    """VmRSS / VmHWM din /proc/self/status (Linux), None altfel"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _reset_peak_rss():
+    """Resetează VmHWM (Linux >= 4.0) → peak RSS măsurat per stage"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_kb():
+    peak = _read_status_kb('VmHWM')
+    if peak is not None:
+        return peak
+    # ru_maxrss: KB pe Linux, bytes pe macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss // 1024 if os.uname().sysname == 'Darwin' else maxrss
+
+
+class StageProfiler:
+    """
+    with profiler.stage('features', coin='BTC', timeframe='5m'):
+        features = build_76_features_normalized(df)
+    """
+
+    def __init__(self, enabled=True, top_allocations=10):
+        self.enabled = enabled
+        self.top_allocations = top_allocations
+        self.records = []
+        self._origin = time.perf_counter()
+        self._local = threading.local()
+
+        if enabled and top_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start(5)
+
+    def _stack(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def stage(self, name, **tags):
+        if not self.enabled:
+            yield
+            return
+
+        stack = self._stack()
+        parent = stack[-1] if stack else None
+        stack.append(name)
+
+        # Peak-urile se resetează doar pentru stage-urile de top (nested = incluse în părinte)
+        peak_reset = _reset_peak_rss() if parent is None else False
+        snapshot = None
+        if self.top_allocations and tracemalloc.is_tracing():
+            if parent is None:
+                tracemalloc.reset_peak()
+            snapshot = tracemalloc.take_snapshot().filter_traces(_SELF_FILTERS)
+
+        rss_start = _read_status_kb('VmRSS')
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            stack.pop()
+
+            record = {
+                'stage': name,
+                'parent': parent,
+                'tags': {k: v for k, v in tags.items() if v is not None},
+                'start_s': wall_start - self._origin,
+                'wall_s': wall,
+                'cpu_s': cpu,
+                'cpu_utilization': cpu / wall if wall > 0 else 0.0,
+                'rss_start_mb': rss_start / 1024 if rss_start is not None else None,
+                'rss_end_mb': (_read_status_kb('VmRSS') or 0) / 1024,
+                'peak_rss_mb': _peak_rss_kb() / 1024,
+                'peak_rss_scope': 'stage' if peak_reset else 'process',
+                'thread': threading.get_ident(),
+            }
+
+            if snapshot is not None:
+                _, py_peak = tracemalloc.get_traced_memory()
+                record['python_peak_mb'] = py_peak / 1024 / 1024
+                stats = tracemalloc.take_snapshot().filter_traces(_SELF_FILTERS).compare_to(snapshot, 'lineno')
+                record['top_allocations'] = [
+                    {
+                        'location': f"{s.traceback[0].filename}:{s.traceback[0].lineno}",
+                        'size_diff_kb': s.size_diff / 1024,
+                        'count_diff': s.count_diff,
+                    }
+                    for s in stats[:self.top_allocations]
+                ]
+
+            self.records.append(record)
+
+    def summary(self):
+        """Agregat per stage și per (stage, coin, timeframe)"""
+        by_stage = {}
+        by_key = {}
+
+        for r in self.records:
+            keys = [(by_stage, r['stage'])]
+            if r['tags']:
+                tag = ','.join(f"{k}={v}" for k, v in sorted(r['tags'].items()))
+                keys.append((by_key, f"{r['stage']}[{tag}]"))
+
+            for table, key in keys:
+                agg = table.setdefault(key, {'calls': 0, 'wall_s': 0.0, 'cpu_s': 0.0, 'peak_rss_mb': 0.0})
+                agg['calls'] += 1
+                agg['wall_s'] += r['wall_s']
+                agg['cpu_s'] += r['cpu_s']
+                agg['peak_rss_mb'] = max(agg['peak_rss_mb'], r['peak_rss_mb'])
+
+        return {
+            'by_stage': dict(sorted(by_stage.items(), key=lambda kv: -kv[1]['wall_s'])),
+            'by_stage_and_tags': dict(sorted(by_key.items(), key=lambda kv: -kv[1]['wall_s'])),
+        }
+
+    def chrome_trace(self):
+        """Chrome trace event format ('X' = complete events)"""
+        pid = os.getpid()
+        events = []
+        for r in self.records:
+            label = r['stage']
+            if r['tags']:
+                label += ' ' + ' '.join(str(v) for v in r['tags'].values())
+            events.append({
+                'name': label,
+                'cat': r['stage'],
+                'ph': 'X',
+                'ts': r['start_s'] * 1e6,
+                'dur': r['wall_s'] * 1e6,
+                'pid': pid,
+                'tid': r['thread'],
+                'args': {k: r[k] for k in ('cpu_s', 'cpu_utilization', 'peak_rss_mb', 'rss_end_mb') if k in r},
+            })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write(self, prefix):
+        """prefix.json (records + summary) și prefix.trace.json (Chrome trace)"""
+        if os.path.dirname(prefix):
+            os.makedirs(os.path.dirname(prefix), exist_ok=True)
+
+        with open(f'{prefix}.json', 'w') as f:
+            json.dump({'summary': self.summary(), 'records': self.records}, f, indent=2)
+
+        with open(f'{prefix}.trace.json', 'w') as f:
+            json.dump(self.chrome_trace(), f)
+
+        return f'{prefix}.json', f'{prefix}.trace.json'
+
+    def print_summary(self):
+        print(f"\n{'Stage':<40} {'Calls':>6} {'Wall s':>10} {'CPU s':>10} {'Peak RSS MB':>12}")
+        for name, agg in self.summary()['by_stage'].items():
+            print(f"{name:<40} {agg['calls']:>6} {agg['wall_s']:>10.3f} {agg['cpu_s']:>10.3f} {agg['peak_rss_mb']:>12.1f}")
+
+
+_profiler = None
+
+
+def get_profiler():
+    """
+    Profiler-ul global al procesului
+    Activ doar dacă MTM_PROFILE e setat; altfel stage() nu face nimic
+    """
+    global _profiler
+    if _profiler is None:
+        prefix = os.environ.get(PROFILE_ENV)
+        top = int(os.environ.get(TOP_ALLOCATIONS_ENV, '10'))
+        _profiler = StageProfiler(enabled=bool(prefix), top_allocations=top)
+
+        if prefix:
+            atexit.register(_write_at_exit, _profiler, prefix)
+
+    return _profiler
+
+
+def _write_at_exit(profiler, prefix):
+    if profiler.records:
+        profiler.print_summary()
+        json_path, trace_path = profiler.write(prefix)
+        print(f"📊 Profile: {json_path} | trace: {trace_path}")
+
+
+def stage(name, **tags):
+    """Shortcut: with stage('fit', timeframe='5m'): ..."""
+    return get_profiler().stage(name, **tags)
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+STRUCTURED PRUNING pentru modelele CNN (train_model.build_model, train_general.create_general_model)
+- Elimină filtre / unități întregi după magnitudine (L1), cu fine-tuning între pași
+- Reconstruiește straturile FIZIC mai mici înainte de export TFLite
+- Raport: mărime, latență și acuratețe înainte/după
+"""
+
+import os
+import json
+import time
+import argparse
+import logging
+
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
+from tensorflow.keras import layers
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PRUNABLE = (layers.Conv1D, layers.Conv2D, layers.Dense)
+# Straturi care nu schimbă numărul de canale
+PASSTHROUGH = (
+    layers.Activation, layers.Dropout, layers.MaxPooling1D, layers.MaxPooling2D,
+    layers.GlobalAveragePooling1D, layers.GlobalAveragePooling2D, layers.Reshape,
+    layers.ReLU,
+)
+
+
+def filter_importance(layer, next_layer=None):
+    """
+    L1 magnitude per output filter/unit
+    Dacă urmează BatchNormalization, se folosește scala efectivă |gamma| / sqrt(var + eps)
+    """
+    kernel = layer.get_weights()[0]
+    importance = np.abs(kernel).reshape(-1, kernel.shape[-1]).sum(axis=0)
+
+    if isinstance(next_layer, layers.BatchNormalization):
+        gamma, _, _, moving_var = next_layer.get_weights()
+        importance = importance * np.abs(gamma) / np.sqrt(moving_var + next_layer.epsilon)
+
+    return importance
+
+
+def prune_sequential(model, ratio):
+    """
+    Returnează un model Sequential NOU, cu `ratio` din filtrele fiecărui Conv/Dense ascuns
+    eliminate fizic (ultimul Dense - output - rămâne neatins)
+    """
+    model_layers = model.layers
+    last_dense = max(i for i, l in enumerate(model_layers) if isinstance(l, layers.Dense))
+
+    new_layers = []
+    new_weights = []
+    keep_in = None  # Indicii canalelor păstrate în activarea curentă (None = toate)
+
+    for i, layer in enumerate(model_layers):
+        config = layer.get_config()
+        weights = layer.get_weights()
+
+        if isinstance(layer, PRUNABLE):
+            kernel = weights[0]
+            if keep_in is not None:
+                kernel = np.take(kernel, keep_in, axis=-2)
+
+            if i == last_dense:
+                keep_out = np.arange(kernel.shape[-1])
+            else:
+                next_layer = model_layers[i + 1] if i + 1 < len(model_layers) else None
+                importance = filter_importance(layer, next_layer)
+                n_keep = max(1, int(round(len(importance) * (1 - ratio))))
+                keep_out = np.sort(np.argsort(importance)[::-1][:n_keep])
+
+                if isinstance(layer, layers.Dense):
+                    config['units'] = n_keep
+                else:
+                    config['filters'] = n_keep
+
+            sliced = [kernel[..., keep_out]]
+            if layer.use_bias:
+                sliced.append(weights[1][keep_out])
+
+            new_layers.append(type(layer).from_config(config))
+            new_weights.append(sliced)
+            keep_in = keep_out
+
+        elif isinstance(layer, layers.BatchNormalization):
+            if keep_in is not None:
+                weights = [w[keep_in] for w in weights]
+            new_layers.append(type(layer).from_config(config))
+            new_weights.append(weights)
+
+        elif isinstance(layer, PASSTHROUGH):
+            new_layers.append(type(layer).from_config(config))
+            new_weights.append(weights)
+
+        else:
+            raise NotImplementedError(f"Cannot prune through layer {layer.name} ({type(layer).__name__})")
+
+    pruned = keras.Sequential([layers.Input(shape=model.input_shape[1:])] + new_layers)
+    for layer, weights in zip(pruned.layers, new_weights):
+        if weights:
+            layer.set_weights(weights)
+
+    return pruned
+
+
+def iterative_prune(model, X_train, y_train, X_val, y_val, target_ratio=0.5, steps=3,
+                    epochs_per_step=3, learning_rate=1e-4, batch_size=64):
+    """
+    Schedule: `steps` pași egali geometric până la target_ratio, fine-tuning după fiecare
+    (1 - r)^steps = 1 - target_ratio → fiecare pas elimină r din filtrele rămase
+    """
+    step_ratio = 1 - (1 - target_ratio) ** (1 / steps)
+
+    for step in range(steps):
+        model = prune_sequential(model, step_ratio)
+        model.compile(
+            optimizer=keras.optimizers.Adam(learning_rate=learning_rate),
+            loss='categorical_crossentropy',
+            metrics=['accuracy']
+        )
+        model.fit(X_train, y_train, validation_data=(X_val, y_val),
+                  epochs=epochs_per_step, batch_size=batch_size, verbose=0)
+
+        _, acc = model.evaluate(X_val, y_val, verbose=0)
+        logger.info(f"  Step {step + 1}/{steps}: params={model.count_params():,} val_acc={acc:.4f}")
+
+    return model
+
+
+def to_tflite(model):
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS]
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    return converter.convert()
+
+
+def measure_latency(tflite_model, runs=200, warmup=20):
+    """Latență medie / p95 per invoke (batch 1) în ms"""
+    interpreter = tf.lite.Interpreter(model_content=tflite_model)
+    interpreter.allocate_tensors()
+    inp = interpreter.get_input_details()[0]
+    sample = np.random.randn(*inp['shape']).astype(np.float32)
+
+    for _ in range(warmup):
+        interpreter.set_tensor(inp['index'], sample)
+        interpreter.invoke()
+
+    times = []
+    for _ in range(runs):
+        interpreter.set_tensor(inp['index'], sample)
+        start = time.perf_counter()
+        interpreter.invoke()
+        times.append((time.perf_counter() - start) * 1000)
+
+    return float(np.mean(times)), float(np.percentile(times, 95))
+
+
+def describe(model, X_val, y_val):
+    """Mărime TFLite, latență și acuratețe pentru un model"""
+    tflite_model = to_tflite(model)
+    mean_ms, p95_ms = measure_latency(tflite_model)
+    _, acc = model.evaluate(X_val, y_val, verbose=0)
+
+    return {
+        'params': int(model.count_params()),
+        'tflite_size_kb': len(tflite_model) / 1024,
+        'latency_ms_mean': mean_ms,
+        'latency_ms_p95': p95_ms,
+        'val_accuracy': float(acc),
+        'layers': [l.get_config().get('filters', l.get_config().get('units'))
+                   for l in model.layers if isinstance(l, PRUNABLE)],
+    }, tflite_model
+
+
+def build_base_model(arch):
+    if arch == 'coin':
+        from train_model import build_model
+        return build_model()
+    if arch == 'general':
+        from train_general import create_general_model
+        return create_general_model()
+    raise ValueError(f"Unknown architecture: {arch}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Structured pruning for CNN models')
+    parser.add_argument('--arch', choices=['coin', 'general'], default='coin',
+                        help='coin = train_model.build_model, general = train_general.create_general_model')
+    parser.add_argument('--data', default='data/btc_5m',
+                        help='Prefix for {prefix}_X_train.npy / _y_train.npy / _X_val.npy / _y_val.npy')
+    parser.add_argument('--keras-model', help='Trained Keras model to prune (otherwise a baseline is trained)')
+    parser.add_argument('--ratio', type=float, default=0.5, help='Fraction of filters/units to remove')
+    parser.add_argument('--steps', type=int, default=3)
+    parser.add_argument('--epochs-per-step', type=int, default=3)
+    parser.add_argument('--output', default='assets/ml_pruned')
+    args = parser.parse_args()
+
+    X_train = np.load(f'{args.data}_X_train.npy')
+    y_train = np.load(f'{args.data}_y_train.npy')
+    X_val = np.load(f'{args.data}_X_val.npy')
+    y_val = np.load(f'{args.data}_y_val.npy')
+
+    if args.keras_model:
+        model = keras.models.load_model(args.keras_model)
+    else:
+        logger.info("Training baseline model...")
+        model = build_base_model(args.arch)
+        model.compile(optimizer='adam', loss='categorical_crossentropy', metrics=['accuracy'])
+        model.fit(X_train, y_train, validation_data=(X_val, y_val), epochs=50, batch_size=32,
+                  callbacks=[keras.callbacks.EarlyStopping(patience=10, restore_best_weights=True)],
+                  verbose=0)
+
+    baseline, _ = describe(model, X_val, y_val)
+    logger.info(f"Baseline: {baseline}")
+
+    logger.info(f"Pruning {args.ratio:.0%} in {args.steps} steps...")
+    pruned_model = iterative_prune(model, X_train, y_train, X_val, y_val,
+                                   target_ratio=args.ratio, steps=args.steps,
+                                   epochs_per_step=args.epochs_per_step)
+
+    pruned, tflite_model = describe(pruned_model, X_val, y_val)
+    logger.info(f"Pruned: {pruned}")
+
+    os.makedirs(args.output, exist_ok=True)
+    name = os.path.basename(args.data)
+    tflite_path = os.path.join(args.output, f'{name}_model.tflite')
+    with open(tflite_path, 'wb') as f:
+        f.write(tflite_model)
+
+    report = {
+        'arch': args.arch,
+        'data': args.data,
+        'ratio': args.ratio,
+        'steps': args.steps,
+        'baseline': baseline,
+        'pruned': pruned,
+        'size_reduction': 1 - pruned['tflite_size_kb'] / baseline['tflite_size_kb'],
+        'speedup': baseline['latency_ms_mean'] / pruned['latency_ms_mean'],
+        'accuracy_delta': pruned['val_accuracy'] - baseline['val_accuracy'],
+    }
+    report_path = os.path.join(args.output, f'{name}_pruning_report.json')
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n{'Model':<10} {'Params':>10} {'Size KB':>10} {'Latency ms':>12} {'Val acc':>9}")
+    for label, r in (('baseline', baseline), ('pruned', pruned)):
+        print(f"{label:<10} {r['params']:>10,} {r['tflite_size_kb']:>10.1f} {r['latency_ms_mean']:>12.3f} {r['val_accuracy']:>9.4f}")
+    print(f"\n✅ Saved: {tflite_path}")
+    print(f"📊 Report: {report_path}")
+
+
+if __name__ == '__main__':
+    main()
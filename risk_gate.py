@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+RISK GATE - volatility z-score + prag de confidence (registry "risk" block)
+Twin Python al UnifiedMLService (Dart):
+    z = (std(returns, ddof=1) - 0.01) / 0.01      pe ultimele 60 lumânări (feature 25)
+    gate = default_conf_thresholds[tf] (+ vol_thresh_increment dacă z > vol_z_limit, max 0.95)
+    confidence < gate → HOLD
+
+Streaming: VolatilityBank ține per simbol un ring buffer + sumă / sumă pătrate →
+O(1) per lumânare, update vectorizat pe sute de simboluri într-un singur tick
+Batch (backtest): rolling_vol_z pe o serie întreagă, vol_z_from_windows pe ferestre (N, 60, 76)
+
+    python risk_gate.py    # paritate streaming vs batch vs formula Dart + throughput
+"""
+
+import time
+
+import numpy as np
+
+from calibration import REGISTRY_PATH, load_registry
+
+VOL_WINDOW = 60  # = SEQUENCE_LENGTH, fereastra pe care o vede aplicația
+VOL_BASELINE = 0.01  # Stdev „tipic” al randamentului (constanta din _estimateVolatilityZ)
+RETURN_FEATURE = 25  # FullFeatureBuilder: index 25 = returns
+GATE_MAX = 0.95
+RESYNC_EVERY = 10_000  # Recalculare exactă a sumelor (drift float pe update-uri incrementale)
+LABELS = ('SELL', 'HOLD', 'BUY')
+
+
+def vol_z(stdev, baseline=VOL_BASELINE):
+    return (stdev - baseline) / (baseline + 1e-12)
+
+
+def rolling_vol_z(returns, window=VOL_WINDOW, baseline=VOL_BASELINE):
+    """
+    Batch: z pentru fiecare poziție a unei serii (NaN până la prima fereastră completă)
+    Sume cumulative pe randamente centrate → fără cancelare numerică pe serii lungi
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    z = np.full(len(returns), np.nan)
+    if len(returns) < window:
+        return z
+
+    centered = returns - returns.mean()
+    c1 = np.concatenate([[0.0], np.cumsum(centered)])
+    c2 = np.concatenate([[0.0], np.cumsum(centered ** 2)])
+    s1 = c1[window:] - c1[:-window]
+    s2 = c2[window:] - c2[:-window]
+
+    variance = np.maximum((s2 - s1 ** 2 / window) / (window - 1), 0.0)
+    z[window - 1:] = vol_z(np.sqrt(variance), baseline)
+    return z
+
+
+def vol_z_from_windows(X, feature=RETURN_FEATURE, baseline=VOL_BASELINE):
+    """Exact ce calculează aplicația pe fereastra de features (N, 60, 76) → (N,)"""
+    return vol_z(np.asarray(X, dtype=np.float64)[:, :, feature].std(axis=1, ddof=1), baseline)
+
+
+class VolatilityBank:
+    """
+    Stare rolling per simbol, în array-uri (S, window):
+        bank.update('BTCUSDT', 0.0012)              → z (NaN până la fereastră completă)
+        bank.update_many(symbols, returns)          → z (len(symbols),), un tick pe toate simbolurile
+    """
+
+    def __init__(self, window=VOL_WINDOW, baseline=VOL_BASELINE, capacity=64):
+        self.window = window
+        self.baseline = baseline
+        self._index = {}
+        self._alloc(capacity)
+
+    def _alloc(self, capacity):
+        old = getattr(self, '_ring', None)
+        ring = np.zeros((capacity, self.window))
+        sums, sums_sq = np.zeros(capacity), np.zeros(capacity)
+        pos, count, updates = (np.zeros(capacity, dtype=np.int64) for _ in range(3))
+
+        if old is not None:
+            n = len(old)
+            ring[:n], sums[:n], sums_sq[:n] = old, self._sum, self._sum_sq
+            pos[:n], count[:n], updates[:n] = self._pos, self._count, self._updates
+
+        self._ring, self._sum, self._sum_sq = ring, sums, sums_sq
+        self._pos, self._count, self._updates = pos, count, updates
+
+    def _slots(self, symbols):
+        slots = np.empty(len(symbols), dtype=np.int64)
+        for i, symbol in enumerate(symbols):
+            slot = self._index.get(symbol)
+            if slot is None:
+                slot = self._index[symbol] = len(self._index)
+                if slot >= len(self._ring):
+                    self._alloc(2 * len(self._ring))
+            slots[i] = slot
+        return slots
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, symbol):
+        return symbol in self._index
+
+    def update(self, symbol, ret):
+        return float(self.update_many([symbol], [ret])[0])
+
+    def update_many(self, symbols, returns):
+        """Un randament nou per simbol (simboluri distincte în același apel)"""
+        slots = self._slots(symbols)
+        returns = np.asarray(returns, dtype=np.float64)
+
+        # Scoate valoarea care iese din fereastră (0 cât timp fereastra nu e plină)
+        pos = self._pos[slots]
+        leaving = self._ring[slots, pos]
+        self._ring[slots, pos] = returns
+        self._sum[slots] += returns - leaving
+        self._sum_sq[slots] += returns ** 2 - leaving ** 2
+        self._pos[slots] = (pos + 1) % self.window
+        self._count[slots] = np.minimum(self._count[slots] + 1, self.window)
+        self._updates[slots] += 1
+
+        # Resync periodic din ring buffer (O(window), amortizat)
+        stale = slots[self._updates[slots] % RESYNC_EVERY == 0]
+        if len(stale):
+            self._sum[stale] = self._ring[stale].sum(axis=1)
+            self._sum_sq[stale] = (self._ring[stale] ** 2).sum(axis=1)
+
+        return self._zscores(slots)
+
+    def _zscores(self, slots):
+        n = self.window
+        variance = np.maximum((self._sum_sq[slots] - self._sum[slots] ** 2 / n) / (n - 1), 0.0)
+        z = vol_z(np.sqrt(variance), self.baseline)
+        return np.where(self._count[slots] >= n, z, np.nan)
+
+    def zscore(self, symbol):
+        if symbol not in self._index:
+            return float('nan')
+        return float(self._zscores(np.array([self._index[symbol]]))[0])
+
+    def warm_up(self, symbol, returns):
+        """Umple fereastra dintr-un istoric (ultimele `window` randamente)"""
+        z = float('nan')
+        for ret in np.asarray(returns, dtype=np.float64)[-self.window:]:
+            z = self.update(symbol, ret)
+        return z
+
+
+class RiskGate:
+    """
+    Pragul de confidence al ensemble-ului, ca în UnifiedMLService.predict:
+        gate = RiskGate.from_registry()
+        gate.threshold('5m', vol_z)                → float
+        gate.apply(probs, '5m', vol_z)             → (label, confidence, threshold, reason)
+        gate.apply_batch(probs, '5m', vol_z)       → dict de array-uri (backtest)
+    """
+
+    def __init__(self, conf_thresholds, tf_map=None, vol_z_limit=0.0, vol_thresh_increment=0.0):
+        self.conf_thresholds = {k.lower(): float(v) for k, v in conf_thresholds.items()}
+        self.tf_map = {k.lower(): v for k, v in (tf_map or {}).items()}
+        self.vol_z_limit = float(vol_z_limit)
+        self.vol_thresh_increment = float(vol_thresh_increment)
+
+    @classmethod
+    def from_registry(cls, registry=None, path=REGISTRY_PATH):
+        registry = registry if registry is not None else load_registry(path)
+        risk = registry.get('risk') or {}
+        return cls(
+            registry.get('default_conf_thresholds', {}),
+            registry.get('tf_map'),
+            risk.get('vol_z_limit', 0.0),
+            risk.get('vol_thresh_increment', 0.0),
+        )
+
+    def base_threshold(self, timeframe):
+        tf = timeframe.lower()
+        return self.conf_thresholds.get(self.tf_map.get(tf, tf).lower(), 0.0)
+
+    def threshold(self, timeframe, vol_z=None):
+        """vol_z: scalar sau array; NaN / None = fără bump (z indisponibil)"""
+        base = self.base_threshold(timeframe)
+        if vol_z is None or self.vol_thresh_increment <= 0:
+            return base if np.ndim(vol_z) == 0 else np.full(np.shape(vol_z), base)
+
+        high = np.asarray(vol_z, dtype=np.float64) > self.vol_z_limit  # NaN > x → False
+        gate = np.where(high, np.clip(base + self.vol_thresh_increment, 0.0, GATE_MAX), base)
+        return float(gate) if gate.ndim == 0 else gate
+
+    def apply(self, probs, timeframe, vol_z=None):
+        gate = self.threshold(timeframe, vol_z)
+        best = int(np.argmax(probs))
+        if probs[best] < gate:
+            return 'HOLD', float(probs[1]), gate, 'below_threshold'
+        return LABELS[best], float(probs[best]), gate, 'ok'
+
+    def apply_batch(self, probs, timeframe, vol_z=None):
+        """probs (N, 3), vol_z (N,) → action (N,) index în LABELS, confidence, threshold, gated"""
+        probs = np.asarray(probs)
+        gate = self.threshold(timeframe, np.full(len(probs), np.nan) if vol_z is None else vol_z)
+        best = probs.argmax(axis=1)
+        confidence = probs[np.arange(len(probs)), best]
+        gated = confidence < gate
+        return {
+            'action': np.where(gated, 1, best),
+            'confidence': np.where(gated, probs[:, 1], confidence),
+            'threshold': gate,
+            'gated': gated,
+        }
+
+
+def main():
+    rng = np.random.default_rng(0)
+    symbols, ticks = 500, 2000
+
+    # Randamente cu regim de volatilitate variabil → z trece și peste limită
+    vol = np.exp(rng.normal(np.log(VOL_BASELINE), 0.5, (symbols, 1))) * (1.5 + np.sin(np.arange(ticks) / 150))
+    returns = rng.standard_normal((symbols, ticks)) * vol
+
+    bank = VolatilityBank(capacity=8)
+    names = [f'SYM{i}USDT' for i in range(symbols)]
+    streamed = np.empty((symbols, ticks))
+    start = time.perf_counter()
+    for t in range(ticks):
+        streamed[:, t] = bank.update_many(names, returns[:, t])
+    elapsed = time.perf_counter() - start
+
+    batch = np.stack([rolling_vol_z(r) for r in returns])
+    windows = np.lib.stride_tricks.sliding_window_view(returns[0], VOL_WINDOW)
+    dart = vol_z(windows.std(axis=1, ddof=1))
+
+    valid = ~np.isnan(batch)
+    print(f"📈 {symbols} symbols × {ticks} candles: {symbols * ticks / elapsed:,.0f} updates/s "
+          f"({elapsed / ticks * 1e3:.2f} ms per tick for all symbols)")
+    print(f"🔁 streaming vs batch: max |Δz| {np.abs(streamed[valid] - batch[valid]).max():.2e}")
+    print(f"🔁 batch vs ddof=1 window std: max |Δz| {np.abs(batch[0, VOL_WINDOW - 1:] - dart).max():.2e}")
+
+    gate = RiskGate.from_registry()
+    probs = rng.dirichlet(np.ones(3) * 2, size=ticks)
+    result = gate.apply_batch(probs, '1d', streamed[0])
+    print(f"🚦 1d gate {gate.base_threshold('1d'):.2f} (+{gate.vol_thresh_increment:.2f} above z {gate.vol_z_limit}): "
+          f"{(streamed[0] > gate.vol_z_limit).mean():.0%} high-vol candles, {result['gated'].mean():.0%} gated to HOLD")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Streaming StandardScaler fit (Welford / Chan parallel update, float64)
+Fits on UNIQUE feature rows (per coin, or any chunks) instead of the
+overlapping (N*60, 76) window matrix, and exports the same mean/std JSON
+that the Flutter app reads (*_scaler.json)
+"""
+
+import json
+import numpy as np
+
+
+class StreamingScaler:
+    """
+    Incremental mean/variance per feature
+
+    partial_fit() accepts any (n, num_features) chunk - e.g. one coin's feature
+    matrix - and merges it into the running statistics with the Chan et al.
+    pairwise form of Welford's update. Chunks are never concatenated; memory is
+    bounded by one chunk-sized temporary.
+    """
+
+    def __init__(self, num_features=76):
+        self.num_features = num_features
+        self.n_samples_seen_ = 0
+        self._mean = np.zeros(num_features, dtype=np.float64)
+        self._m2 = np.zeros(num_features, dtype=np.float64)
+
+    def partial_fit(self, chunk):
+        chunk = np.asarray(chunk).reshape(-1, self.num_features)
+        n_b = chunk.shape[0]
+        if n_b == 0:
+            return self
+
+        mean_b = chunk.mean(axis=0, dtype=np.float64)
+        m2_b = ((chunk - mean_b) ** 2).sum(axis=0, dtype=np.float64)
+
+        n_a = self.n_samples_seen_
+        n = n_a + n_b
+        delta = mean_b - self._mean
+
+        self._mean += delta * (n_b / n)
+        self._m2 += m2_b + delta ** 2 * (n_a * n_b / n)
+        self.n_samples_seen_ = n
+        return self
+
+    def fit(self, chunks):
+        """Fit on an iterable of chunks (e.g. per-coin feature matrices)"""
+        for chunk in chunks:
+            self.partial_fit(chunk)
+        return self
+
+    def merge(self, other):
+        """Combine statistics from another scaler (e.g. fitted in a worker process)"""
+        if other.n_samples_seen_ == 0:
+            return self
+
+        n_a, n_b = self.n_samples_seen_, other.n_samples_seen_
+        n = n_a + n_b
+        delta = other._mean - self._mean
+
+        self._mean += delta * (n_b / n)
+        self._m2 += other._m2 + delta ** 2 * (n_a * n_b / n)
+        self.n_samples_seen_ = n
+        return self
+
+    @property
+    def mean_(self):
+        return self._mean.copy()
+
+    @property
+    def var_(self):
+        # Population variance (ddof=0) - same as sklearn StandardScaler
+        if self.n_samples_seen_ == 0:
+            return np.zeros(self.num_features, dtype=np.float64)
+        return self._m2 / self.n_samples_seen_
+
+    @property
+    def scale_(self):
+        # Constant features → scale 1.0 (same as sklearn)
+        scale = np.sqrt(self.var_)
+        scale[scale < 10 * np.finfo(np.float64).eps] = 1.0
+        return scale
+
+    def transform(self, X, dtype=np.float32):
+        """Standardize (..., num_features) arrays (windows or rows)"""
+        mean = self._mean.astype(dtype)
+        scale = self.scale_.astype(dtype)
+        return ((np.asarray(X, dtype=dtype) - mean) / scale).astype(dtype, copy=False)
+
+    def select(self, indices):
+        """Scaler restricted to a feature subset (feature_analysis feature sets)"""
+        indices = np.asarray(indices, dtype=np.int64)
+        subset = StreamingScaler(len(indices))
+        subset._mean = self._mean[indices].copy()
+        subset._m2 = self._m2[indices].copy()
+        subset.n_samples_seen_ = self.n_samples_seen_
+        return subset
+
+    def to_json(self):
+        return {
+            'mean': self._mean.tolist(),
+            'std': self.scale_.tolist(),
+        }
+
+    def save_json(self, path):
+        """Write the scaler JSON read by the Flutter app"""
+        with open(path, 'w') as f:
+            json.dump(self.to_json(), f, indent=2)
+
+    @classmethod
+    def load_json(cls, path):
+        """Scaler from a *_scaler.json file (mean/std only)"""
+        with open(path) as f:
+            data = json.load(f)
+
+        scaler = cls(len(data['mean']))
+        scaler._mean = np.asarray(data['mean'], dtype=np.float64)
+        scaler._m2 = np.asarray(data['std'], dtype=np.float64) ** 2
+        scaler.n_samples_seen_ = 1
+        return scaler
+
+    def to_standard_scaler(self):
+        """Equivalent fitted sklearn StandardScaler (for the .pkl files)"""
+        from sklearn.preprocessing import StandardScaler
+
+        scaler = StandardScaler()
+        scaler.mean_ = self.mean_
+        scaler.var_ = self.var_
+        scaler.scale_ = self.scale_
+        scaler.n_samples_seen_ = self.n_samples_seen_
+        scaler.n_features_in_ = self.num_features
+        return scaler
+
+
+def bake_scaler_into_model(model, mean, std):
+    """
+    Wrap a Keras model with a leading normalization op: (x - mean) / std
+
+    The exported TFLite graph then takes RAW features; the scaler JSON stays
+    on disk for older app builds and for Python consumers.
+    """
+    import tensorflow as tf
+
+    mean = np.asarray(mean, dtype=np.float32)
+    std = np.asarray(std, dtype=np.float32)
+
+    inputs = tf.keras.layers.Input(shape=model.input_shape[1:], name='raw_features')
+    x = tf.keras.layers.Normalization(axis=-1, mean=mean, variance=std ** 2, name='baked_scaler')(inputs)
+    outputs = model(x)
+
+    return tf.keras.Model(inputs=inputs, outputs=outputs, name=f'{model.name}_baked')
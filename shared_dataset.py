@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+SHARED DATASET - un singur exemplar al datelor pentru N procese worker
+Procesul principal publică array-urile O DATĂ; workerii se atașează read-only prin
+manifest (dict mic, JSON) - fără pickle, fără copie per proces
+
+Backend-uri:
+- 'shm':  multiprocessing.shared_memory, un singur segment (offset-uri aliniate la 64 B)
+- 'mmap': fișiere .npy în `directory`, np.load(mmap_mode='r') - merge și între procese
+          pornite separat (distributed.launch_local) și supraviețuiește owner-ului
+
+Ferestrele nu se materializează: se publică matricea de features per lumânare (T, F)
++ indicii de start; window_batch() construiește doar batch-ul cerut (60× mai puțină memorie)
+
+    with SharedDataset({'X': X, 'y': y}) as shared:
+        pool = ProcessPoolExecutor(initializer=init, initargs=(shared.manifest,))
+    # în worker
+    data = attach(manifest)        # data['X'] - ndarray read-only peste memoria partajată
+
+    python shared_dataset.py --workers 8 --size-mb 256    # memorie privată per worker
+"""
+
+import os
+import json
+import uuid
+import time
+import argparse
+from multiprocessing import shared_memory, resource_tracker
+
+import numpy as np
+
+MMAP_DIR = 'data/shared'
+ALIGN = 64
+BACKENDS = ('shm', 'mmap')
+
+
+def _aligned(offset):
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+class SharedDataset:
+    """
+    Owner-ul datelor: copiază array-urile o singură dată în memoria partajată
+    Segmentul / fișierele se șterg la close() (sau la ieșirea din `with`)
+    """
+
+    def __init__(self, arrays, name=None, backend='shm', directory=MMAP_DIR):
+        if backend not in BACKENDS:
+            raise ValueError(f"backend must be one of {BACKENDS}, got {backend!r}")
+        self.name = name or f'mtm_{uuid.uuid4().hex[:12]}'
+        self.backend = backend
+        self._shm = None
+        self._paths = []
+
+        arrays = {key: np.asarray(value) for key, value in arrays.items()}
+        entries = {}
+
+        if backend == 'shm':
+            offset = 0
+            for key, value in arrays.items():
+                offset = _aligned(offset)
+                entries[key] = {'shape': list(value.shape), 'dtype': value.dtype.str, 'offset': offset}
+                offset += value.nbytes
+
+            self._shm = shared_memory.SharedMemory(name=self.name, create=True, size=max(offset, 1))
+            for key, value in arrays.items():
+                entry = entries[key]
+                target = np.ndarray(value.shape, dtype=value.dtype, buffer=self._shm.buf, offset=entry['offset'])
+                target[...] = value
+                del target  # Fără view-uri rămase → segmentul se poate închide
+
+        else:
+            os.makedirs(directory, exist_ok=True)
+            for key, value in arrays.items():
+                path = os.path.join(directory, f'{self.name}_{key}.npy')
+                np.save(f'{path}.tmp.npy', np.ascontiguousarray(value))
+                os.replace(f'{path}.tmp.npy', path)
+                self._paths.append(path)
+                entries[key] = {'shape': list(value.shape), 'dtype': value.dtype.str, 'path': path}
+
+        self.manifest = {'name': self.name, 'backend': backend, 'arrays': entries}
+        self.nbytes = sum(value.nbytes for value in arrays.values())
+
+    def save_manifest(self, path):
+        """Pentru procese pornite separat: attach(path)"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.manifest, f, indent=2)
+        return path
+
+    def close(self):
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+        for path in self._paths:
+            if os.path.exists(path):
+                os.remove(path)
+        self._paths = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class AttachedDataset(dict):
+    """dict {key: ndarray read-only} peste memoria partajată; close() eliberează maparea"""
+
+    def __init__(self, arrays, handle=None):
+        super().__init__(arrays)
+        self._handle = handle
+
+    def close(self):
+        self.clear()
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+
+def _open_segment(name):
+    """
+    Atașare fără înregistrare în resource_tracker: altfel tracker-ul worker-ului
+    ar face unlink la segment când worker-ul iese (Python < 3.13 nu are track=False)
+    """
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args, **kwargs: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+def attach(manifest):
+    """manifest: dict (SharedDataset.manifest) sau cale către JSON-ul lui"""
+    if isinstance(manifest, str):
+        with open(manifest) as f:
+            manifest = json.load(f)
+
+    arrays, handle = {}, None
+    if manifest['backend'] == 'shm':
+        handle = _open_segment(manifest['name'])
+        for key, entry in manifest['arrays'].items():
+            value = np.ndarray(entry['shape'], dtype=np.dtype(entry['dtype']), buffer=handle.buf,
+                               offset=entry['offset'])
+            value.flags.writeable = False
+            arrays[key] = value
+    else:
+        for key, entry in manifest['arrays'].items():
+            arrays[key] = np.load(entry['path'], mmap_mode='r')
+
+    return AttachedDataset(arrays, handle)
+
+
+def window_starts(num_rows, length=60, horizon=0):
+    """Indicii de start ai tuturor ferestrelor complete (cu `horizon` lumânări de label după)"""
+    return np.arange(max(num_rows - length - horizon + 1, 0), dtype=np.int64)
+
+
+def window_batch(features, starts, indices=None, length=60):
+    """(T, F) + starturi → (len(indices), length, F); copiază doar batch-ul cerut"""
+    selected = starts if indices is None else starts[indices]
+    return features[selected[:, None] + np.arange(length)]
+
+
+# ============================================================================
+# DEMO: memorie privată per worker (shm vs copie pickled)
+# ============================================================================
+
+def _private_mb():
+    """Memorie privată (Private_Clean + Private_Dirty) a procesului, MB - Linux"""
+    total = 0
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            if line.startswith(('Private_Clean', 'Private_Dirty')):
+                total += int(line.split()[1])
+    return total / 1024
+
+
+def _touch_shared(manifest):
+    data = attach(manifest)
+    before = _private_mb()
+    checksum = float(data['X'][::97].sum())  # Citește toată matricea (pagină cu pagină)
+    checksum += float(np.asarray(data['X']).sum())
+    after = _private_mb()
+    data.close()
+    return after - before, checksum
+
+
+def _touch_copy(X):
+    before = _private_mb()
+    checksum = float(X[::97].sum()) + float(X.sum())
+    return _private_mb() - before + X.nbytes / 2 ** 20, checksum
+
+
+def main():
+    from concurrent.futures import ProcessPoolExecutor
+    import multiprocessing
+
+    parser = argparse.ArgumentParser(description='Shared dataset: per-worker memory, shared vs copied')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--size-mb', type=int, default=256)
+    parser.add_argument('--backend', choices=BACKENDS, default='shm')
+    args = parser.parse_args()
+
+    rows = args.size_mb * 2 ** 20 // (76 * 4)
+    X = np.random.default_rng(0).standard_normal((rows, 76), dtype=np.float32)
+    context = multiprocessing.get_context('spawn')  # Fără fork → fără moștenire copy-on-write
+
+    start = time.perf_counter()
+    with SharedDataset({'X': X}, backend=args.backend) as shared:
+        publish_s = time.perf_counter() - start
+        with ProcessPoolExecutor(args.workers, mp_context=context) as pool:
+            shared_results = list(pool.map(_touch_shared, [shared.manifest] * args.workers))
+
+    with ProcessPoolExecutor(args.workers, mp_context=context) as pool:
+        copied_results = list(pool.map(_touch_copy, [X] * args.workers))
+
+    assert len({round(c, 1) for _, c in shared_results + copied_results}) == 1
+    shared_mb = sum(mb for mb, _ in shared_results)
+    copied_mb = sum(mb for mb, _ in copied_results)
+    print(f"📦 Dataset {X.nbytes / 2 ** 20:.0f} MB, {args.workers} workers, backend {args.backend} "
+          f"(publish {publish_s * 1e3:.0f} ms)")
+    print(f"   shared:  {shared_mb:8.1f} MB private memory across workers")
+    print(f"   pickled: {copied_mb:8.1f} MB private memory across workers")
+
+
+if __name__ == '__main__':
+    main()
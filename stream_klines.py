@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+LIVE KLINE STREAM INGESTION - Binance websocket
+Subscribes to many symbols × intervals over ONE multiplexed connection and
+appends only CLOSED candles to the local store (data/candles/*.csv)
+"""
+
+import os
+import csv
+import json
+import asyncio
+import argparse
+import logging
+from collections import deque
+
+import websockets
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Configurație
+BINANCE_WS_URL = 'wss://stream.binance.com:9443'
+STORE_DIR = 'data/candles'
+MAX_STREAMS_PER_CONNECTION = 1024  # Limită Binance pentru combined streams
+QUEUE_SIZE = 10000  # Candles în așteptare înainte ca reader-ul să fie blocat
+WRITE_BATCH = 500  # Candles scrise într-un singur append
+CANDLE_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+DEFAULT_SYMBOLS = ['BTCUSDT', 'ETHUSDT', 'BNBUSDT', 'SOLUSDT', 'TRUMPUSDT', 'WLFIUSDT']
+DEFAULT_INTERVALS = ['5m', '15m', '1h']
+
+
+def build_stream_url(base_url, symbols, intervals):
+    """URL pentru combined stream: /stream?streams=btcusdt@kline_5m/ethusdt@kline_5m/..."""
+    streams = [f"{s.lower()}@kline_{i}" for s in symbols for i in intervals]
+
+    if len(streams) > MAX_STREAMS_PER_CONNECTION:
+        raise ValueError(f"{len(streams)} streams > {MAX_STREAMS_PER_CONNECTION} per connection")
+
+    return f"{base_url.rstrip('/')}/stream?streams={'/'.join(streams)}"
+
+
+def parse_kline_message(raw):
+    """
+    Parse a combined-stream kline message.
+    Returns (symbol, interval, candle) for a CLOSED candle, None otherwise.
+    """
+    msg = json.loads(raw)
+    data = msg.get('data', msg)  # Acceptă și mesaje raw (single stream)
+
+    if data.get('e') != 'kline':
+        return None
+
+    k = data['k']
+    if not k.get('x'):  # Candle încă deschis - ignorăm update-urile intermediare
+        return None
+
+    candle = (
+        int(k['t']),
+        float(k['o']),
+        float(k['h']),
+        float(k['l']),
+        float(k['c']),
+        float(k['v']),
+    )
+    return k['s'].upper(), k['i'], candle
+
+
+class CandleStore:
+    """
+    Append-only local store: one CSV per (symbol, interval)
+    Same columns as download_data.download_binance_data (timestamp in ms)
+    """
+
+    def __init__(self, root=STORE_DIR, tail_size=300):
+        self.root = root
+        self.tail_size = tail_size
+        self._last_ts = {}
+        self._tails = {}
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, symbol, interval):
+        return os.path.join(self.root, f"{symbol}_{interval}.csv")
+
+    def _load_tail(self, symbol, interval):
+        key = (symbol, interval)
+        if key in self._tails:
+            return self._tails[key]
+
+        tail = deque(maxlen=self.tail_size)
+        path = self.path(symbol, interval)
+        if os.path.exists(path):
+            with open(path, newline='') as f:
+                reader = csv.reader(f)
+                next(reader, None)  # header
+                for row in reader:
+                    tail.append((int(row[0]), *map(float, row[1:6])))
+
+        self._tails[key] = tail
+        self._last_ts[key] = tail[-1][0] if tail else -1
+        return tail
+
+    def append(self, symbol, interval, candles):
+        """Append closed candles, skipping duplicates/out-of-order (e.g. after reconnect)"""
+        key = (symbol, interval)
+        tail = self._load_tail(symbol, interval)
+        last_ts = self._last_ts[key]
+
+        fresh = []
+        for c in candles:
+            if c[0] > last_ts:
+                fresh.append(c)
+                last_ts = c[0]
+
+        if not fresh:
+            return 0
+
+        path = self.path(symbol, interval)
+        is_new = not os.path.exists(path)
+        with open(path, 'a', newline='') as f:
+            writer = csv.writer(f)
+            if is_new:
+                writer.writerow(CANDLE_COLUMNS)
+            writer.writerows(fresh)
+
+        tail.extend(fresh)
+        self._last_ts[key] = last_ts
+        return len(fresh)
+
+    def tail(self, symbol, interval):
+        """Last `tail_size` candles as a DataFrame (for downstream feature updates)"""
+        import pandas as pd
+
+        return pd.DataFrame(list(self._load_tail(symbol, interval)), columns=CANDLE_COLUMNS)
+
+
+def make_feature_updater(store, out_dir='data/features', sequence_length=60):
+    """
+    Downstream hook: recompute the 76 features on the store tail and save the
+    latest (60, 76) window to data/features/{symbol}_{interval}.npy
+    """
+    import numpy as np
+    from download_data import calculate_features
+
+    os.makedirs(out_dir, exist_ok=True)
+
+    def on_candles(symbol, interval, count):
+        df = store.tail(symbol, interval)
+        if len(df) < sequence_length:
+            return
+
+        features = calculate_features(df)
+        window = features.values[-sequence_length:].astype(np.float32)
+        np.save(os.path.join(out_dir, f"{symbol}_{interval}.npy"), window)
+
+    return on_candles
+
+
+class KlineStreamIngestor:
+    """
+    One websocket connection → bounded queue → batched store writer
+
+    Backpressure: reader-ul face `await queue.put()`; când writer-ul rămâne în urmă
+    coada se umple, reader-ul se oprește din citit și TCP flow control
+    încetinește serverul. Niciun candle închis nu este aruncat.
+    """
+
+    def __init__(self, symbols, intervals, store=None, url=BINANCE_WS_URL,
+                 queue_size=QUEUE_SIZE, on_candles=None):
+        self.url = build_stream_url(url, symbols, intervals)
+        self.store = store or CandleStore()
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.on_candles = list(on_candles or [])
+        self.stats = {'received': 0, 'closed': 0, 'written': 0, 'reconnects': 0, 'max_queue_depth': 0}
+        self._stopped = asyncio.Event()
+
+    def stop(self):
+        self._stopped.set()
+
+    async def _reader(self):
+        backoff = 1
+        while not self._stopped.is_set():
+            try:
+                async with websockets.connect(self.url, ping_interval=20, max_queue=1024) as ws:
+                    logger.info(f"Connected: {self.url[:120]}...")
+                    backoff = 1
+                    async for raw in ws:
+                        self.stats['received'] += 1
+                        parsed = parse_kline_message(raw)
+                        if parsed is None:
+                            continue
+
+                        self.stats['closed'] += 1
+                        await self.queue.put(parsed)
+                        self.stats['max_queue_depth'] = max(self.stats['max_queue_depth'], self.queue.qsize())
+
+                        if self._stopped.is_set():
+                            return
+            except (OSError, websockets.WebSocketException) as e:
+                logger.warning(f"Stream disconnected: {e}")
+
+            if self._stopped.is_set():
+                return
+
+            # Reconnect cu exponential backoff (max 60s)
+            self.stats['reconnects'] += 1
+            try:
+                await asyncio.wait_for(self._stopped.wait(), timeout=backoff)
+            except asyncio.TimeoutError:
+                pass
+            backoff = min(backoff * 2, 60)
+
+    async def _writer(self):
+        loop = asyncio.get_running_loop()
+
+        while True:
+            item = await self.queue.get()
+            if item is None:
+                return
+
+            # Drain tot ce e deja în coadă → un singur append per (symbol, interval)
+            batch = [item]
+            done = False
+            while len(batch) < WRITE_BATCH and not self.queue.empty():
+                nxt = self.queue.get_nowait()
+                if nxt is None:
+                    done = True
+                    break
+                batch.append(nxt)
+
+            grouped = {}
+            for symbol, interval, candle in batch:
+                grouped.setdefault((symbol, interval), []).append(candle)
+
+            for (symbol, interval), candles in grouped.items():
+                written = await loop.run_in_executor(None, self.store.append, symbol, interval, candles)
+                self.stats['written'] += written
+
+                if written:
+                    for callback in self.on_candles:
+                        try:
+                            await loop.run_in_executor(None, callback, symbol, interval, written)
+                        except Exception as e:
+                            logger.warning(f"Feature update failed for {symbol} {interval}: {e}")
+
+            if done:
+                return
+
+    async def run(self):
+        writer = asyncio.create_task(self._writer())
+        try:
+            await self._reader()
+        finally:
+            await self.queue.put(None)
+            await writer
+            logger.info(f"Ingestion stopped: {self.stats}")
+
+
+async def serve_fake_stream(messages, host='127.0.0.1', port=8765, delay=0.0):
+    """
+    Local websocket stand-in for testing: sends `messages` (kline dicts in
+    combined-stream format) to every client, then closes the connection.
+    """
+
+    async def handler(ws, *args):
+        for msg in messages:
+            await ws.send(json.dumps(msg))
+            if delay:
+                await asyncio.sleep(delay)
+
+    return await websockets.serve(handler, host, port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Live Binance kline ingestion')
+    parser.add_argument('--symbols', default=','.join(DEFAULT_SYMBOLS))
+    parser.add_argument('--intervals', default=','.join(DEFAULT_INTERVALS))
+    parser.add_argument('--url', default=BINANCE_WS_URL, help='Websocket base URL (ws://127.0.0.1:8765 for a local stand-in)')
+    parser.add_argument('--store', default=STORE_DIR)
+    parser.add_argument('--queue-size', type=int, default=QUEUE_SIZE)
+    parser.add_argument('--no-features', action='store_true', help='Only store candles, skip feature updates')
+    args = parser.parse_args()
+
+    symbols = [s.strip().upper() for s in args.symbols.split(',') if s.strip()]
+    intervals = [i.strip() for i in args.intervals.split(',') if i.strip()]
+
+    store = CandleStore(args.store)
+    callbacks = [] if args.no_features else [make_feature_updater(store)]
+
+    ingestor = KlineStreamIngestor(symbols, intervals, store=store, url=args.url,
+                                   queue_size=args.queue_size, on_candles=callbacks)
+
+    logger.info(f"📡 Streaming {len(symbols)} symbols × {len(intervals)} intervals")
+    try:
+        asyncio.run(ingestor.run())
+    except KeyboardInterrupt:
+        logger.info("Stopped by user")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+TFLITE EXPORT - modele multi-output cu nume → index tensor din semnătură
+TFLiteConverter.from_keras_model păstrează numele output-urilor doar în tf.keras 2
+(un wrapper cu scaler baked dă model_1…); Keras 3 le redenumește output_0..N în
+ordinea output-urilor Keras. Conversia pune câte un strat identitate cu numele dorit
+pe fiecare head → semnătura are fie numele, fie output_k în ordinea lor, niciodată
+altceva; maparea nu compară valori (head-uri aproape identice după cuantizare)
+"""
+
+import tensorflow as tf
+from tensorflow import keras
+from tensorflow.keras import layers
+
+
+def convert_multi_output(model, names, optimize=True):
+    """
+    model: Keras cu un singur input și len(names) output-uri
+    names: numele output-urilor în ordinea în care model(x) le întoarce
+    → bytes .tflite; semnătura conține names (tf.keras 2) sau output_0..N (Keras 3)
+    """
+    inputs = layers.Input(shape=model.input_shape[1:], name='input')
+    outputs = model(inputs)
+    if isinstance(outputs, dict):
+        outputs = [outputs[name] for name in names]
+    elif not isinstance(outputs, (list, tuple)):
+        outputs = [outputs]
+    named = keras.Model(inputs, [layers.Activation('linear', name=name)(o) for name, o in zip(names, outputs)])
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(named)
+    if optimize:
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS]
+    return converter.convert()
+
+
+def output_index_map(tflite_model, names):
+    """
+    Nume output → index tensor în modelul TFLite (ordinea tensorilor nu e garantată)
+    Semnătura are numele (tf.keras 2) sau output_0..N (Keras 3) → output_k = al k-lea
+    output Keras; altfel eroare, nu ghicim
+    """
+    details = tf.lite.Interpreter(model_content=tflite_model).get_signature_runner().get_output_details()
+    if all(name in details for name in names):
+        return {name: int(details[name]['index']) for name in names}
+
+    positional = [f'output_{k}' for k in range(len(names))]
+    if sorted(details) == sorted(positional):
+        return {name: int(details[key]['index']) for name, key in zip(names, positional)}
+
+    raise ValueError(f"TFLite signature outputs {sorted(details)} match neither {names} "
+                     f"nor output_0..output_{len(names) - 1}")
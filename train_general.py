@@ -12,11 +12,20 @@ import tensorflow as tf
 from tensorflow import keras
 from tensorflow.keras import layers
 import ccxt
-from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
 from datetime import datetime
 import joblib
 import logging
+import argparse
+
+from scaler_fit import StreamingScaler, bake_scaler_into_model
+from feature_buffer import FeatureBuffer
+from profiling import stage
+import distributed
+import augmentation
+from feature_analysis import load_feature_set, apply_feature_set
+from training_metrics import ThroughputCallback, metrics_path_for
+from onnx_export import export_onnx, onnx_path_for, check_dependencies as check_onnx_dependencies
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -61,13 +70,14 @@ def fetch_multi_coin_data(timeframe='15m', limit_per_coin=1500):
     
     return combined_df
 
-def build_76_features_normalized(df):
+def build_76_features_normalized(df, dtype=np.float32):
     """
     Build 76 features cu normalizare pentru general model
     Features sunt mai generice și normalizate pentru a funcționa pe orice crypto
+    dtype: buffer-ul (n, 76) e alocat direct în dtype-ul de training
     """
     
-    features = pd.DataFrame(index=df.index)
+    features = FeatureBuffer(len(df), NUM_FEATURES, dtype=dtype)
     
     # Folosim prețuri normalizate pentru features
     closes = df['close'].values
@@ -111,14 +121,16 @@ def build_76_features_normalized(df):
     features['obv_normalized'] = obv / (obv.abs().mean() + 1e-10)
     
     # 5. RSI pe diferite perioade (46-50)
+    rsi = {}
     for period in [7, 14, 21, 28]:
         delta = df['close'].diff()
         gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
         loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
         rs = gain / (loss + 1e-10)
-        features[f'rsi_{period}'] = 100 - (100 / (1 + rs))
+        rsi[period] = 100 - (100 / (1 + rs))
+        features[f'rsi_{period}'] = rsi[period]
         
-    features['rsi_oversold'] = (features['rsi_14'] < 30).astype(float)
+    features['rsi_oversold'] = (rsi[14] < 30).astype(float)
     
     # 6. Pattern detection (51-65)
     # Higher highs/lows
@@ -144,8 +156,9 @@ def build_76_features_normalized(df):
         features[f'distance_from_high_{period}'] = (df['high'].rolling(period).max() - closes) / closes
         features[f'distance_from_low_{period}'] = (closes - df['low'].rolling(period).min()) / closes
     
-    features['pivot_point'] = (highs + lows + closes) / 3
-    features['pivot_ratio'] = closes / (features['pivot_point'] + 1e-10)
+    pivot_point = (highs + lows + closes) / 3
+    features['pivot_point'] = pivot_point
+    features['pivot_ratio'] = closes / (pivot_point + 1e-10)
     
     # 8. Fill remaining to get exactly 76 (71-75)
     # Market microstructure
@@ -155,25 +168,14 @@ def build_76_features_normalized(df):
     features['price_position'] = (closes - lows) / (highs - lows + 1e-10)
     features['volume_price_trend'] = (df['volume'] * df['close'].pct_change()).cumsum() / 1e6
     
-    # Ensure exactly 76 features
-    features = features.fillna(0)
-    features = features.replace([np.inf, -np.inf], 0)
-    
-    # Select first 76 columns
-    if len(features.columns) > 76:
-        features = features.iloc[:, :76]
-    elif len(features.columns) < 76:
-        # Add dummy features if needed
-        for i in range(len(features.columns), 76):
-            features[f'feature_{i}'] = 0
-    
+    # Exactly 76 features: NaN/inf → 0 la scriere, coloanele peste 76 ignorate, lipsă = 0
     return features.values
 
-def create_general_model():
-    """Model optimizat pentru general trading"""
+def create_general_model(num_features=NUM_FEATURES):
+    """Model optimizat pentru general trading (num_features < 76 → feature set redus)"""
     
     model = keras.Sequential([
-        layers.Input(shape=(SEQUENCE_LENGTH, NUM_FEATURES)),
+        layers.Input(shape=(SEQUENCE_LENGTH, num_features)),
         
         # Feature extraction layers
         layers.Conv1D(128, 3, padding='same'),
@@ -207,23 +209,24 @@ def create_general_model():
     
     return model
 
-def train_general_model(timeframe='15m'):
-    """Antrenează model general pe date combinate"""
-    
-    logger.info(f"\n{'='*60}")
-    logger.info(f"Training GENERAL model for {timeframe}")
-    logger.info(f"{'='*60}")
+def prepare_general_dataset(timeframe='15m'):
+    """
+    Fetch + features + ferestre + normalizare + split
+    Returnează dict cu X_train/X_test/y_train/y_test (normalizate) și scaler-ul, sau None
+    """
     
     # 1. Fetch multi-coin data
-    combined_df = fetch_multi_coin_data(timeframe, limit_per_coin=1000)
+    with stage('fetch', timeframe=timeframe):
+        combined_df = fetch_multi_coin_data(timeframe, limit_per_coin=1000)
     
     if combined_df is None or len(combined_df) < 1000:
         logger.error("Not enough combined data")
         return None
     
     # 2. Process each coin's data
-    all_X = []
+    coin_features = []
     all_y = []
+    scaler = StreamingScaler(NUM_FEATURES)
     
     for coin in combined_df['coin'].unique():
         coin_data = combined_df[combined_df['coin'] == coin].copy()
@@ -233,29 +236,43 @@ def train_general_model(timeframe='15m'):
             continue
         
         # Build features
-        features = build_76_features_normalized(coin_data)
+        with stage('features', coin=coin, timeframe=timeframe):
+            features = build_76_features_normalized(coin_data)
         
         if features is None or len(features) < 100:
             continue
         
-        # Create labels using percentile-based approach for PERFECT 33/33/33 distribution
-        returns = coin_data['close'].pct_change(3).shift(-3)
+        with stage('windowing', coin=coin, timeframe=timeframe):
+            # Create labels using percentile-based approach for PERFECT 33/33/33 distribution
+            returns = coin_data['close'].pct_change(3).shift(-3)
 
-        # Calculate percentiles (bottom 33% = SELL, top 33% = BUY, middle = HOLD)
-        sell_threshold = np.nanpercentile(returns, 33)
-        buy_threshold = np.nanpercentile(returns, 67)
+            # Calculate percentiles (bottom 33% = SELL, top 33% = BUY, middle = HOLD)
+            sell_threshold = np.nanpercentile(returns, 33)
+            buy_threshold = np.nanpercentile(returns, 67)
 
-        labels = np.ones(len(returns))  # Default HOLD
-        labels[returns < sell_threshold] = 0  # SELL (bottom 33%)
-        labels[returns > buy_threshold] = 2   # BUY (top 33%)
+            labels = np.ones(len(returns))  # Default HOLD
+            labels[returns < sell_threshold] = 0  # SELL (bottom 33%)
+            labels[returns > buy_threshold] = 2   # BUY (top 33%)
         
-        # Create sequences
-        for i in range(SEQUENCE_LENGTH, len(features) - 3):
-            all_X.append(features[i-SEQUENCE_LENGTH:i])
-            all_y.append(labels[i])
-    
-    X = np.array(all_X, dtype=np.float32)
-    y = np.array(all_y, dtype=np.int32)
+            # Sequences: window [i-60, i) → label of candle i, i in [60, len - 3)
+            coin_features.append(features)
+            all_y.append(labels[SEQUENCE_LENGTH:len(features) - 3])
+
+        # Scaler stats on the unique rows covered by the windows (each candle once)
+        with stage('scaler_fit', coin=coin, timeframe=timeframe):
+            scaler.partial_fit(features[:len(features) - 4])
+    
+    # Windows copied once, straight into the float32 training array
+    with stage('windowing_concat', timeframe=timeframe):
+        y = np.concatenate(all_y).astype(np.int32)
+        X = np.empty((len(y), SEQUENCE_LENGTH, NUM_FEATURES), dtype=np.float32)
+        offset = 0
+        for features in coin_features:
+            num_windows = len(features) - 3 - SEQUENCE_LENGTH
+            windows = np.lib.stride_tricks.sliding_window_view(features, SEQUENCE_LENGTH, axis=0)
+            X[offset:offset + num_windows] = windows[:num_windows].transpose(0, 2, 1)
+            offset += num_windows
+        del coin_features
 
     logger.info(f"Total sequences: {len(X)} from {len(combined_df['coin'].unique())} coins")
 
@@ -268,14 +285,54 @@ def train_general_model(timeframe='15m'):
         logger.info(f"  Class {cls}: {pct:.1f}%")
 
     # 3. Normalize globally
-    scaler = StandardScaler()
-    X_reshaped = X.reshape(-1, NUM_FEATURES)
-    X_scaled = scaler.fit_transform(X_reshaped)
-    X = X_scaled.reshape(-1, SEQUENCE_LENGTH, NUM_FEATURES)
+    with stage('scaler_transform', timeframe=timeframe):
+        X = scaler.transform(X)
     
     # 4. Train/test split
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
+    return {'X_train': X_train, 'X_test': X_test, 'y_train': y_train, 'y_test': y_test, 'scaler': scaler}
+
+def train_general_model(timeframe='15m', bake_scaler=False, strategy=None, augment=False, feature_set=None,
+                        onnx=False):
+    """
+    Antrenează model general pe date combinate
+    bake_scaler: include mean/std în graful TFLite (modelul primește features brute)
+    strategy: MultiWorkerMirroredStrategy (distributed.get_strategy()) - fiecare worker
+              antrenează pe shard-ul lui, doar chief-ul exportă
+    augment: augmentare on-the-fly per batch (augmentation.py) - slice/warp, scaling, jitter, mixup
+    feature_set: feature set redus (feature_analysis.py) - model, scaler și metadata pe coloanele păstrate
+    onnx: export ONNX lângă TFLite (scoring batch pe server, onnx_export.py)
+    """
+    
+    logger.info(f"\n{'='*60}")
+    logger.info(f"Training GENERAL model for {timeframe}")
+    logger.info(f"{'='*60}")
+
+    strategy = strategy or tf.distribute.get_strategy()
+    multi_worker = distributed.is_distributed()
+
+    # Chief-ul construiește dataset-ul o dată, ceilalți workeri îl citesc din cache
+    if multi_worker:
+        data = distributed.share_dataset(f'general_{timeframe}', lambda: prepare_general_dataset(timeframe))
+    else:
+        data = prepare_general_dataset(timeframe)
+
+    if data is None:
+        return None
+
+    X_train, X_test, y_train, y_test = data['X_train'], data['X_test'], data['y_train'], data['y_test']
+    scaler = data.get('scaler')
+
+    feature_indices = None
+    if feature_set:
+        feature_indices = feature_set['feature_indices']
+        X_train = apply_feature_set(X_train, feature_indices)
+        X_test = apply_feature_set(X_test, feature_indices)
+        scaler = scaler.select(feature_indices) if scaler is not None else None
+        logger.info(f"✂️  Feature set: {len(feature_indices)}/{NUM_FEATURES} features")
+    num_features = X_train.shape[2]
+
     # Compute class weights to handle imbalance
     from sklearn.utils.class_weight import compute_class_weight
     class_weights_array = compute_class_weight('balanced', classes=np.unique(y_train), y=y_train)
@@ -286,16 +343,17 @@ def train_general_model(timeframe='15m'):
     y_train_cat = keras.utils.to_categorical(y_train, NUM_CLASSES)
     y_test_cat = keras.utils.to_categorical(y_test, NUM_CLASSES)
     
-    # 5. Build and train model
-    model = create_general_model()
+    # 5. Build and train model (variabilele create în scope → replicate + all-reduce pe gradienți)
+    with strategy.scope():
+        model = create_general_model(num_features)
 
-    # CALIBRATION FIX: Label smoothing to prevent 100% confidence predictions
-    # Transforms hard labels [0,1] -> soft labels [0.05, 0.95]
-    model.compile(
-        optimizer=keras.optimizers.Adam(learning_rate=0.001),
-        loss=keras.losses.CategoricalCrossentropy(label_smoothing=0.1),
-        metrics=['accuracy']
-    )
+        # CALIBRATION FIX: Label smoothing to prevent 100% confidence predictions
+        # Transforms hard labels [0,1] -> soft labels [0.05, 0.95]
+        model.compile(
+            optimizer=keras.optimizers.Adam(learning_rate=0.001),
+            loss=keras.losses.CategoricalCrossentropy(label_smoothing=0.1),
+            metrics=['accuracy']
+        )
     
     # Callbacks - reduced patience to prevent overfitting
     callbacks = [
@@ -312,27 +370,58 @@ def train_general_model(timeframe='15m'):
         )
     ]
 
+    # Throughput / step time (batch global 64; probe de compute doar single-worker)
+    throughput = ThroughputCallback(batch_size=64, probe_batch=None if multi_worker else (X_train[:64], y_train_cat[:64]))
+    callbacks.append(throughput)
+
+    # Multi-worker: tf.data pe shard-ul worker-ului, 64 = batch-ul GLOBAL
+    if multi_worker:
+        train_data = distributed.make_dataset(X_train, y_train_cat, 64, shuffle=True)
+        val_data = distributed.make_dataset(X_test, y_test_cat, 64)
+    else:
+        train_data = None
+        val_data = (X_test, y_test_cat)
+
+    # Augmentare per batch, în pipeline-ul tf.data (doar pe train)
+    if augment:
+        train_data = (augmentation.augment_dataset(train_data) if multi_worker
+                      else augmentation.make_dataset(X_train, y_train_cat, 64))
+
+    if train_data is not None:
+        fit_inputs = {'x': train_data, 'validation_data': val_data}
+    else:
+        fit_inputs = {'x': X_train, 'y': y_train_cat, 'validation_data': val_data, 'batch_size': 64}
+
     # Train with class weights
-    history = model.fit(
-        X_train, y_train_cat,
-        validation_data=(X_test, y_test_cat),
-        epochs=100,
-        batch_size=64,
-        class_weight=class_weights,
-        callbacks=callbacks,
-        verbose=1
-    )
-    
-    # 6. Evaluate
-    test_loss, test_acc = model.evaluate(X_test, y_test_cat, verbose=0)
+    with stage('fit', timeframe=timeframe):
+        history = model.fit(
+            **fit_inputs,
+            epochs=100,
+            class_weight=class_weights,
+            callbacks=callbacks,
+            verbose=1 if distributed.is_chief() else 0
+        )
+    
+    # 6. Evaluate (colectiv - toți workerii trebuie să participe)
+    with stage('validate', timeframe=timeframe):
+        if multi_worker:
+            test_loss, test_acc = model.evaluate(val_data, verbose=0)
+        else:
+            test_loss, test_acc = model.evaluate(X_test, y_test_cat, verbose=0)
     logger.info(f"Test Accuracy: {test_acc:.2%}")
+
+    # Doar chief-ul scrie artefactele
+    if not distributed.is_chief():
+        return None
     
     # 7. Convert to TFLite
-    converter = tf.lite.TFLiteConverter.from_keras_model(model)
-    converter.optimizations = [tf.lite.Optimize.DEFAULT]
-    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS]
+    with stage('convert', timeframe=timeframe):
+        export_model = bake_scaler_into_model(model, scaler.mean_, scaler.scale_) if bake_scaler else model
+        converter = tf.lite.TFLiteConverter.from_keras_model(export_model)
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS]
     
-    tflite_model = converter.convert()
+        tflite_model = converter.convert()
     
     # 8. Save
     os.makedirs('assets/ml', exist_ok=True)
@@ -341,19 +430,16 @@ def train_general_model(timeframe='15m'):
     tflite_path = f'assets/ml/general_{timeframe}.tflite'
     with open(tflite_path, 'wb') as f:
         f.write(tflite_model)
+
+    onnx_info = export_onnx(export_model, onnx_path_for(tflite_path), X_test[:64]) if onnx else None
     
     # Save scaler in JSON format (for Flutter)
-    scaler_json = {
-        'mean': scaler.mean_.tolist(),
-        'std': scaler.scale_.tolist(),
-    }
     scaler_json_path = f'assets/ml/general_{timeframe}_scaler.json'
-    with open(scaler_json_path, 'w') as f:
-        json.dump(scaler_json, f, indent=2)
+    scaler.save_json(scaler_json_path)
 
     # Also save .pkl for Python compatibility
     scaler_pkl_path = f'assets/ml/general_{timeframe}_scaler.pkl'
-    joblib.dump(scaler, scaler_pkl_path)
+    joblib.dump(scaler.to_standard_scaler(), scaler_pkl_path)
 
     # Save metadata
     metadata = {
@@ -364,16 +450,21 @@ def train_general_model(timeframe='15m'):
         'train_samples': len(X_train),
         'test_samples': len(X_test),
         'model_size_kb': len(tflite_model) / 1024,
-        'num_features': NUM_FEATURES,  # Required by Flutter CryptoMLService
+        'num_features': num_features,  # Required by Flutter CryptoMLService
+        'feature_indices': feature_indices,  # Coloanele din cele 76 (None = toate)
         'num_classes': NUM_CLASSES,
         'calibration': 'label_smoothing_0.1',  # Model calibration to prevent overconfident predictions
         'scaler_path': f'general_{timeframe}_scaler.json',  # Path to scaler JSON
+        'input_normalization': 'baked' if bake_scaler else 'scaler_json',  # 'baked' = raw features input
+        'augmentation': augmentation.AUGMENT_DEFAULTS if augment else None,
+        'onnx': onnx_info,
         'date': datetime.now().isoformat()
     }
     
     metadata_path = f'assets/ml/general_{timeframe}_metadata.json'
     with open(metadata_path, 'w') as f:
         json.dump(metadata, f, indent=2)
+    throughput.save(metrics_path_for(metadata_path))
     
     logger.info(f"✅ General model saved: {tflite_path}")
     logger.info(f"📊 Size: {metadata['model_size_kb']:.1f} KB")
@@ -381,14 +472,33 @@ def train_general_model(timeframe='15m'):
     
     return metadata
 
-def main():
+def main(argv=None):
     """Antrenează toate modelele generale"""
-    
+
+    parser = argparse.ArgumentParser(description='Train general models')
+    parser.add_argument('--bake-scaler', action='store_true',
+                        help='Fold scaler mean/std into the TFLite graph (raw features input)')
+    parser.add_argument('--augment', action='store_true',
+                        help='On-the-fly batch augmentation (slice/warp, scaling, jitter, cross-coin mixup)')
+    parser.add_argument('--feature-set',
+                        help='Reduced feature set JSON from feature_analysis.py ({timeframe} placeholder allowed)')
+    parser.add_argument('--onnx', action='store_true',
+                        help='Also export ONNX next to the TFLite model (requires tf2onnx, onnxruntime)')
+    distributed.add_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.onnx:
+        check_onnx_dependencies()
+
+    # Strategia se creează înainte de orice op TF
+    strategy = distributed.strategy_from_args(args)
+
     results = []
     
     for timeframe in TIMEFRAMES:
         try:
-            metadata = train_general_model(timeframe)
+            feature_set = load_feature_set(args.feature_set.format(timeframe=timeframe)) if args.feature_set else None
+            metadata = train_general_model(timeframe, bake_scaler=args.bake_scaler, strategy=strategy,
+                                           augment=args.augment, feature_set=feature_set, onnx=args.onnx)
             if metadata:
                 results.append(metadata)
         except Exception as e:
@@ -405,5 +515,7 @@ def main():
         for r in results:
             logger.info(f"  - general_{r['timeframe']}.tflite: {r['test_accuracy']:.2%} accuracy")
 
+    return results
+
 if __name__ == '__main__':
     main()
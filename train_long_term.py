@@ -6,18 +6,25 @@ Predicții simple: UP sau DOWN (2 clase în loc de 3)
 
 import os
 import json
+import argparse
 import numpy as np
 import pandas as pd
 import tensorflow as tf
 from tensorflow import keras
 from tensorflow.keras import layers
 import ccxt
-from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
 from datetime import datetime
 import joblib
 import logging
 
+from scaler_fit import StreamingScaler, bake_scaler_into_model
+from feature_buffer import FeatureBuffer
+from profiling import stage
+from training_metrics import ThroughputCallback, metrics_path_for
+from tflite_export import convert_multi_output, output_index_map
+from onnx_export import export_onnx, onnx_path_for, check_dependencies as check_onnx_dependencies
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -29,6 +36,7 @@ NUM_CLASSES = 2  # Doar UP sau DOWN pentru trend pe termen lung
 # Monede diverse pentru training
 TRAINING_COINS = ['BTC', 'ETH', 'BNB', 'SOL', 'ADA', 'XRP', 'MATIC', 'DOT', 'AVAX', 'LINK']
 TIMEFRAMES = {'1d': '1d', '7d': '1d'}  # Folosim daily candles pentru ambele
+HORIZONS = [1, 3, 7, 14]  # Orizonturi (zile) calculate într-o singură trecere
 
 def fetch_long_term_data(timeframe='1d', limit_per_coin=365):
     """Fetch date pentru perioade lungi (1d/7d predictions)"""
@@ -59,13 +67,14 @@ def fetch_long_term_data(timeframe='1d', limit_per_coin=365):
 
     return combined_df
 
-def build_76_features_for_daily(df):
+def build_76_features_for_daily(df, dtype=np.float32):
     """
     Build 76 features pentru date daily
     Adaptate pentru timeframe mai lung
+    dtype: buffer-ul (n, 76) e alocat direct în dtype-ul de training
     """
 
-    features = pd.DataFrame(index=df.index)
+    features = FeatureBuffer(len(df), NUM_FEATURES, dtype=dtype)
 
     closes = df['close'].values
     opens = df['open'].values
@@ -116,8 +125,9 @@ def build_76_features_for_daily(df):
     # Accumulation/Distribution
     money_flow_mult = ((closes - lows) - (highs - closes)) / (highs - lows + 1e-10)
     money_flow_vol = money_flow_mult * volumes
-    features['ad_line'] = money_flow_vol.cumsum() / 1e9
-    features['ad_slope'] = features['ad_line'].pct_change(10)
+    ad_line = pd.Series(money_flow_vol.cumsum() / 1e9, index=df.index)
+    features['ad_line'] = ad_line
+    features['ad_slope'] = ad_line.pct_change(10)
 
     # 6. Market structure (56-65)
     # Higher timeframe trends
@@ -155,23 +165,14 @@ def build_76_features_for_daily(df):
     # Fill remaining features to get exactly 76
     features['spread'] = (highs - lows) / closes
 
-    # Ensure exactly 76 features
-    features = features.fillna(0)
-    features = features.replace([np.inf, -np.inf], 0)
-
-    if len(features.columns) > 76:
-        features = features.iloc[:, :76]
-    elif len(features.columns) < 76:
-        for i in range(len(features.columns), 76):
-            features[f'feature_{i}'] = 0
-
+    # Exactly 76 features: NaN/inf → 0 la scriere, coloanele peste 76 ignorate, lipsă = 0
     return features.values
 
-def create_trend_model():
+def create_trend_model(num_features=NUM_FEATURES):
     """Model pentru trend prediction (UP/DOWN) cu calibrare corectă"""
 
     model = keras.Sequential([
-        layers.Input(shape=(SEQUENCE_LENGTH, NUM_FEATURES)),
+        layers.Input(shape=(SEQUENCE_LENGTH, num_features)),
 
         # Procesare temporală
         layers.Conv1D(64, 5, padding='same'),  # Kernel mai mare pentru patterns pe termen lung
@@ -203,29 +204,72 @@ def create_trend_model():
 
     return model
 
-def train_daily_weekly_model(prediction_days=1):
-    """
-    Antrenează model pentru predicții pe 1 zi sau 7 zile
-    prediction_days: 1 pentru daily, 7 pentru weekly
-    """
+def create_multi_head_trend_model(horizons=HORIZONS, num_features=NUM_FEATURES):
+    """Un singur trunchi comun + câte un head UP/DOWN pentru fiecare orizont"""
 
-    model_name = '1d' if prediction_days == 1 else '7d'
+    inputs = layers.Input(shape=(SEQUENCE_LENGTH, num_features))
 
-    logger.info(f"\n{'='*60}")
-    logger.info(f"Training GENERAL {model_name} trend model")
-    logger.info(f"Prediction horizon: {prediction_days} days")
-    logger.info(f"{'='*60}")
+    x = layers.Conv1D(64, 5, padding='same')(inputs)
+    x = layers.BatchNormalization()(x)
+    x = layers.Activation('relu')(x)
+    x = layers.MaxPooling1D(2)(x)
+
+    x = layers.Conv1D(32, 5, padding='same')(x)
+    x = layers.BatchNormalization()(x)
+    x = layers.Activation('relu')(x)
+    x = layers.MaxPooling1D(2)(x)
 
-    # 1. Fetch data
-    combined_df = fetch_long_term_data('1d', limit_per_coin=500)
+    x = layers.Conv1D(16, 3, padding='same')(x)
+    x = layers.BatchNormalization()(x)
+    x = layers.Activation('relu')(x)
+
+    x = layers.GlobalAveragePooling1D()(x)
+    x = layers.Dense(64, activation='relu')(x)
+    x = layers.Dropout(0.3)(x)
+
+    outputs = []
+    for h in horizons:
+        head = layers.Dense(32, activation='relu', name=f'trend_{h}d_dense')(x)
+        head = layers.Dropout(0.2)(head)
+        outputs.append(layers.Dense(2, activation='softmax', name=f'trend_{h}d')(head))
+
+    return keras.Model(inputs=inputs, outputs=outputs)
+
+def masked_trend_loss(label_smoothing=0.1):
+    """
+    CCE per head; y_true = (0, 0) → label indisponibil (-1) → contribuție 0
+    Înlocuiește sample_weight per head (dict-ul nu e acceptat de Keras 3 pe modele multi-output)
+    """
+    def loss(y_true, y_pred):
+        mask = tf.reduce_sum(y_true, axis=-1)
+        return keras.losses.categorical_crossentropy(y_true, y_pred, label_smoothing=label_smoothing) * mask
+    return loss
+
+def masked_accuracy(y_true, y_pred):
+    """Accuracy doar pe label-urile disponibile"""
+    mask = tf.reduce_sum(y_true, axis=-1)
+    hits = tf.cast(tf.equal(tf.argmax(y_true, axis=-1), tf.argmax(y_pred, axis=-1)), mask.dtype) * mask
+    return tf.reduce_sum(hits) / tf.maximum(tf.reduce_sum(mask), 1.0)
+
+def build_multi_horizon_dataset(combined_df=None, horizons=HORIZONS):
+    """
+    Features, ferestre și scaler calculate O SINGURĂ DATĂ pentru toate orizonturile
+    Returnează dict cu:
+      X: (n, 60, 76) scalat, Y: (n, len(horizons)) cu 0=DOWN, 1=UP, -1 = label indisponibil
+    """
+    horizons = sorted(horizons)
+
+    if combined_df is None:
+        with stage('fetch', timeframe='1d'):
+            combined_df = fetch_long_term_data('1d', limit_per_coin=500)
 
     if combined_df is None or len(combined_df) < 1000:
         logger.error("Not enough data")
         return None
 
-    # 2. Process each coin
-    all_X = []
-    all_y = []
+    coin_features = []
+    all_Y = []
+    scaler = StreamingScaler(NUM_FEATURES)
 
     for coin in combined_df['coin'].unique():
         coin_data = combined_df[combined_df['coin'] == coin].copy()
@@ -234,37 +278,91 @@ def train_daily_weekly_model(prediction_days=1):
         if len(coin_data) < 100:
             continue
 
-        # Build features
-        features = build_76_features_for_daily(coin_data)
+        with stage('features', coin=coin, timeframe='1d'):
+            features = build_76_features_for_daily(coin_data)
 
         if features is None or len(features) < 100:
             continue
 
-        # Create labels pentru trend pe N zile
-        future_returns = coin_data['close'].pct_change(prediction_days).shift(-prediction_days)
+        closes = coin_data['close'].values
+        n = len(features)
 
-        # Binary labels: 0 = DOWN, 1 = UP
-        labels = (future_returns > 0).astype(int)
+        # Ferestre până la cel mai scurt orizont; orizonturile mai lungi sunt mascate cu -1
+        last = n - horizons[0]
+        if last <= SEQUENCE_LENGTH:
+            continue
 
-        # Create sequences
-        for i in range(SEQUENCE_LENGTH, len(features) - prediction_days):
-            if not np.isnan(labels.iloc[i]):
-                all_X.append(features[i-SEQUENCE_LENGTH:i])
-                all_y.append(labels.iloc[i])
+        with stage('windowing', coin=coin, timeframe='1d'):
+            Y = np.full((last - SEQUENCE_LENGTH, len(horizons)), -1, dtype=np.int32)
+            for k, h in enumerate(horizons):
+                # future return pe h zile de la candle-ul i: close[i+h] / close[i] - 1
+                future_returns = closes[h:] / closes[:-h] - 1
+                valid = min(last, n - h) - SEQUENCE_LENGTH
+                if valid > 0:
+                    Y[:valid, k] = (future_returns[SEQUENCE_LENGTH:SEQUENCE_LENGTH + valid] > 0).astype(np.int32)
+
+        # Window [i-60, i) for i in [60, last) - materialized once, after all coins
+        coin_features.append(features[:last - 1])
+        all_Y.append(Y)
+
+        # Scaler stats on the unique rows covered by the windows (each day once)
+        with stage('scaler_fit', coin=coin, timeframe='1d'):
+            scaler.partial_fit(features[:last - 1])
+
+    Y = np.concatenate(all_Y)
+    with stage('windowing_concat', timeframe='1d'):
+        X = np.empty((len(Y), SEQUENCE_LENGTH, NUM_FEATURES), dtype=np.float32)
+        offset = 0
+        for features in coin_features:
+            windows = np.lib.stride_tricks.sliding_window_view(features, SEQUENCE_LENGTH, axis=0)
+            X[offset:offset + len(windows)] = windows.transpose(0, 2, 1)
+            offset += len(windows)
+        del coin_features
+
+    logger.info(f"Total sequences: {len(X)} for horizons {horizons}")
+
+    # Normalize o singură dată
+    with stage('scaler_transform', timeframe='1d'):
+        X = scaler.transform(X)
+
+    return {'X': X, 'Y': Y, 'horizons': horizons, 'scaler': scaler}
+
+def save_scaler(scaler, model_name):
+    """Scaler JSON (Flutter) + .pkl (Python)"""
+    scaler.save_json(f'assets/ml/general_{model_name}_scaler.json')
+    joblib.dump(scaler.to_standard_scaler(), f'assets/ml/general_{model_name}_scaler.pkl')
+
+def train_daily_weekly_model(prediction_days=1, dataset=None, bake_scaler=False, onnx=False):
+    """
+    Antrenează model pentru predicții pe N zile (1 = daily, 7 = weekly)
+    dataset: rezultatul build_multi_horizon_dataset - refolosit între orizonturi
+    bake_scaler: include mean/std în graful TFLite (modelul primește features brute)
+    onnx: export ONNX lângă TFLite (scoring batch pe server, onnx_export.py)
+    """
+
+    model_name = f'{prediction_days}d'
+
+    logger.info(f"\n{'='*60}")
+    logger.info(f"Training GENERAL {model_name} trend model")
+    logger.info(f"Prediction horizon: {prediction_days} days")
+    logger.info(f"{'='*60}")
 
-    X = np.array(all_X, dtype=np.float32)
-    y = np.array(all_y, dtype=np.int32)
+    # 1-3. Features, ferestre și scaler (refolosite dacă dataset-ul e dat)
+    if dataset is None or prediction_days not in dataset['horizons']:
+        dataset = build_multi_horizon_dataset(horizons=[prediction_days])
+        if dataset is None:
+            return None
+
+    k = dataset['horizons'].index(prediction_days)
+    mask = dataset['Y'][:, k] >= 0
+    X = dataset['X'][mask]
+    y = dataset['Y'][mask, k]
+    scaler = dataset['scaler']
 
     logger.info(f"Total sequences: {len(X)}")
     logger.info(f"UP labels: {(y==1).sum()} ({(y==1).mean():.1%})")
     logger.info(f"DOWN labels: {(y==0).sum()} ({(y==0).mean():.1%})")
 
-    # 3. Normalize
-    scaler = StandardScaler()
-    X_reshaped = X.reshape(-1, NUM_FEATURES)
-    X_scaled = scaler.fit_transform(X_reshaped)
-    X = X_scaled.reshape(-1, SEQUENCE_LENGTH, NUM_FEATURES)
-
     # 4. Split data
     X_train, X_test, y_train, y_test = train_test_split(
         X, y, test_size=0.2, random_state=42, stratify=y
@@ -305,22 +403,26 @@ def train_daily_weekly_model(prediction_days=1):
             min_lr=1e-7
         )
     ]
-
-    history = model.fit(
-        X_train, y_train_cat,
-        validation_data=(X_test, y_test_cat),
-        epochs=100,
-        batch_size=32,
-        class_weight=class_weight,
-        callbacks=callbacks,
-        verbose=1
-    )
+    throughput = ThroughputCallback(batch_size=32, probe_batch=(X_train[:32], y_train_cat[:32]))
+    callbacks.append(throughput)
+
+    with stage('fit', timeframe=model_name):
+        history = model.fit(
+            X_train, y_train_cat,
+            validation_data=(X_test, y_test_cat),
+            epochs=100,
+            batch_size=32,
+            class_weight=class_weight,
+            callbacks=callbacks,
+            verbose=1
+        )
 
     # 6. Evaluate
-    test_loss, test_acc = model.evaluate(X_test, y_test_cat, verbose=0)
+    with stage('validate', timeframe=model_name):
+        test_loss, test_acc = model.evaluate(X_test, y_test_cat, verbose=0)
 
-    # Confusion matrix pentru debugging
-    predictions = model.predict(X_test)
+        # Confusion matrix pentru debugging
+        predictions = model.predict(X_test)
     pred_classes = np.argmax(predictions, axis=1)
 
     from sklearn.metrics import confusion_matrix, classification_report
@@ -332,11 +434,13 @@ def train_daily_weekly_model(prediction_days=1):
     logger.info(f"  UP predicted: {cm[1,1]} correct, {cm[1,0]} wrong")
 
     # 7. Convert to TFLite
-    converter = tf.lite.TFLiteConverter.from_keras_model(model)
-    converter.optimizations = [tf.lite.Optimize.DEFAULT]
-    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS]
+    with stage('convert', timeframe=model_name):
+        export_model = bake_scaler_into_model(model, scaler.mean_, scaler.scale_) if bake_scaler else model
+        converter = tf.lite.TFLiteConverter.from_keras_model(export_model)
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS]
 
-    tflite_model = converter.convert()
+        tflite_model = converter.convert()
 
     # 8. Save
     os.makedirs('assets/ml', exist_ok=True)
@@ -345,18 +449,10 @@ def train_daily_weekly_model(prediction_days=1):
     with open(tflite_path, 'wb') as f:
         f.write(tflite_model)
 
-    # Save scaler in JSON format (for Flutter)
-    scaler_json = {
-        'mean': scaler.mean_.tolist(),
-        'std': scaler.scale_.tolist(),
-    }
-    scaler_json_path = f'assets/ml/general_{model_name}_scaler.json'
-    with open(scaler_json_path, 'w') as f:
-        json.dump(scaler_json, f, indent=2)
+    onnx_info = export_onnx(export_model, onnx_path_for(tflite_path), X_test[:64]) if onnx else None
 
-    # Also save .pkl for Python compatibility
-    scaler_pkl_path = f'assets/ml/general_{model_name}_scaler.pkl'
-    joblib.dump(scaler, scaler_pkl_path)
+    # Save scaler (JSON for Flutter, .pkl for Python)
+    save_scaler(scaler, model_name)
 
     metadata = {
         'type': 'GENERAL_TREND',
@@ -372,12 +468,15 @@ def train_daily_weekly_model(prediction_days=1):
         'num_classes': 2,  # Binary: DOWN (0) vs UP (1)
         'calibration': 'label_smoothing_0.1',  # Label smoothing for probability calibration
         'scaler_path': f'general_{model_name}_scaler.json',  # Path to scaler JSON
+        'input_normalization': 'baked' if bake_scaler else 'scaler_json',  # 'baked' = raw features input
+        'onnx': onnx_info,
         'date': datetime.now().isoformat()
     }
 
     metadata_path = f'assets/ml/general_{model_name}_metadata.json'
     with open(metadata_path, 'w') as f:
         json.dump(metadata, f, indent=2)
+    throughput.save(metrics_path_for(metadata_path))
 
     logger.info(f"\n✅ Model saved: {tflite_path}")
     logger.info(f"📊 Size: {metadata['model_size_kb']:.1f} KB")
@@ -385,20 +484,152 @@ def train_daily_weekly_model(prediction_days=1):
 
     return metadata
 
-def main():
-    """Train both 1d and 7d models"""
+def train_multi_horizon_model(dataset, bake_scaler=False, onnx=False):
+    """
+    Un singur model multi-head antrenat pe toate orizonturile simultan
+    Label-urile indisponibile (-1) devin (0, 0) → masca din masked_trend_loss le ignoră
+    """
+
+    horizons = dataset['horizons']
+    model_name = 'trend_multi'
+
+    logger.info(f"\n{'='*60}")
+    logger.info(f"Training GENERAL multi-head trend model for horizons {horizons}")
+    logger.info(f"{'='*60}")
+
+    X, Y = dataset['X'], dataset['Y']
+    idx_train, idx_test = train_test_split(np.arange(len(X)), test_size=0.2, random_state=42)
+
+    def targets(idx):
+        return {f'trend_{h}d': keras.utils.to_categorical(np.maximum(Y[idx, k], 0), 2) * (Y[idx, k, None] >= 0)
+                for k, h in enumerate(horizons)}
+
+    y_train = targets(idx_train)
+    y_test = targets(idx_test)
+
+    model = create_multi_head_trend_model(horizons)
+    model.compile(
+        optimizer=keras.optimizers.Adam(learning_rate=0.0005),
+        loss={name: masked_trend_loss(label_smoothing=0.1) for name in y_train},
+        metrics={name: [masked_accuracy] for name in y_train}
+    )
+
+    callbacks = [
+        keras.callbacks.EarlyStopping(monitor='val_loss', patience=25, restore_best_weights=True),
+        keras.callbacks.ReduceLROnPlateau(monitor='val_loss', factor=0.5, patience=10, min_lr=1e-7)
+    ]
+    throughput = ThroughputCallback(
+        batch_size=32, probe_batch=(X[idx_train[:32]], {name: y[:32] for name, y in y_train.items()})
+    )
+    callbacks.append(throughput)
+
+    with stage('fit', timeframe=model_name):
+        model.fit(
+            X[idx_train], y_train,
+            validation_data=(X[idx_test], y_test),
+            epochs=100,
+            batch_size=32,
+            callbacks=callbacks,
+            verbose=1
+        )
+
+    # Accuracy per orizont, doar pe label-urile disponibile
+    with stage('validate', timeframe=model_name):
+        predictions = model.predict(X[idx_test], verbose=0)
+    if len(horizons) == 1:
+        predictions = [predictions]
+
+    accuracies = {}
+    for k, h in enumerate(horizons):
+        valid = Y[idx_test, k] >= 0
+        pred = np.argmax(predictions[k][valid], axis=1)
+        accuracies[f'{h}d'] = float((pred == Y[idx_test, k][valid]).mean())
+        logger.info(f"  {h}d accuracy: {accuracies[f'{h}d']:.2%}")
+
+    scaler = dataset['scaler']
+    with stage('convert', timeframe=model_name):
+        export_model = bake_scaler_into_model(model, scaler.mean_, scaler.scale_) if bake_scaler else model
+        # Nume explicite în semnătură; ordinea tensorilor nu e ordinea orizonturilor → nume → index
+        # (înainte de orice scriere: o nepotrivire nu lasă artefacte pe jumătate)
+        output_names = [f'trend_{h}d' for h in horizons]
+        tflite_model = convert_multi_output(export_model, output_names)
+        outputs = output_index_map(tflite_model, output_names)
+
+    os.makedirs('assets/ml', exist_ok=True)
+
+    tflite_path = f'assets/ml/general_{model_name}.tflite'
+    with open(tflite_path, 'wb') as f:
+        f.write(tflite_model)
+
+    onnx_info = export_onnx(export_model, onnx_path_for(tflite_path), X[idx_test[:64]]) if onnx else None
+
+    save_scaler(dataset['scaler'], model_name)
+
+    metadata = {
+        'type': 'GENERAL_TREND_MULTI',
+        'horizons': [f'{h}d' for h in horizons],
+        'outputs': outputs,  # trend_{h}d → index tensor TFLite, un output (DOWN, UP) per orizont
+        'timeframe': model_name,
+        'trained_on': TRAINING_COINS,
+        'test_accuracy': float(np.mean(list(accuracies.values()))),
+        'test_accuracy_per_horizon': accuracies,
+        'train_samples': len(idx_train),
+        'test_samples': len(idx_test),
+        'model_size_kb': len(tflite_model) / 1024,
+        'num_features': NUM_FEATURES,
+        'num_classes': 2,
+        'calibration': 'label_smoothing_0.1',
+        'scaler_path': f'general_{model_name}_scaler.json',
+        'input_normalization': 'baked' if bake_scaler else 'scaler_json',
+        'onnx': onnx_info,
+        'date': datetime.now().isoformat()
+    }
+
+    metadata_path = f'assets/ml/general_{model_name}_metadata.json'
+    with open(metadata_path, 'w') as f:
+        json.dump(metadata, f, indent=2)
+    throughput.save(metrics_path_for(metadata_path))
+
+    logger.info(f"\n✅ Model saved: {tflite_path}")
+    logger.info(f"📊 Size: {metadata['model_size_kb']:.1f} KB")
+
+    return metadata
+
+def main(argv=None):
+    """Train 1d and 7d models (features/windows/scaler built once)"""
+
+    parser = argparse.ArgumentParser(description='Train long-term trend models')
+    parser.add_argument('--horizons', default='1,7',
+                        help='Comma-separated horizons in days, e.g. 1,3,7,14')
+    parser.add_argument('--multi-head', action='store_true',
+                        help='Also train one multi-head model on all horizons')
+    parser.add_argument('--bake-scaler', action='store_true',
+                        help='Fold scaler mean/std into the TFLite graph (raw features input)')
+    parser.add_argument('--onnx', action='store_true',
+                        help='Also export ONNX next to the TFLite models (requires tf2onnx, onnxruntime)')
+    args = parser.parse_args(argv)
+    if args.onnx:
+        check_onnx_dependencies()
+
+    horizons = [int(h) for h in args.horizons.split(',') if h.strip()]
+
+    # Fetch, features, ferestre și scaler - O SINGURĂ DATĂ pentru toate orizonturile
+    dataset = build_multi_horizon_dataset(horizons=horizons)
+    if dataset is None:
+        return []
 
     results = []
 
-    # Train 1-day prediction model
-    metadata_1d = train_daily_weekly_model(prediction_days=1)
-    if metadata_1d:
-        results.append(metadata_1d)
+    for prediction_days in horizons:
+        metadata = train_daily_weekly_model(prediction_days=prediction_days, dataset=dataset,
+                                            bake_scaler=args.bake_scaler, onnx=args.onnx)
+        if metadata:
+            results.append(metadata)
 
-    # Train 7-day prediction model
-    metadata_7d = train_daily_weekly_model(prediction_days=7)
-    if metadata_7d:
-        results.append(metadata_7d)
+    if args.multi_head:
+        metadata = train_multi_horizon_model(dataset, bake_scaler=args.bake_scaler, onnx=args.onnx)
+        if metadata:
+            results.append(metadata)
 
     # Summary
     if results:
@@ -408,7 +639,10 @@ def main():
 
         for r in results:
             logger.info(f"  - general_{r['timeframe']}.tflite: {r['test_accuracy']:.2%} accuracy")
-            logger.info(f"    Predicts: {r['prediction_horizon']} trend (UP/DOWN)")
+            if 'prediction_horizon' in r:
+                logger.info(f"    Predicts: {r['prediction_horizon']} trend (UP/DOWN)")
+
+    return results
 
 if __name__ == '__main__':
     main()
@@ -8,15 +8,32 @@ import tensorflow as tf
 import numpy as np
 import sys
 import os
+import json
+import shutil
+import argparse
+
+from profiling import stage
+from feature_analysis import load_feature_set, apply_feature_set
+from training_metrics import ThroughputCallback, metrics_path_for
+from onnx_export import export_onnx, onnx_path_for, check_dependencies as check_onnx_dependencies
 
 # Verifică versiunea TensorFlow
 print(f"🔧 TensorFlow version: {tf.__version__}")
 
-def build_model():
-    """Model CNN 2D - EXACT arhitectura ta"""
+COINS = ['btc', 'eth', 'bnb', 'sol', 'trump', 'wlfi']
+TIMEFRAMES = ['5m', '15m', '1h']
+DATA_PATH = '/workspace/data'
+OUTPUT_PATH = '/workspace/output'
+
+# ID-uri fixe (ordinea din COINS) - aceleași în app indiferent ce monede au date
+COIN_IDS = {coin: i for i, coin in enumerate(COINS)}
+COIN_EMBEDDING_DIM = 8
+
+def build_model(num_features=76):
+    """Model CNN 2D - EXACT arhitectura ta (num_features < 76 → feature set redus)"""
     model = tf.keras.Sequential([
-        tf.keras.layers.Input(shape=(60, 76)),
-        tf.keras.layers.Reshape((60, 76, 1)),
+        tf.keras.layers.Input(shape=(60, num_features)),
+        tf.keras.layers.Reshape((60, num_features, 1)),
 
         # Conv Block 1
         tf.keras.layers.Conv2D(32, (3, 3), activation='relu', padding='same'),
@@ -40,14 +57,58 @@ def build_model():
 
     return model
 
-def train_model(coin, timeframe, X_train, y_train, X_val, y_val):
-    """Antrenează un model pentru o monedă și timeframe"""
+def build_multi_coin_model(num_coins=len(COINS), num_features=76, embed_dim=COIN_EMBEDDING_DIM):
+    """
+    Același trunchi CNN 2D ca build_model + embedding învățat pentru coin ID
+    Inputs: window (60, num_features) float32, coin_id (1,) int32
+    Embedding-ul intră în head-ul dens → o singură rețea pentru toate monedele
+    """
+    window = tf.keras.layers.Input(shape=(60, num_features), name='window')
+    coin_id = tf.keras.layers.Input(shape=(1,), dtype='int32', name='coin_id')
+
+    x = tf.keras.layers.Reshape((60, num_features, 1))(window)
+
+    # Conv Block 1
+    x = tf.keras.layers.Conv2D(32, (3, 3), activation='relu', padding='same')(x)
+    x = tf.keras.layers.MaxPooling2D((2, 2))(x)
+    x = tf.keras.layers.Dropout(0.2)(x)
+
+    # Conv Block 2
+    x = tf.keras.layers.Conv2D(64, (3, 3), activation='relu', padding='same')(x)
+    x = tf.keras.layers.MaxPooling2D((2, 2))(x)
+    x = tf.keras.layers.Dropout(0.3)(x)
+
+    # Conv Block 3
+    x = tf.keras.layers.Conv2D(128, (3, 3), activation='relu', padding='same')(x)
+    x = tf.keras.layers.GlobalAveragePooling2D()(x)
+
+    # Coin embedding
+    embedding = tf.keras.layers.Embedding(num_coins, embed_dim, name='coin_embedding')(coin_id)
+    embedding = tf.keras.layers.Flatten()(embedding)
+    x = tf.keras.layers.Concatenate()([x, embedding])
+
+    # Dense layers
+    x = tf.keras.layers.Dense(64, activation='relu')(x)
+    x = tf.keras.layers.Dropout(0.4)(x)
+    outputs = tf.keras.layers.Dense(3, activation='softmax')(x)  # SELL, HOLD, BUY
+
+    return tf.keras.Model(inputs=[window, coin_id], outputs=outputs, name='multi_coin_model')
+
+def load_coin_data(coin, timeframe, data_path=DATA_PATH):
+    """X_train, y_train, X_val, y_val din {data_path}/{coin}_{timeframe}_*.npy"""
+    return tuple(
+        np.load(f'{data_path}/{coin}_{timeframe}_{part}.npy')
+        for part in ('X_train', 'y_train', 'X_val', 'y_val')
+    )
+
+def train_model(coin, timeframe, X_train, y_train, X_val, y_val, callbacks=()):
+    """Antrenează un model pentru o monedă și timeframe (callbacks = extra, ex. ThroughputCallback)"""
     print(f"\n{'='*60}")
     print(f"🚀 Training {coin} {timeframe}")
     print(f"{'='*60}")
 
-    # Build model
-    model = build_model()
+    # Build model (input = câte features au rămas după feature set)
+    model = build_model(num_features=X_train.shape[2])
     model.compile(
         optimizer='adam',
         loss='categorical_crossentropy',
@@ -65,7 +126,8 @@ def train_model(coin, timeframe, X_train, y_train, X_val, y_val):
         batch_size=32,
         callbacks=[
             tf.keras.callbacks.EarlyStopping(patience=10, restore_best_weights=True),
-            tf.keras.callbacks.ReduceLROnPlateau(factor=0.5, patience=5)
+            tf.keras.callbacks.ReduceLROnPlateau(factor=0.5, patience=5),
+            *callbacks
         ],
         verbose=1
     )
@@ -106,18 +168,146 @@ def convert_to_tflite(model, output_path):
 
     return True
 
-def main():
+def train_multi_coin(timeframe, coins=COINS, data_path=DATA_PATH, output_dir=OUTPUT_PATH, feature_set=None,
+                     onnx=False):
+    """
+    Un model per timeframe pe ferestrele TUTUROR monedelor + coin ID
+    Înlocuiește cele 6 modele {coin}_{timeframe}_model.tflite
+    """
+    print(f"\n{'='*60}")
+    print(f"🚀 Training MULTI-COIN {timeframe}")
+    print(f"{'='*60}")
+
+    parts = {'X_train': [], 'y_train': [], 'id_train': [], 'X_val': [], 'y_val': [], 'id_val': []}
+    samples = {}
+
+    for coin in coins:
+        try:
+            with stage('load', coin=coin, timeframe=timeframe):
+                X_train, y_train, X_val, y_val = load_coin_data(coin, timeframe, data_path)
+        except FileNotFoundError:
+            print(f"⚠️  {coin.upper()} {timeframe}: no data, skipped")
+            continue
+
+        if feature_set:
+            X_train = apply_feature_set(X_train, feature_set)
+            X_val = apply_feature_set(X_val, feature_set)
+
+        for split, X, y in (('train', X_train, y_train), ('val', X_val, y_val)):
+            parts[f'X_{split}'].append(X.astype(np.float32, copy=False))
+            parts[f'y_{split}'].append(y)
+            parts[f'id_{split}'].append(np.full((len(X), 1), COIN_IDS[coin], dtype=np.int32))
+        samples[coin] = {'train': int(len(X_train)), 'val': int(len(X_val))}
+        print(f"📦 {coin.upper()}: {len(X_train)} train / {len(X_val)} val (coin_id {COIN_IDS[coin]})")
+
+    if not samples:
+        raise FileNotFoundError(f"No {timeframe} data in {data_path}")
+
+    X_train, y_train, id_train, X_val, y_val, id_val = (
+        np.concatenate(parts[k]) for k in ('X_train', 'y_train', 'id_train', 'X_val', 'y_val', 'id_val')
+    )
+    del parts
+
+    model = build_multi_coin_model(num_features=X_train.shape[2])
+    model.compile(
+        optimizer='adam',
+        loss='categorical_crossentropy',
+        metrics=['accuracy']
+    )
+
+    print(f"\n📊 Training data shape: {X_train.shape} from {len(samples)} coins")
+
+    throughput = ThroughputCallback(
+        batch_size=64, probe_batch=({'window': X_train[:64], 'coin_id': id_train[:64]}, y_train[:64])
+    )
+
+    # shuffle=True (implicit) → batch-uri amestecate între monede
+    with stage('fit', coin='multi', timeframe=timeframe):
+        model.fit(
+            {'window': X_train, 'coin_id': id_train}, y_train,
+            validation_data=({'window': X_val, 'coin_id': id_val}, y_val),
+            epochs=50,
+            batch_size=64,
+            callbacks=[
+                tf.keras.callbacks.EarlyStopping(patience=10, restore_best_weights=True),
+                tf.keras.callbacks.ReduceLROnPlateau(factor=0.5, patience=5),
+                throughput
+            ],
+            verbose=1
+        )
+
+    val_loss, val_acc = model.evaluate({'window': X_val, 'coin_id': id_val}, y_val, verbose=0)
+    print(f"\n✅ Validation accuracy (all coins): {val_acc:.4f}")
+
+    # Acuratețe per monedă - comparabilă cu vechile modele per-coin
+    probs = model.predict({'window': X_val, 'coin_id': id_val}, batch_size=256, verbose=0)
+    correct = probs.argmax(axis=1) == y_val.argmax(axis=1)
+    per_coin = {coin: float(correct[id_val[:, 0] == COIN_IDS[coin]].mean()) for coin in samples}
+    for coin, acc in per_coin.items():
+        print(f"   {coin.upper():<6} {acc:.4f}")
+
+    output_path = f'{output_dir}/{timeframe}_multi_coin_model.tflite'
+    with stage('convert', coin='multi', timeframe=timeframe):
+        convert_to_tflite(model, output_path)
+    if onnx:
+        export_onnx(model, onnx_path_for(output_path), [X_val[:64], id_val[:64]])
+
+    # Ordinea input-urilor în TFLite nu e garantată → o scriem în metadata
+    interpreter = tf.lite.Interpreter(model_path=output_path)
+    inputs = [
+        {'name': d['name'], 'index': int(d['index']), 'shape': d['shape'].tolist(), 'dtype': d['dtype'].__name__}
+        for d in interpreter.get_input_details()
+    ]
+
+    metadata = {
+        'type': 'MULTI_COIN',
+        'timeframe': timeframe,
+        'coin_ids': COIN_IDS,
+        'trained_on': sorted(samples, key=COIN_IDS.get),
+        'samples': samples,
+        'val_accuracy': float(val_acc),
+        'val_accuracy_per_coin': per_coin,
+        'inputs': inputs,
+        'num_features': int(X_train.shape[2]),
+        'feature_indices': feature_set['feature_indices'] if feature_set else None,
+        'num_classes': 3,
+        'embedding_dim': COIN_EMBEDDING_DIM,
+    }
+    metadata_path = f'{output_dir}/{timeframe}_multi_coin_metadata.json'
+    with open(metadata_path, 'w') as f:
+        json.dump(metadata, f, indent=2)
+    throughput.save(metrics_path_for(metadata_path))
+
+    return metadata
+
+def main(argv=None):
     """Main training loop - ALL 18 models with REAL DATA"""
+    parser = argparse.ArgumentParser(description='Train the per-coin models')
+    parser.add_argument('--feature-set',
+                        help='Reduced feature set JSON from feature_analysis.py; '
+                             '{coin}/{timeframe} placeholders allowed, missing file → all 76 features')
+    parser.add_argument('--multi-coin', action='store_true',
+                        help='One model per timeframe with a coin-ID embedding instead of 18 per-coin models '
+                             '({coin} in --feature-set resolves to "multi")')
+    parser.add_argument('--onnx', action='store_true',
+                        help='Also export ONNX next to each TFLite model (requires tf2onnx, onnxruntime)')
+    args = parser.parse_args(argv)
+    if args.onnx:
+        check_onnx_dependencies()
+
+    if args.multi_coin:
+        return main_multi_coin(args)
+
     print("="*60)
     print("🚀 ML Model Training for iOS - ALL 18 MODELS")
     print(f"   TensorFlow: {tf.__version__}")
     print("="*60)
     print("\n📊 Using REAL data from Binance!\n")
 
-    coins = ['btc', 'eth', 'bnb', 'sol', 'trump', 'wlfi']
-    timeframes = ['5m', '15m', '1h']
+    coins = COINS
+    timeframes = TIMEFRAMES
 
-    os.makedirs('/workspace/output', exist_ok=True)
+    os.makedirs(OUTPUT_PATH, exist_ok=True)
 
     success_count = 0
     fail_count = 0
@@ -130,20 +320,38 @@ def main():
                 print(f"{'='*60}")
 
                 # Load REAL data
-                data_path = '/workspace/data'
-                X_train = np.load(f'{data_path}/{coin}_{timeframe}_X_train.npy')
-                y_train = np.load(f'{data_path}/{coin}_{timeframe}_y_train.npy')
-                X_val = np.load(f'{data_path}/{coin}_{timeframe}_X_val.npy')
-                y_val = np.load(f'{data_path}/{coin}_{timeframe}_y_val.npy')
+                with stage('load', coin=coin, timeframe=timeframe):
+                    X_train, y_train, X_val, y_val = load_coin_data(coin, timeframe)
 
                 print(f"📦 Loaded {len(X_train)} training samples, {len(X_val)} validation samples")
 
-                # Train
-                model, accuracy = train_model(coin, timeframe, X_train, y_train, X_val, y_val)
+                # Feature set redus (feature_analysis.py) → doar coloanele păstrate
+                feature_set_path = args.feature_set.format(coin=coin, timeframe=timeframe) if args.feature_set else None
+                if feature_set_path and os.path.exists(feature_set_path):
+                    feature_set = load_feature_set(feature_set_path)
+                    X_train = apply_feature_set(X_train, feature_set)
+                    X_val = apply_feature_set(X_val, feature_set)
+                    print(f"✂️  Feature set: {feature_set['num_features']}/{feature_set['num_features_in']} features")
+                else:
+                    feature_set_path = None
+
+                # Train (+ throughput / step time → {coin}_{timeframe}_training_metrics.json)
+                throughput = ThroughputCallback(batch_size=32, probe_batch=(X_train[:32], y_train[:32]))
+                with stage('fit', coin=coin, timeframe=timeframe):
+                    model, accuracy = train_model(coin, timeframe, X_train, y_train, X_val, y_val,
+                                                  callbacks=[throughput])
+                throughput.save(f'{OUTPUT_PATH}/{coin}_{timeframe}_training_metrics.json')
 
                 # Convert to TFLite
-                output_path = f'/workspace/output/{coin}_{timeframe}_model.tflite'
-                convert_to_tflite(model, output_path)
+                output_path = f'{OUTPUT_PATH}/{coin}_{timeframe}_model.tflite'
+                with stage('convert', coin=coin, timeframe=timeframe):
+                    convert_to_tflite(model, output_path)
+                if args.onnx:
+                    export_onnx(model, onnx_path_for(output_path), X_val[:64])
+
+                # Clientul trebuie să știe ce coloane să trimită
+                if feature_set_path:
+                    shutil.copy(feature_set_path, f'{OUTPUT_PATH}/{coin}_{timeframe}_feature_set.json')
 
                 print(f"✅ {coin.upper()} {timeframe} COMPLETE! (Val Acc: {accuracy:.4f})\n")
                 success_count += 1
@@ -158,8 +366,29 @@ def main():
     print("="*60)
     print(f"\nSuccessful: {success_count}/18")
     print(f"Failed: {fail_count}/18")
-    print(f"\nModels saved to: /workspace/output/")
+    print(f"\nModels saved to: {OUTPUT_PATH}/")
     print(f"Copy to: assets/ml/\n")
 
+    return {'success': success_count, 'failed': fail_count}
+
+def main_multi_coin(args):
+    """3 modele multi-coin (unul per timeframe) în loc de 18"""
+    os.makedirs(OUTPUT_PATH, exist_ok=True)
+    results = {}
+
+    for timeframe in TIMEFRAMES:
+        feature_set_path = args.feature_set.format(coin='multi', timeframe=timeframe) if args.feature_set else None
+        feature_set = load_feature_set(feature_set_path) if feature_set_path and os.path.exists(feature_set_path) else None
+
+        try:
+            metadata = train_multi_coin(timeframe, feature_set=feature_set, onnx=args.onnx)
+            results[timeframe] = metadata['val_accuracy']
+            print(f"✅ MULTI-COIN {timeframe} COMPLETE! (Val Acc: {metadata['val_accuracy']:.4f})\n")
+        except Exception as e:
+            print(f"❌ MULTI-COIN {timeframe} FAILED: {e}\n")
+
+    print(f"\nModels saved to: {OUTPUT_PATH}/ ({len(results)}/{len(TIMEFRAMES)})")
+    return {'success': len(results), 'failed': len(TIMEFRAMES) - len(results), 'val_accuracy': results}
+
 if __name__ == '__main__':
     main()
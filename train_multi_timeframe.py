@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+FUSED MULTI-TIMEFRAME MODEL - un singur invoke pentru 5m / 15m / 1h
+- Input: ferestre ALINIATE (3, 60, 76) din aceeași monedă - pentru fiecare moment de
+  decizie t (închiderea unei lumânări 5m), ultimele 60 de lumânări ÎNCHISE din fiecare timeframe
+- Features: o singură trecere build_76_features_normalized per (monedă, timeframe),
+  ferestrele sunt doar indexate din matricea de features (fără recalcul per fereastră)
+- Output: câte un head SELL/HOLD/BUY per orizont (următoarele 3 lumânări ale fiecărui timeframe)
+- Trunchi Conv1D comun pe cele 3 timeframe-uri (TimeDistributed), head-uri separate
+
+    python train_multi_timeframe.py [--bake-scaler]
+"""
+
+import os
+import json
+import argparse
+import logging
+from datetime import datetime
+
+import numpy as np
+from tensorflow import keras
+from tensorflow.keras import layers
+from sklearn.model_selection import train_test_split
+
+from scaler_fit import StreamingScaler
+from profiling import stage
+from tflite_export import convert_multi_output, output_index_map
+from training_metrics import ThroughputCallback, metrics_path_for
+from train_general import (
+    fetch_multi_coin_data, build_76_features_normalized,
+    SEQUENCE_LENGTH, NUM_FEATURES, NUM_CLASSES, TRAINING_COINS,
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TIMEFRAMES = ['5m', '15m', '1h']
+TIMEFRAME_MS = {'5m': 300_000, '15m': 900_000, '1h': 3_600_000}
+# Binance: max 1500 lumânări per request; 1h × 1000 acoperă ferestrele 1h pentru tot istoricul 5m
+LIMITS = {'5m': 1500, '15m': 1500, '1h': 1000}
+HORIZON_CANDLES = 3  # Fiecare head: mișcarea pe următoarele 3 lumânări ale timeframe-ului lui
+OUTPUT_NAME = 'general_mtf'
+
+
+def fetch_timeframes(limits=LIMITS):
+    """{timeframe: combined_df} cu fetcher-ul existent din train_general"""
+    fetched = {}
+    for timeframe in TIMEFRAMES:
+        with stage('fetch', timeframe=timeframe):
+            fetched[timeframe] = fetch_multi_coin_data(timeframe, limit_per_coin=limits[timeframe])
+    return fetched
+
+
+def align_windows(close_times, decision_times, sequence_length=SEQUENCE_LENGTH):
+    """
+    Indicele ultimei lumânări ÎNCHISE (close_time <= t) pentru fiecare moment de decizie t
+    Returnează (end_idx, valid) - valid = există o fereastră completă de sequence_length lumânări
+    """
+    end_idx = np.searchsorted(close_times, decision_times, side='right') - 1
+    return end_idx, end_idx >= sequence_length - 1
+
+
+def _percentile_labels(returns):
+    """Ca în train_general: bottom 33% = SELL, top 33% = BUY, restul HOLD"""
+    sell_threshold = np.nanpercentile(returns, 33)
+    buy_threshold = np.nanpercentile(returns, 67)
+    labels = np.ones(len(returns), dtype=np.int32)
+    labels[returns < sell_threshold] = 0
+    labels[returns > buy_threshold] = 2
+    return labels
+
+
+def build_coin_dataset(frames, scalers=None):
+    """
+    frames: {timeframe: df OHLCV al unei monede}
+    Returnează X (n, 3, 60, 76) float32 și {timeframe: labels (n,)}
+    """
+    features, close_times = {}, {}
+    for timeframe in TIMEFRAMES:
+        df = frames[timeframe].sort_values('timestamp').reset_index(drop=True)
+        frames[timeframe] = df
+        features[timeframe] = build_76_features_normalized(df)
+        close_times[timeframe] = df['timestamp'].to_numpy(dtype=np.int64) + TIMEFRAME_MS[timeframe]
+        if scalers is not None:
+            scalers[timeframe].partial_fit(features[timeframe])
+
+    # Momente de decizie: închiderile lumânărilor 5m cu orizontul cel mai lung disponibil
+    base = TIMEFRAMES[0]
+    base_ms = TIMEFRAME_MS[base]
+    closes = frames[base]['close'].to_numpy(dtype=np.float64)
+    steps = {tf_: HORIZON_CANDLES * TIMEFRAME_MS[tf_] // base_ms for tf_ in TIMEFRAMES}
+
+    decision_idx = np.arange(len(closes) - max(steps.values()))
+    decision_times = close_times[base][decision_idx]
+
+    valid = np.ones(len(decision_idx), dtype=bool)
+    ends = {}
+    for timeframe in TIMEFRAMES:
+        ends[timeframe], ok = align_windows(close_times[timeframe], decision_times)
+        valid &= ok
+
+    decision_idx = decision_idx[valid]
+    X = np.empty((len(decision_idx), len(TIMEFRAMES), SEQUENCE_LENGTH, NUM_FEATURES), dtype=np.float32)
+    offsets = np.arange(1 - SEQUENCE_LENGTH, 1)
+    for k, timeframe in enumerate(TIMEFRAMES):
+        X[:, k] = features[timeframe][ends[timeframe][valid][:, None] + offsets]
+
+    labels = {}
+    for timeframe, step in steps.items():
+        returns = closes[decision_idx + step] / closes[decision_idx] - 1.0
+        labels[timeframe] = _percentile_labels(returns)
+
+    return X, labels
+
+
+def build_dataset(fetched):
+    """Toate monedele: X (N, 3, 60, 76), {timeframe: labels}, scalers per timeframe"""
+    scalers = {timeframe: StreamingScaler(NUM_FEATURES) for timeframe in TIMEFRAMES}
+    parts, coins = [], []
+
+    coin_sets = [set(fetched[timeframe]['coin'].unique()) for timeframe in TIMEFRAMES]
+    for coin in [c for c in TRAINING_COINS if all(c in s for s in coin_sets)]:
+        frames = {timeframe: fetched[timeframe][fetched[timeframe]['coin'] == coin] for timeframe in TIMEFRAMES}
+        if any(len(df) < SEQUENCE_LENGTH + 100 for df in frames.values()):
+            continue
+
+        with stage('features_windows', coin=coin):
+            X, labels = build_coin_dataset(frames, scalers)
+        if len(X) == 0:
+            continue
+
+        parts.append((X, labels))
+        coins.append(coin)
+        logger.info(f"{coin}: {len(X)} aligned samples")
+
+    if not parts:
+        return None, None, [], scalers
+
+    with stage('windowing_concat'):
+        X = np.concatenate([p[0] for p in parts])
+        Y = {timeframe: np.concatenate([p[1][timeframe] for p in parts]) for timeframe in TIMEFRAMES}
+    return X, Y, coins, scalers
+
+
+def normalize(X, scalers):
+    """Scaler separat per timeframe (axa 1), in-place pe float32"""
+    for k, timeframe in enumerate(TIMEFRAMES):
+        X[:, k] = scalers[timeframe].transform(X[:, k])
+    return X
+
+
+def create_multi_timeframe_model(num_timeframes=len(TIMEFRAMES), num_features=NUM_FEATURES, horizons=TIMEFRAMES):
+    """Trunchi Conv1D comun (aceleași greutăți pe fiecare timeframe) + head per orizont"""
+    inputs = layers.Input(shape=(num_timeframes, SEQUENCE_LENGTH, num_features), name='windows')
+
+    trunk = keras.Sequential([
+        layers.Input(shape=(SEQUENCE_LENGTH, num_features)),
+        layers.Conv1D(64, 3, padding='same'),
+        layers.BatchNormalization(),
+        layers.Activation('relu'),
+        layers.MaxPooling1D(2),
+        layers.Conv1D(32, 3, padding='same'),
+        layers.BatchNormalization(),
+        layers.Activation('relu'),
+        layers.GlobalAveragePooling1D(),
+    ], name='shared_trunk')
+
+    # (batch, timeframes, 32) → concatenat în ordinea timeframe-urilor
+    x = layers.TimeDistributed(trunk)(inputs)
+    x = layers.Flatten()(x)
+    x = layers.Dense(128, activation='relu')(x)
+    x = layers.Dropout(0.4)(x)
+
+    outputs = []
+    for h in horizons:
+        head = layers.Dense(32, activation='relu', name=f'horizon_{h}_dense')(x)
+        head = layers.Dropout(0.2)(head)
+        outputs.append(layers.Dense(NUM_CLASSES, activation='softmax', name=f'horizon_{h}')(head))
+
+    return keras.Model(inputs=inputs, outputs=outputs, name='multi_timeframe_model')
+
+
+def bake_multi_timeframe_scaler(model, scalers):
+    """(x - mean[tf]) / std[tf] în graf - mean/std de formă (timeframes, features)"""
+    mean = np.stack([scalers[tf_].mean_ for tf_ in TIMEFRAMES]).astype(np.float32)
+    std = np.stack([scalers[tf_].scale_ for tf_ in TIMEFRAMES]).astype(np.float32)
+
+    inputs = layers.Input(shape=model.input_shape[1:], name='raw_windows')
+    x = layers.Normalization(axis=(1, 3), mean=mean, variance=std ** 2, name='baked_scaler')(inputs)
+    return keras.Model(inputs=inputs, outputs=model(x), name=f'{model.name}_baked')
+
+
+def train_multi_timeframe_model(bake_scaler=False, fetched=None, epochs=100, output_dir='assets/ml'):
+    logger.info(f"\n{'='*60}")
+    logger.info(f"Training MULTI-TIMEFRAME model ({' / '.join(TIMEFRAMES)})")
+    logger.info(f"{'='*60}")
+
+    fetched = fetched or fetch_timeframes()
+    X, Y, coins, scalers = build_dataset(fetched)
+    if X is None or len(X) < 1000:
+        logger.error("Not enough aligned samples")
+        return None
+
+    logger.info(f"Total aligned samples: {len(X)} from {len(coins)} coins, input {X.shape[1:]}")
+
+    with stage('scaler_transform'):
+        X = normalize(X, scalers)
+
+    idx_train, idx_test = train_test_split(np.arange(len(X)), test_size=0.2, random_state=42)
+    y_train = {f'horizon_{h}': keras.utils.to_categorical(Y[h][idx_train], NUM_CLASSES) for h in TIMEFRAMES}
+    y_test = {f'horizon_{h}': keras.utils.to_categorical(Y[h][idx_test], NUM_CLASSES) for h in TIMEFRAMES}
+
+    model = create_multi_timeframe_model()
+    model.compile(
+        optimizer=keras.optimizers.Adam(learning_rate=0.001),
+        loss={name: keras.losses.CategoricalCrossentropy(label_smoothing=0.1) for name in y_train},
+        metrics={name: ['accuracy'] for name in y_train}
+    )
+
+    callbacks = [
+        keras.callbacks.EarlyStopping(monitor='val_loss', patience=10, restore_best_weights=True),
+        keras.callbacks.ReduceLROnPlateau(monitor='val_loss', factor=0.5, patience=5, min_lr=1e-6),
+    ]
+    throughput = ThroughputCallback(
+        batch_size=64, probe_batch=(X[idx_train[:64]], {name: y[:64] for name, y in y_train.items()})
+    )
+    callbacks.append(throughput)
+
+    with stage('fit'):
+        model.fit(
+            X[idx_train], y_train,
+            validation_data=(X[idx_test], y_test),
+            epochs=epochs,
+            batch_size=64,
+            callbacks=callbacks,
+            verbose=1
+        )
+
+    with stage('validate'):
+        probs = model.predict(X[idx_test], batch_size=256, verbose=0)
+    accuracy = {
+        h: float((p.argmax(axis=1) == Y[h][idx_test]).mean())
+        for h, p in zip(TIMEFRAMES, probs)
+    }
+    for h, acc in accuracy.items():
+        logger.info(f"🎯 horizon {h} ({HORIZON_CANDLES} candles): {acc:.2%}")
+
+    with stage('convert'):
+        export_model = bake_multi_timeframe_scaler(model, scalers) if bake_scaler else model
+        # Ordinea output-urilor în TFLite nu e garantată → nume explicite în semnătură → index tensor
+        names = [f'horizon_{h}' for h in TIMEFRAMES]
+        tflite_model = convert_multi_output(export_model, names)
+        index_map = output_index_map(tflite_model, names)
+        outputs = {h: index_map[name] for h, name in zip(TIMEFRAMES, names)}
+
+    os.makedirs(output_dir, exist_ok=True)
+    tflite_path = os.path.join(output_dir, f'{OUTPUT_NAME}.tflite')
+    with open(tflite_path, 'wb') as f:
+        f.write(tflite_model)
+
+    scaler_path = os.path.join(output_dir, f'{OUTPUT_NAME}_scaler.json')
+    with open(scaler_path, 'w') as f:
+        json.dump({
+            'timeframes': TIMEFRAMES,
+            'mean': [scalers[h].mean_.tolist() for h in TIMEFRAMES],
+            'std': [scalers[h].scale_.tolist() for h in TIMEFRAMES],
+        }, f)
+
+    metadata = {
+        'type': 'MULTI_TIMEFRAME',
+        'timeframes': TIMEFRAMES,
+        'input_shape': [len(TIMEFRAMES), SEQUENCE_LENGTH, NUM_FEATURES],
+        'alignment': 'last 60 closed candles per timeframe at each 5m close',
+        'horizons': {h: f'{HORIZON_CANDLES} x {h}' for h in TIMEFRAMES},
+        'outputs': outputs,
+        'trained_on': coins,
+        'test_accuracy': accuracy,
+        'train_samples': int(len(idx_train)),
+        'test_samples': int(len(idx_test)),
+        'model_size_kb': len(tflite_model) / 1024,
+        'num_features': NUM_FEATURES,
+        'num_classes': NUM_CLASSES,
+        'calibration': 'label_smoothing_0.1',
+        'scaler_path': f'{OUTPUT_NAME}_scaler.json',
+        'input_normalization': 'baked' if bake_scaler else 'scaler_json',
+        'date': datetime.now().isoformat()
+    }
+    metadata_path = os.path.join(output_dir, f'{OUTPUT_NAME}_metadata.json')
+    with open(metadata_path, 'w') as f:
+        json.dump(metadata, f, indent=2)
+    throughput.save(metrics_path_for(metadata_path))
+
+    logger.info(f"✅ Multi-timeframe model saved: {tflite_path} ({metadata['model_size_kb']:.1f} KB)")
+    return metadata
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Train the fused 5m/15m/1h model')
+    parser.add_argument('--bake-scaler', action='store_true',
+                        help='Fold the per-timeframe mean/std into the TFLite graph (raw features input)')
+    args = parser.parse_args(argv)
+
+    return train_multi_timeframe_model(bake_scaler=args.bake_scaler)
+
+
+if __name__ == '__main__':
+    main()
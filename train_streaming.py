@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+STREAMING TCN - inferență O(1) per lumânare în loc de re-rularea ferestrei de 60
+- Arhitectură: convoluții CAUZALE dilatate (TCN) + head pe ultimul pas; câmpul receptiv
+  (59) încape în fereastra de 60 → ieșirea pe ultimul pas nu depinde de padding
+- Export dublu:
+    general_{tf}_tcn.tflite         - model pe fereastră (60, 76), ca modelele existente
+    general_{tf}_tcn_step.tflite    - un pas: (features (1, 76), state (1, S)) → (probs, new_state)
+- StreamingRunner: referința numpy (batch de simboluri) - state = ultimele (k-1)·d intrări
+  ale fiecărui strat, exact ce ține și modelul step
+
+După RECEPTIVE_FIELD - 1 lumânări de warm-up (sau direct cele 60 din fereastră),
+ieșirea streaming == ieșirea modelului pe fereastră (verificat la export).
+
+    python train_streaming.py --timeframe 5m [--verify-only]
+"""
+
+import os
+import json
+import argparse
+import logging
+from datetime import datetime
+
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
+from tensorflow.keras import layers
+
+from profiling import stage
+from training_metrics import ThroughputCallback, metrics_path_for
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SEQUENCE_LENGTH = 60
+NUM_FEATURES = 76
+NUM_CLASSES = 3
+
+CHANNELS = 32
+KERNEL_SIZE = 3
+# Ultima dilatare 14 (nu 16) → câmp receptiv 1 + 2·(1+2+4+8+14) = 59 ≤ 60
+DILATIONS = (1, 2, 4, 8, 14)
+PARITY_ATOL = 1e-4
+
+
+def receptive_field(kernel_size=KERNEL_SIZE, dilations=DILATIONS):
+    return 1 + (kernel_size - 1) * sum(dilations)
+
+
+def create_tcn_model(num_features=NUM_FEATURES, channels=CHANNELS, kernel_size=KERNEL_SIZE, dilations=DILATIONS):
+    """TCN cauzal pe fereastră: proiecție 1x1 → blocuri reziduale dilatate → head pe ultimul pas"""
+    assert receptive_field(kernel_size, dilations) <= SEQUENCE_LENGTH
+
+    inputs = layers.Input(shape=(SEQUENCE_LENGTH, num_features))
+    x = layers.Conv1D(channels, 1, name='input_proj')(inputs)
+
+    for i, d in enumerate(dilations):
+        y = layers.Conv1D(channels, kernel_size, dilation_rate=d, padding='causal',
+                          activation='relu', name=f'tcn_{i}')(x)
+        y = layers.Dropout(0.1)(y)
+        x = layers.Add()([x, y])
+
+    # Doar ultimul pas → ieșirea depinde de ultimele receptive_field lumânări
+    x = layers.Cropping1D((SEQUENCE_LENGTH - 1, 0))(x)
+    x = layers.Flatten()(x)
+    x = layers.Dense(32, activation='relu', name='head_dense')(x)
+    x = layers.Dropout(0.2)(x)
+    outputs = layers.Dense(NUM_CLASSES, activation='softmax', name='head_out')(x)
+
+    return keras.Model(inputs=inputs, outputs=outputs, name='tcn')
+
+
+def _tcn_weights(model):
+    """Greutățile relevante pentru pasul streaming (numpy float32)"""
+    get = lambda name: [w.astype(np.float32) for w in model.get_layer(name).get_weights()]
+    blocks = []
+    i = 0
+    while True:
+        try:
+            layer = model.get_layer(f'tcn_{i}')
+        except ValueError:
+            break
+        kernel, bias = get(f'tcn_{i}')
+        blocks.append((kernel, bias, int(layer.dilation_rate[0])))
+        i += 1
+
+    proj_w, proj_b = get('input_proj')
+    return {
+        'proj': (proj_w[0], proj_b),  # (1, F, C) → (F, C)
+        'blocks': blocks,             # [(kernel (k, C, C), bias (C,), dilation)]
+        'dense': tuple(get('head_dense')),
+        'out': tuple(get('head_out')),
+    }
+
+
+def state_size(weights):
+    """Lungimea vectorului de state: Σ (k-1)·d·C peste straturile TCN"""
+    return sum((k.shape[0] - 1) * d * k.shape[1] for k, _, d in weights['blocks'])
+
+
+class StreamingRunner:
+    """
+    Referință numpy: o lumânare (features normalizate) per apel, pentru N simboluri odată
+    runner = StreamingRunner.from_keras(model, batch=len(symbols))
+    probs = runner.step(features_t)   # (N, 76) → (N, 3)
+    """
+
+    def __init__(self, weights, batch=1):
+        self.weights = weights
+        self.batch = batch
+        self.reset()
+
+    @classmethod
+    def from_keras(cls, model, batch=1):
+        return cls(_tcn_weights(model), batch)
+
+    def reset(self):
+        """State zero = padding-ul cauzal de la începutul ferestrei"""
+        self.history = [
+            np.zeros((self.batch, (k.shape[0] - 1) * d, k.shape[1]), dtype=np.float32)
+            for k, _, d in self.weights['blocks']
+        ]
+        self.steps = 0
+
+    def step(self, features):
+        w = self.weights
+        h = np.asarray(features, dtype=np.float32).reshape(self.batch, -1) @ w['proj'][0] + w['proj'][1]
+
+        for (kernel, bias, d), hist in zip(w['blocks'], self.history):
+            k = kernel.shape[0]
+            y = h @ kernel[k - 1] + bias
+            for j in range(k - 1):
+                # Tap j = intrarea de acum (k-1-j)·d pași; hist[:, -m] = x[t - m]
+                y += hist[:, -(k - 1 - j) * d] @ kernel[j]
+            # FIFO: cea mai veche intrare iese, intrarea curentă a stratului intră
+            hist[:, :-1] = hist[:, 1:]
+            hist[:, -1] = h
+            h = h + np.maximum(y, 0.0)
+
+        h = np.maximum(h @ w['dense'][0] + w['dense'][1], 0.0)
+        logits = h @ w['out'][0] + w['out'][1]
+        logits -= logits.max(axis=1, keepdims=True)
+        exp = np.exp(logits)
+        self.steps += 1
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def warm_up(self, rows):
+        """rows: (N, T, 76) - ultimele T lumânări (ex. fereastra de 60) → probs după ultima"""
+        self.reset()
+        probs = None
+        for t in range(rows.shape[1]):
+            probs = self.step(rows[:, t])
+        return probs
+
+    @property
+    def state(self):
+        """State plat (N, S) - același layout ca inputul 'state' al modelului step TFLite"""
+        return np.concatenate([h.reshape(self.batch, -1) for h in self.history], axis=1)
+
+
+def build_step_function(weights):
+    """tf.function pentru un pas: (features (B, F), state (B, S)) → (probs (B, 3), new_state (B, S))"""
+    proj_w, proj_b = (tf.constant(a) for a in weights['proj'])
+    blocks = [(tf.constant(k), tf.constant(b), d) for k, b, d in weights['blocks']]
+    dense_w, dense_b = (tf.constant(a) for a in weights['dense'])
+    out_w, out_b = (tf.constant(a) for a in weights['out'])
+    num_features = weights['proj'][0].shape[0]
+    size = state_size(weights)
+
+    @tf.function(input_signature=[
+        tf.TensorSpec([None, num_features], tf.float32, name='features'),
+        tf.TensorSpec([None, size], tf.float32, name='state'),
+    ])
+    def step(features, state):
+        h = tf.matmul(features, proj_w) + proj_b
+        new_states, offset = [], 0
+
+        for kernel, bias, d in blocks:
+            k, channels = kernel.shape[0], kernel.shape[1]
+            length = (k - 1) * d
+            hist = tf.reshape(state[:, offset:offset + length * channels], [-1, length, channels])
+            offset += length * channels
+
+            buffer = tf.concat([hist, h[:, None, :]], axis=1)  # buffer[:, -1] = intrarea curentă
+            y = bias
+            for j in range(k):
+                y = y + tf.matmul(buffer[:, length - (k - 1 - j) * d], kernel[j])
+            new_states.append(tf.reshape(buffer[:, 1:], [-1, length * channels]))
+            h = h + tf.nn.relu(y)
+
+        h = tf.nn.relu(tf.matmul(h, dense_w) + dense_b)
+        probs = tf.nn.softmax(tf.matmul(h, out_w) + out_b)
+        return {'probs': probs, 'new_state': tf.concat(new_states, axis=1)}
+
+    return step
+
+
+def convert_step_model(weights):
+    """Modelul step prin SavedModel → semnătura 'serving_default' cu intrări/ieșiri numite"""
+    import tempfile
+
+    module = tf.Module()
+    module.step = build_step_function(weights)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tf.saved_model.save(module, tmp, signatures={'serving_default': module.step})
+        converter = tf.lite.TFLiteConverter.from_saved_model(tmp)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS]
+        return converter.convert()
+
+
+def verify_streaming(model, step_tflite, rows, atol=PARITY_ATOL):
+    """
+    rows: (N, T, 76), T > 60 - serie continuă de features normalizate
+    Compară la fiecare t >= 59: model(fereastra [t-59, t]) vs runner numpy vs step TFLite
+    """
+    n, T, _ = rows.shape
+    runner = StreamingRunner.from_keras(model, batch=n)
+    runner_tflite = tf.lite.Interpreter(model_content=step_tflite).get_signature_runner()
+    state = np.zeros((n, state_size(runner.weights)), dtype=np.float32)
+
+    ends = np.arange(SEQUENCE_LENGTH - 1, T)
+    windows = np.stack([rows[:, e - SEQUENCE_LENGTH + 1:e + 1] for e in ends], axis=1)
+    windowed = model.predict(windows.reshape(-1, SEQUENCE_LENGTH, rows.shape[2]), verbose=0, batch_size=512)
+    windowed = windowed.reshape(n, len(ends), -1)
+
+    max_numpy, max_tflite = 0.0, 0.0
+    for t in range(T):
+        probs = runner.step(rows[:, t])
+        out = runner_tflite(features=rows[:, t].astype(np.float32), state=state)
+        state = out['new_state']
+        if t >= SEQUENCE_LENGTH - 1:
+            ref = windowed[:, t - SEQUENCE_LENGTH + 1]
+            max_numpy = max(max_numpy, float(np.abs(probs - ref).max()))
+            max_tflite = max(max_tflite, float(np.abs(out['probs'] - ref).max()))
+
+    return {
+        'max_abs_diff_numpy': max_numpy,
+        'max_abs_diff_tflite_step': max_tflite,
+        'steps_compared': int(len(ends)),
+        'ok': max(max_numpy, max_tflite) <= atol,
+    }
+
+
+def train_streaming_model(timeframe='5m', epochs=100, output_dir='assets/ml'):
+    """TCN pe datele general (aceleași ferestre / scaler ca train_general) + export windowed și step"""
+    from train_general import prepare_general_dataset
+
+    logger.info(f"\n{'='*60}")
+    logger.info(f"Training STREAMING TCN for {timeframe} (receptive field {receptive_field()})")
+    logger.info(f"{'='*60}")
+
+    data = prepare_general_dataset(timeframe)
+    if data is None:
+        return None
+    X_train, X_test, y_train, y_test, scaler = (
+        data['X_train'], data['X_test'], data['y_train'], data['y_test'], data['scaler']
+    )
+
+    model = create_tcn_model()
+    model.compile(
+        optimizer=keras.optimizers.Adam(learning_rate=0.001),
+        loss=keras.losses.CategoricalCrossentropy(label_smoothing=0.1),
+        metrics=['accuracy']
+    )
+
+    callbacks = [
+        keras.callbacks.EarlyStopping(monitor='val_loss', patience=10, restore_best_weights=True),
+        keras.callbacks.ReduceLROnPlateau(monitor='val_loss', factor=0.5, patience=5, min_lr=1e-6),
+    ]
+    throughput = ThroughputCallback(
+        batch_size=64, probe_batch=(X_train[:64], keras.utils.to_categorical(y_train[:64], NUM_CLASSES))
+    )
+    callbacks.append(throughput)
+    with stage('fit', timeframe=timeframe):
+        model.fit(
+            X_train, keras.utils.to_categorical(y_train, NUM_CLASSES),
+            validation_data=(X_test, keras.utils.to_categorical(y_test, NUM_CLASSES)),
+            epochs=epochs, batch_size=64, callbacks=callbacks, verbose=1
+        )
+
+    with stage('validate', timeframe=timeframe):
+        _, test_acc = model.evaluate(X_test, keras.utils.to_categorical(y_test, NUM_CLASSES), verbose=0)
+    logger.info(f"🎯 Test Accuracy: {test_acc:.2%}")
+
+    metadata = export_streaming_model(model, scaler, timeframe, output_dir, test_acc=test_acc)
+    if metadata is not None:
+        throughput.save(metrics_path_for(os.path.join(output_dir, f'general_{timeframe}_tcn_metadata.json')))
+    return metadata
+
+
+def export_streaming_model(model, scaler, timeframe, output_dir='assets/ml', test_acc=None, parity_rows=None):
+    """Scrie modelul pe fereastră + modelul step; exportul step se face doar dacă paritatea trece"""
+    name = f'general_{timeframe}_tcn'
+    weights = _tcn_weights(model)
+
+    with stage('convert', timeframe=timeframe):
+        converter = tf.lite.TFLiteConverter.from_keras_model(model)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS]
+        windowed_tflite = converter.convert()
+        step_tflite = convert_step_model(weights)
+
+    # Paritate: serie continuă de 2×60 lumânări (reale dacă sunt date, altfel random normalizat)
+    if parity_rows is None:
+        parity_rows = np.random.default_rng(42).standard_normal((4, 2 * SEQUENCE_LENGTH, NUM_FEATURES))
+    parity = verify_streaming(model, step_tflite, parity_rows.astype(np.float32))
+    logger.info(f"🔁 Streaming parity: numpy {parity['max_abs_diff_numpy']:.2e}, "
+                f"TFLite step {parity['max_abs_diff_tflite_step']:.2e}")
+    if not parity['ok']:
+        logger.error(f"❌ Streaming output differs from the windowed model (> {PARITY_ATOL}), not saved")
+        return None
+
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, f'{name}.tflite'), 'wb') as f:
+        f.write(windowed_tflite)
+    with open(os.path.join(output_dir, f'{name}_step.tflite'), 'wb') as f:
+        f.write(step_tflite)
+    if scaler is not None:
+        scaler.save_json(os.path.join(output_dir, f'{name}_scaler.json'))
+
+    metadata = {
+        'type': 'GENERAL',
+        'architecture': 'TCN_STREAMING',
+        'timeframe': timeframe,
+        'test_accuracy': None if test_acc is None else float(test_acc),
+        'num_features': NUM_FEATURES,
+        'num_classes': NUM_CLASSES,
+        'kernel_size': KERNEL_SIZE,
+        'dilations': list(DILATIONS),
+        'receptive_field': receptive_field(),
+        'warmup_candles': receptive_field() - 1,
+        'state_size': state_size(weights),
+        'step_model': f'{name}_step.tflite',
+        'step_signature': {'inputs': ['features', 'state'], 'outputs': ['probs', 'new_state']},
+        'windowed_model': f'{name}.tflite',
+        'scaler_path': f'{name}_scaler.json',
+        'parity': parity,
+        'date': datetime.now().isoformat()
+    }
+    with open(os.path.join(output_dir, f'{name}_metadata.json'), 'w') as f:
+        json.dump(metadata, f, indent=2)
+
+    logger.info(f"✅ Saved {name}.tflite ({len(windowed_tflite) / 1024:.1f} KB) + "
+                f"{name}_step.tflite ({len(step_tflite) / 1024:.1f} KB), state {metadata['state_size']} floats")
+    return metadata
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Train the streaming (stateful) TCN general model')
+    parser.add_argument('--timeframe', default='5m')
+    parser.add_argument('--epochs', type=int, default=100)
+    parser.add_argument('--verify-only', action='store_true',
+                        help='Untrained TCN: check numpy / TFLite step parity against the windowed model')
+    args = parser.parse_args(argv)
+
+    if args.verify_only:
+        model = create_tcn_model()
+        weights = _tcn_weights(model)
+        rows = np.random.default_rng(0).standard_normal((8, 3 * SEQUENCE_LENGTH, NUM_FEATURES)).astype(np.float32)
+        parity = verify_streaming(model, convert_step_model(weights), rows)
+        print(json.dumps({**parity, 'receptive_field': receptive_field(), 'state_size': state_size(weights)}, indent=2))
+        return parity
+
+    return train_streaming_model(args.timeframe, epochs=args.epochs)
+
+
+if __name__ == '__main__':
+    main()
@@ -7,6 +7,7 @@ Expected accuracy: 55-65% (vs current CNN: 43-56%)
 
 import os
 import json
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 import pandas as pd
 import tensorflow as tf
@@ -14,11 +15,18 @@ from tensorflow import keras
 from tensorflow.keras import layers
 import talib
 import ccxt
-from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
 from datetime import datetime
-import joblib
 import logging
+import argparse
+
+from scaler_fit import StreamingScaler, bake_scaler_into_model
+from feature_buffer import FeatureBuffer
+from profiling import stage
+import distributed
+import augmentation
+from training_metrics import ThroughputCallback, metrics_path_for
+from onnx_export import export_onnx, onnx_path_for, check_dependencies as check_onnx_dependencies
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -27,17 +35,21 @@ logger = logging.getLogger(__name__)
 SEQUENCE_LENGTH = 60
 NUM_FEATURES = 76
 NUM_CLASSES = 3  # SELL, HOLD, BUY
+LABEL_HORIZON = 10  # Candles ahead for the BUY/SELL/HOLD label
+LABEL_THRESHOLD = 0.005  # ±0.5% move
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
 
 # Training coins (diverse portfolio)
 TRAINING_COINS = ['BTC', 'ETH', 'BNB', 'SOL', 'ADA', 'XRP', 'DOT', 'MATIC', 'AVAX', 'LINK']
 
-def build_exact_76_features(df):
+def build_exact_76_features(df, dtype=np.float32):
     """
     EXACT SAME 76 features as coin-specific models
     Uses TALib candle patterns (features 0-24) + technical indicators
+    dtype: the (n, 76) buffer is allocated directly in the training dtype
     """
 
-    features = pd.DataFrame(index=df.index)
+    features = FeatureBuffer(len(df), NUM_FEATURES, dtype=dtype)
 
     opens = df['open'].values
     highs = df['high'].values
@@ -120,8 +132,9 @@ def build_exact_76_features(df):
     # ========== 44-46: ATR (3 features) ==========
     atr = talib.ATR(highs, lows, closes, timeperiod=14)
     features['f44'] = atr  # atr
-    features['f45'] = atr / closes  # atr_pct
-    features['f46'] = (features['f45'] > features['f45'].rolling(20).mean()).astype(float)  # high_atr
+    atr_pct = pd.Series(atr / closes, index=df.index)
+    features['f45'] = atr_pct  # atr_pct
+    features['f46'] = (atr_pct > atr_pct.rolling(20).mean()).astype(float)  # high_atr
 
     # ========== 47-51: ADX (5 features) ==========
     adx = talib.ADX(highs, lows, closes, timeperiod=14)
@@ -157,9 +170,10 @@ def build_exact_76_features(df):
 
     features['f59'] = volumes  # volume
     features['f60'] = vol_sma  # vol_sma
-    features['f61'] = volumes / (vol_sma + 1e-10)  # vol_ratio
+    vol_ratio = volumes / (vol_sma + 1e-10)
+    features['f61'] = vol_ratio  # vol_ratio
     features['f62'] = obv  # obv
-    features['f63'] = (features['f61'] > 1.5).astype(float)  # high_volume
+    features['f63'] = (vol_ratio > 1.5).astype(float)  # high_volume
 
     # ========== 64-72: MOVING AVERAGES (9 features) ==========
     sma20 = talib.SMA(closes, timeperiod=20)
@@ -181,11 +195,10 @@ def build_exact_76_features(df):
     features['f74'] = (lows < pd.Series(lows).shift(1)).astype(float)  # lower_low
     features['f75'] = ((closes > sma20) & (sma20 > sma50)).astype(float)  # uptrend
 
-    # Clean NaN/Inf
-    features = features.replace([np.inf, -np.inf], np.nan).fillna(0)
+    # NaN/Inf already cleaned on write (FeatureBuffer)
 
     # Verify exactly 76 features
-    assert features.shape[1] == 76, f"Expected 76 features, got {features.shape[1]}"
+    assert len(features.columns) == 76, f"Expected 76 features, got {len(features.columns)}"
 
     return features.values
 
@@ -215,6 +228,108 @@ def fetch_multi_coin_data(timeframe='5m', limit_per_coin=1500):
 
     return combined_df
 
+def _build_coin_features_and_labels(ohlcv):
+    """
+    Worker: features + labels for ONE coin (runs in a separate process)
+    ohlcv: (n, 5) array [open, high, low, close, volume] sorted by time
+    """
+    df = pd.DataFrame(ohlcv, columns=OHLCV_COLUMNS)
+    features = build_exact_76_features(df)
+
+    # Labels computed inside the group → the look-ahead never reads another coin
+    future_returns = df['close'].pct_change(LABEL_HORIZON).shift(-LABEL_HORIZON).values
+
+    labels = np.ones(len(df), dtype=np.int32)  # HOLD
+    labels[future_returns > LABEL_THRESHOLD] = 2   # BUY
+    labels[future_returns < -LABEL_THRESHOLD] = 0  # SELL
+
+    return features, labels
+
+def build_grouped_windows(combined_df, max_workers=None, return_groups=False):
+    """
+    Per-coin feature/label engine
+    - Splits combined_df by coin, builds features and labels for each group in a process pool
+    - Returns (X, y) windows that never cross a coin boundary, or None if no coin is long enough
+    - return_groups: also return the coin index of every window (for fit_scaler_on_windows)
+
+    Only the 5 OHLCV columns are extracted once; each worker receives its coin's
+    block of that array, the combined frame itself is never copied.
+    """
+    codes, coin_names = pd.factorize(combined_df['coin'])
+    order = np.lexsort((combined_df['timestamp'].to_numpy(), codes))
+    codes = codes[order]
+    ohlcv = combined_df[OHLCV_COLUMNS].to_numpy(dtype=np.float64)[order]
+
+    # Contiguous [start, end) block per coin after sorting by (coin, timestamp)
+    boundaries = np.flatnonzero(codes[1:] != codes[:-1]) + 1
+    starts = np.concatenate([[0], boundaries])
+    ends = np.concatenate([boundaries, [len(codes)]])
+
+    blocks = [(coin_names[codes[s]], ohlcv[s:e]) for s, e in zip(starts, ends)
+              if e - s > SEQUENCE_LENGTH + LABEL_HORIZON]
+    if not blocks:
+        logger.error(f"No coin has more than {SEQUENCE_LENGTH + LABEL_HORIZON} candles")
+        return None
+
+    if max_workers is None:
+        max_workers = min(len(blocks), os.cpu_count() or 1)
+
+    if max_workers > 1:
+        with stage('features', workers=max_workers, coins=len(blocks)):
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                results = list(pool.map(_build_coin_features_and_labels, [b for _, b in blocks]))
+    else:
+        results = []
+        for coin, block in blocks:
+            with stage('features', coin=coin):
+                results.append(_build_coin_features_and_labels(block))
+
+    all_X = []
+    all_y = []
+    all_groups = []
+
+    for k, ((coin, _), (features, labels)) in enumerate(zip(blocks, results)):
+        # Same windowing as before, but per group:
+        # window [i, i+SEQUENCE_LENGTH) → label of candle i+SEQUENCE_LENGTH
+        with stage('windowing', coin=coin):
+            num_windows = len(features) - SEQUENCE_LENGTH - LABEL_HORIZON
+            windows = np.lib.stride_tricks.sliding_window_view(features, SEQUENCE_LENGTH, axis=0)
+            all_X.append(windows[:num_windows].transpose(0, 2, 1))
+            all_y.append(labels[SEQUENCE_LENGTH:SEQUENCE_LENGTH + num_windows])
+            all_groups.append(np.full(num_windows, k, dtype=np.int32))
+
+        logger.info(f"  {coin}: {num_windows} windows")
+
+    with stage('windowing_concat'):
+        X = np.concatenate(all_X)
+        y = np.concatenate(all_y)
+
+    if return_groups:
+        return X, y, np.concatenate(all_groups)
+    return X, y
+
+def fit_scaler_on_windows(scaler, X, groups, idx):
+    """
+    partial_fit on the unique feature rows covered by windows idx (e.g. the train split only)
+    A coin's windows are consecutive and shifted by one row, so row q of the coin is
+    X[w, q - w] for any of its windows w with w <= q < w + SEQUENCE_LENGTH
+    """
+    idx = np.asarray(idx)
+    for group in np.unique(groups[idx]):
+        windows = np.flatnonzero(groups == group)
+        first, last = windows[0], windows[-1] - windows[0]
+        starts = idx[groups[idx] == group] - first
+
+        # Rows covered by at least one selected window (difference array over row positions)
+        delta = np.zeros(last + SEQUENCE_LENGTH + 1, dtype=np.int32)
+        np.add.at(delta, starts, 1)
+        np.add.at(delta, starts + SEQUENCE_LENGTH, -1)
+        rows = np.flatnonzero(np.cumsum(delta[:-1]) > 0)
+
+        window = np.minimum(rows, last)
+        scaler.partial_fit(X[first + window, rows - window])
+    return scaler
+
 class TransformerBlock(layers.Layer):
     """Transformer block with multi-head attention"""
 
@@ -238,10 +353,11 @@ class TransformerBlock(layers.Layer):
         ffn_output = self.dropout2(ffn_output, training=training)
         return self.layernorm2(out1 + ffn_output)
 
-def create_transformer_model():
+def create_transformer_model(num_features=NUM_FEATURES):
     """
     State-of-the-art Transformer model for crypto prediction
     Uses multi-head attention to capture complex temporal patterns
+    num_features: input width (< 76 with a reduced feature set from feature_analysis.py)
     """
 
     # Hyperparameters
@@ -249,7 +365,7 @@ def create_transformer_model():
     num_heads = 8    # Number of attention heads
     ff_dim = 256     # Feed-forward dimension
 
-    inputs = layers.Input(shape=(SEQUENCE_LENGTH, NUM_FEATURES))
+    inputs = layers.Input(shape=(SEQUENCE_LENGTH, num_features))
 
     # Initial projection to embedding dimension
     x = layers.Dense(embed_dim)(inputs)
@@ -283,12 +399,11 @@ def create_transformer_model():
     model = keras.Model(inputs=inputs, outputs=outputs)
     return model
 
-def train_transformer_model(timeframe='5m'):
-    """Train Transformer model on combined data with EXACT 76 features"""
-
-    logger.info(f"\n{'='*60}")
-    logger.info(f"Training TRANSFORMER model for {timeframe} with 76 features")
-    logger.info(f"{'='*60}")
+def prepare_transformer_dataset(timeframe='5m'):
+    """
+    Fetch + grouped windows + stratified split + normalization
+    Returns a dict with scaled X_train/X_test, y_train/y_test and the fitted scaler, or None
+    """
 
     # MAXIMUM candles per coin based on timeframe
     if timeframe == '5m':
@@ -299,33 +414,20 @@ def train_transformer_model(timeframe='5m'):
         limit_per_coin = 1000
 
     # 1. Fetch multi-coin data
-    combined_df = fetch_multi_coin_data(timeframe, limit_per_coin=limit_per_coin)
+    with stage('fetch', timeframe=timeframe):
+        combined_df = fetch_multi_coin_data(timeframe, limit_per_coin=limit_per_coin)
 
     if combined_df is None or len(combined_df) < 1000:
         logger.error("Not enough combined data")
         return None
 
-    # 2. Extract features
-    X_all = build_exact_76_features(combined_df)
-
-    # 3. Create labels (BUY if price goes up > 0.5%, SELL if down < -0.5%, else HOLD)
-    future_returns = combined_df['close'].pct_change(10).shift(-10)  # Look 10 candles ahead
-
-    y_all = np.zeros(len(combined_df), dtype=int)
-    y_all[future_returns > 0.005] = 2   # BUY
-    y_all[future_returns < -0.005] = 0  # SELL
-    y_all[(future_returns >= -0.005) & (future_returns <= 0.005)] = 1  # HOLD
-
-    # 4. Create sequences
-    sequences = []
-    labels = []
-
-    for i in range(len(X_all) - SEQUENCE_LENGTH - 10):
-        sequences.append(X_all[i:i+SEQUENCE_LENGTH])
-        labels.append(y_all[i + SEQUENCE_LENGTH])
-
-    X = np.array(sequences)
-    y = np.array(labels)
+    # 2-4. Features, labels (BUY > +0.5%, SELL < -0.5% over 10 candles, else HOLD)
+    # and sequences - per coin, in parallel, no window crosses a coin boundary
+    with stage('build_dataset', timeframe=timeframe):
+        windows = build_grouped_windows(combined_df, return_groups=True)
+    if windows is None:
+        return None
+    X, y, groups = windows
 
     logger.info(f"Total sequences: {len(X)} from {len(TRAINING_COINS)} coins")
 
@@ -336,21 +438,56 @@ def train_transformer_model(timeframe='5m'):
         logger.info(f"  Class {cls}: {count/len(y)*100:.1f}%")
 
     # 6. Train/test split
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
-    )
-
-    # 7. Normalize features
-    scaler = StandardScaler()
-    X_train_flat = X_train.reshape(-1, NUM_FEATURES)
-    scaler.fit(X_train_flat)
+    idx_train, idx_test = train_test_split(np.arange(len(X)), test_size=0.2, random_state=42, stratify=y)
+    X_train, X_test, y_train, y_test = X[idx_train], X[idx_test], y[idx_train], y[idx_test]
 
-    X_train_scaled = scaler.transform(X_train.reshape(-1, NUM_FEATURES)).reshape(X_train.shape)
-    X_test_scaled = scaler.transform(X_test.reshape(-1, NUM_FEATURES)).reshape(X_test.shape)
+    # 7. Normalize features - scaler fit on the unique rows of the training windows only
+    with stage('scaler_fit', timeframe=timeframe):
+        scaler = fit_scaler_on_windows(StreamingScaler(NUM_FEATURES), X, groups, idx_train)
+    with stage('scaler_transform', timeframe=timeframe):
+        X_train_scaled = scaler.transform(X_train)
+        X_test_scaled = scaler.transform(X_test)
 
     logger.info(f"✅ Scaler mean[0] = {scaler.mean_[0]:.6f} (should be ~0.12 for candle patterns)")
 
+    return {
+        'X_train': X_train_scaled, 'X_test': X_test_scaled,
+        'y_train': y_train, 'y_test': y_test, 'scaler': scaler,
+    }
+
+def train_transformer_model(timeframe='5m', bake_scaler=False, strategy=None, augment=False, onnx=False):
+    """
+    Train Transformer model on combined data with EXACT 76 features
+    bake_scaler: fold scaler mean/std into the TFLite graph (model takes raw features)
+    strategy: MultiWorkerMirroredStrategy (distributed.get_strategy()) - each worker
+              trains on its own shard, only the chief exports
+    augment: on-the-fly batch augmentation (augmentation.py); labels stay sparse,
+             so mixup keeps the dominant window's label
+    onnx: also export ONNX next to the TFLite model (server-side scoring, onnx_export.py)
+    """
+
+    logger.info(f"\n{'='*60}")
+    logger.info(f"Training TRANSFORMER model for {timeframe} with 76 features")
+    logger.info(f"{'='*60}")
+
+    strategy = strategy or tf.distribute.get_strategy()
+    multi_worker = distributed.is_distributed()
+
+    # The chief builds the dataset once, the other workers read it from the cache
+    if multi_worker:
+        data = distributed.share_dataset(f'transformer_{timeframe}', lambda: prepare_transformer_dataset(timeframe))
+    else:
+        data = prepare_transformer_dataset(timeframe)
+
+    if data is None:
+        return None
+
+    X_train_scaled, X_test_scaled = data['X_train'], data['X_test']
+    y_train, y_test = data['y_train'], data['y_test']
+    scaler = data.get('scaler')
+
     # 8. Calculate class weights
+    unique = np.unique(y_train)
     class_weights = {}
     total_samples = len(y_train)
     for cls in unique:
@@ -358,8 +495,9 @@ def train_transformer_model(timeframe='5m'):
         class_weights[cls] = total_samples / (len(unique) * class_count)
     logger.info(f"Class weights: {class_weights}")
 
-    # 9. Create and compile Transformer model
-    model = create_transformer_model()
+    # 9. Create and compile Transformer model (inside the strategy scope → mirrored variables)
+    with strategy.scope():
+        model = create_transformer_model()
 
     # Custom loss with label smoothing for TF 2.13 compatibility
     def label_smoothing_loss(y_true, y_pred, smoothing=0.1):
@@ -378,11 +516,12 @@ def train_transformer_model(timeframe='5m'):
         loss = -tf.reduce_sum(y_true_smooth * tf.math.log(y_pred + 1e-7), axis=-1)
         return tf.reduce_mean(loss)
 
-    model.compile(
-        optimizer=keras.optimizers.Adam(learning_rate=0.0005),
-        loss=label_smoothing_loss,
-        metrics=['accuracy']
-    )
+    with strategy.scope():
+        model.compile(
+            optimizer=keras.optimizers.Adam(learning_rate=0.0005),
+            loss=label_smoothing_loss,
+            metrics=['accuracy']
+        )
 
     model.summary()
 
@@ -403,50 +542,78 @@ def train_transformer_model(timeframe='5m'):
         )
     ]
 
+    # Throughput / step time (global batch 64; compute probe single-worker only)
+    throughput = ThroughputCallback(batch_size=64, probe_batch=None if multi_worker else (X_train_scaled[:64], y_train[:64]))
+    callbacks.append(throughput)
+
+    # Multi-worker: tf.data on this worker's shard, 64 = GLOBAL batch size
+    if multi_worker:
+        train_data = distributed.make_dataset(X_train_scaled, y_train, 64, shuffle=True)
+        val_data = distributed.make_dataset(X_test_scaled, y_test, 64)
+    else:
+        train_data = None
+        val_data = (X_test_scaled, y_test)
+
+    # Per-batch augmentation inside the tf.data pipeline (train only)
+    if augment:
+        train_data = (augmentation.augment_dataset(train_data) if multi_worker
+                      else augmentation.make_dataset(X_train_scaled, y_train, 64))
+
+    if train_data is not None:
+        fit_inputs = {'x': train_data, 'validation_data': val_data}
+    else:
+        fit_inputs = {'x': X_train_scaled, 'y': y_train, 'validation_data': val_data, 'batch_size': 64}
+
     # 11. Train
     logger.info("\n🚀 Starting Transformer training...")
-    history = model.fit(
-        X_train_scaled, y_train,
-        validation_data=(X_test_scaled, y_test),
-        epochs=200,
-        batch_size=64,
-        class_weight=class_weights,
-        callbacks=callbacks,
-        verbose=1
-    )
-
-    # 12. Evaluate
-    test_loss, test_acc = model.evaluate(X_test_scaled, y_test, verbose=0)
+    with stage('fit', timeframe=timeframe):
+        history = model.fit(
+            **fit_inputs,
+            epochs=200,
+            class_weight=class_weights,
+            callbacks=callbacks,
+            verbose=1 if distributed.is_chief() else 0
+        )
+
+    # 12. Evaluate (collective - every worker has to take part)
+    with stage('validate', timeframe=timeframe):
+        if multi_worker:
+            test_loss, test_acc = model.evaluate(val_data, verbose=0)
+        else:
+            test_loss, test_acc = model.evaluate(X_test_scaled, y_test, verbose=0)
     logger.info(f"\n🎯 Test Accuracy: {test_acc:.4f}")
 
+    # Only the chief writes artifacts
+    if not distributed.is_chief():
+        return model, scaler, test_acc
+
     # 13. Convert to TFLite
     output_name = f"general_{timeframe}"
     tflite_path = f"assets/ml/{output_name}.tflite"
 
-    converter = tf.lite.TFLiteConverter.from_keras_model(model)
-    converter.optimizations = [tf.lite.Optimize.DEFAULT]
-    converter.target_spec.supported_ops = [
-        tf.lite.OpsSet.TFLITE_BUILTINS,
-        tf.lite.OpsSet.SELECT_TF_OPS
-    ]
-    converter._experimental_lower_tensor_list_ops = False
-    tflite_model = converter.convert()
+    with stage('convert', timeframe=timeframe):
+        export_model = bake_scaler_into_model(model, scaler.mean_, scaler.scale_) if bake_scaler else model
+        converter = tf.lite.TFLiteConverter.from_keras_model(export_model)
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_ops = [
+            tf.lite.OpsSet.TFLITE_BUILTINS,
+            tf.lite.OpsSet.SELECT_TF_OPS
+        ]
+        converter._experimental_lower_tensor_list_ops = False
+        tflite_model = converter.convert()
 
     os.makedirs("assets/ml", exist_ok=True)
     with open(tflite_path, 'wb') as f:
         f.write(tflite_model)
 
+    onnx_info = export_onnx(export_model, onnx_path_for(tflite_path), X_test_scaled[:64]) if onnx else None
+
     model_size_kb = len(tflite_model) / 1024
     logger.info(f"✅ Saved TFLite model: {tflite_path} ({model_size_kb:.2f} KB)")
 
     # 14. Save scaler as JSON
     scaler_json_path = f"assets/ml/{output_name}_scaler.json"
-    scaler_data = {
-        'mean': scaler.mean_.tolist(),
-        'std': scaler.scale_.tolist(),
-    }
-    with open(scaler_json_path, 'w') as f:
-        json.dump(scaler_data, f, indent=2)
+    scaler.save_json(scaler_json_path)
     logger.info(f"✅ Saved scaler: {scaler_json_path}")
 
     # 15. Save metadata
@@ -456,14 +623,17 @@ def train_transformer_model(timeframe='5m'):
         'timeframe': timeframe,
         'trained_on': TRAINING_COINS,
         'test_accuracy': float(test_acc),
-        'train_samples': int(len(X_train)),
-        'test_samples': int(len(X_test)),
+        'train_samples': int(len(X_train_scaled)),
+        'test_samples': int(len(X_test_scaled)),
         'model_size_kb': float(model_size_kb),
         'num_features': NUM_FEATURES,
         'num_classes': NUM_CLASSES,
         'calibration': 'label_smoothing_0.1',
         'scaler_path': f'{output_name}_scaler.json',
+        'input_normalization': 'baked' if bake_scaler else 'scaler_json',
         'feature_extraction': 'build_exact_76_features',
+        'augmentation': augmentation.AUGMENT_DEFAULTS if augment else None,
+        'onnx': onnx_info,
         'date': datetime.now().isoformat()
     }
 
@@ -471,6 +641,7 @@ def train_transformer_model(timeframe='5m'):
     with open(metadata_path, 'w') as f:
         json.dump(metadata, f, indent=2)
     logger.info(f"✅ Saved metadata: {metadata_path}")
+    throughput.save(metrics_path_for(metadata_path))
 
     logger.info(f"\n✅ TRANSFORMER {timeframe} training COMPLETE!")
     logger.info(f"   Test Accuracy: {test_acc:.4f}")
@@ -479,20 +650,38 @@ def train_transformer_model(timeframe='5m'):
 
     return model, scaler, test_acc
 
-if __name__ == '__main__':
+def main(argv=None):
+    """Train general_5m and general_1d"""
+    parser = argparse.ArgumentParser(description='Train general Transformer models')
+    parser.add_argument('--bake-scaler', action='store_true',
+                        help='Fold scaler mean/std into the TFLite graph (raw features input)')
+    parser.add_argument('--augment', action='store_true',
+                        help='On-the-fly batch augmentation (slice/warp, scaling, jitter, cross-coin mixup)')
+    parser.add_argument('--onnx', action='store_true',
+                        help='Also export ONNX next to the TFLite model (requires tf2onnx, onnxruntime)')
+    distributed.add_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.onnx:
+        check_onnx_dependencies()
+
+    # The strategy must exist before any other TF op
+    strategy = distributed.strategy_from_args(args)
+
     logger.info("\n🚀 Starting TRANSFORMER model training for general crypto prediction...\n")
 
     # Train 5m short-term scalping model
     logger.info("=" * 60)
     logger.info("TRAINING SHORT-TERM (5m) TRANSFORMER MODEL")
     logger.info("=" * 60)
-    model_5m, scaler_5m, acc_5m = train_transformer_model(timeframe='5m')
+    model_5m, scaler_5m, acc_5m = train_transformer_model(timeframe='5m', bake_scaler=args.bake_scaler, strategy=strategy,
+                                                       augment=args.augment, onnx=args.onnx)
 
     # Train 1d long-term trend model
     logger.info("\n" + "=" * 60)
     logger.info("TRAINING LONG-TERM (1d) TRANSFORMER MODEL")
     logger.info("=" * 60)
-    model_1d, scaler_1d, acc_1d = train_transformer_model(timeframe='1d')
+    model_1d, scaler_1d, acc_1d = train_transformer_model(timeframe='1d', bake_scaler=args.bake_scaler, strategy=strategy,
+                                                       augment=args.augment, onnx=args.onnx)
 
     logger.info("\n" + "=" * 60)
     logger.info("🎉 ALL TRANSFORMER MODELS TRAINED SUCCESSFULLY!")
@@ -500,3 +689,9 @@ if __name__ == '__main__':
     logger.info(f"✅ general_5m:  {acc_5m:.4f} accuracy")
     logger.info(f"✅ general_1d:  {acc_1d:.4f} accuracy")
     logger.info("\nTransformer models ready for deployment!")
+
+    return {'5m': float(acc_5m), '1d': float(acc_1d)}
+
+
+if __name__ == '__main__':
+    main()
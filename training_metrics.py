@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+TRAINING THROUGHPUT METRICS - Keras callback + raport
+Per epocă: samples/sec, histogramă latență per step, timp host între step-uri,
+utilizare CPU a procesului; la final un probe de compute pe un batch fix
+(fără pipeline de input) → input wait = step măsurat - step de compute pur
+
+Raportul se scrie lângă metadata modelului: {model}_training_metrics.json
+
+    callback = ThroughputCallback(batch_size=64, probe_batch=(X_train[:64], y_train[:64]))
+    model.fit(..., callbacks=[..., callback])
+    callback.save(metrics_path_for(metadata_path))
+
+    python training_metrics.py 'assets/ml/*_training_metrics.json'   # sumar / comparație între rulări
+"""
+
+import os
+import glob
+import json
+import time
+import logging
+import argparse
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Margini histogramă latență step (ms), log-spaced
+HISTOGRAM_EDGES_MS = [0, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, float('inf')]
+PROBE_STEPS = 20
+INPUT_BOUND_RATIO = 0.2  # Input-bound dacă input wait > 20% din step
+
+
+def available_cpus():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def metrics_path_for(metadata_path):
+    """assets/ml/general_5m_metadata.json → assets/ml/general_5m_training_metrics.json"""
+    base = metadata_path[:-len('_metadata.json')] if metadata_path.endswith('_metadata.json') else os.path.splitext(metadata_path)[0]
+    return f'{base}_training_metrics.json'
+
+
+def summarize_steps(step_s):
+    """Percentile + histogramă (ms) pentru o listă de durate de step (secunde)"""
+    ms = np.asarray(step_s, dtype=np.float64) * 1000
+    if len(ms) == 0:
+        return None
+    counts, _ = np.histogram(ms, bins=HISTOGRAM_EDGES_MS)
+    return {
+        'count': int(len(ms)),
+        'mean_ms': float(ms.mean()),
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p90_ms': float(np.percentile(ms, 90)),
+        'p99_ms': float(np.percentile(ms, 99)),
+        'max_ms': float(ms.max()),
+        'histogram_ms': {
+            f'{lo:g}-{hi:g}': int(c) for lo, hi, c in zip(HISTOGRAM_EDGES_MS[:-1], HISTOGRAM_EDGES_MS[1:], counts)
+        },
+    }
+
+
+try:
+    from tensorflow import keras
+    _Callback = keras.callbacks.Callback
+except ImportError:  # Raportul (main) merge și fără TensorFlow
+    keras = None
+    _Callback = object
+
+
+class ThroughputCallback(_Callback):
+    """
+    batch_size: pentru samples/sec (None → doar steps/sec)
+    probe_batch: (x, y) - un batch pentru probe-ul de compute la finalul antrenării
+                 (clonă a modelului, același optimizer/loss, input din memorie)
+    skip_steps: primele step-uri din fiecare epocă excluse din latență (tracing / warm-up)
+    """
+
+    def __init__(self, batch_size=None, probe_batch=None, probe_steps=PROBE_STEPS, skip_steps=1, log=True):
+        super().__init__()
+        self.batch_size = batch_size
+        self.probe_batch = probe_batch
+        self.probe_steps = probe_steps
+        self.skip_steps = skip_steps
+        self.log = log
+        self.epochs = []
+        self.compute_probe = None
+
+    # --- Keras hooks -------------------------------------------------------
+
+    def on_train_begin(self, logs=None):
+        self._train_start = time.perf_counter()
+        self._train_cpu = time.process_time()
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._epoch_start = time.perf_counter()
+        self._epoch_cpu = time.process_time()
+        self._steps, self._gaps = [], []
+        self._last_end = None
+
+    def on_train_batch_begin(self, batch, logs=None):
+        now = time.perf_counter()
+        if self._last_end is not None:
+            self._gaps.append(now - self._last_end)
+        self._step_start = now
+
+    def on_train_batch_end(self, batch, logs=None):
+        now = time.perf_counter()
+        self._steps.append(now - self._step_start)
+        self._last_end = now
+        self._last_end_cpu = time.process_time()
+
+    def on_epoch_end(self, epoch, logs=None):
+        now = time.perf_counter()
+        if not self._steps:
+            return
+
+        # Faza de train = până la ultimul step; restul epocii = validare + callbacks
+        train_wall = self._last_end - self._epoch_start
+        cpu = self._last_end_cpu - self._epoch_cpu
+        steps = self._steps[self.skip_steps:] or self._steps
+        gaps = self._gaps[max(0, len(self._gaps) - len(steps)):]
+        num_steps = len(self._steps)
+        # Steady state: fără step-urile de tracing de la începutul epocii
+        steady_s = sum(steps) + sum(gaps)
+
+        record = {
+            'epoch': int(epoch),
+            'steps': num_steps,
+            'train_s': train_wall,
+            'validation_s': now - self._last_end,
+            'steps_per_sec': len(steps) / steady_s,
+            'samples_per_sec': len(steps) * self.batch_size / steady_s if self.batch_size else None,
+            'step': summarize_steps(steps),
+            'host_gap_ms_mean': float(np.mean(self._gaps) * 1000) if self._gaps else 0.0,
+            'cpu_cores_used': cpu / train_wall,
+            'cpu_utilization': cpu / train_wall / available_cpus(),
+        }
+        self.epochs.append(record)
+
+        if self.log:
+            rate = f"{record['samples_per_sec']:,.0f} samples/s" if self.batch_size else f"{record['steps_per_sec']:.1f} steps/s"
+            logger.info(f"⏱️  epoch {epoch}: {rate}, step p50 {record['step']['p50_ms']:.1f} ms "
+                        f"p99 {record['step']['p99_ms']:.1f} ms, CPU {record['cpu_cores_used']:.1f}/{available_cpus()} cores")
+
+    def on_train_end(self, logs=None):
+        self._train_total = time.perf_counter() - self._train_start
+        self._train_total_cpu = time.process_time() - self._train_cpu
+        if self.probe_batch is not None:
+            try:
+                self.compute_probe = self.run_compute_probe()
+            except Exception as e:  # Probe opțional (ex. layere fără get_config → clone_model eșuează)
+                logger.warning(f"Compute probe skipped: {e}")
+
+    # --- Probe compute -----------------------------------------------------
+
+    def run_compute_probe(self):
+        """Același model/optimizer pe un batch fix, repetat din memorie → latență de compute pur"""
+        import tensorflow as tf
+
+        x, y = self.probe_batch
+        probe = keras.models.clone_model(self.model)
+        probe.set_weights(self.model.get_weights())
+        optimizer = self.model.optimizer.__class__.from_config(self.model.optimizer.get_config())
+        probe.compile(optimizer=optimizer, loss=self.model.loss)
+
+        dataset = tf.data.Dataset.from_tensors((x, y)).repeat()
+        timer = ThroughputCallback(skip_steps=3, log=False)
+        probe.fit(dataset, epochs=1, steps_per_epoch=self.probe_steps + 3, callbacks=[timer], verbose=0)
+
+        step = timer.epochs[0]['step']
+        return {'steps': step['count'], 'p50_ms': step['p50_ms'], 'mean_ms': step['mean_ms']}
+
+    # --- Raport ------------------------------------------------------------
+
+    def report(self):
+        import tensorflow as tf
+
+        measured = [e for e in self.epochs if e['step']]
+        step_p50 = float(np.median([e['step']['p50_ms'] for e in measured])) if measured else None
+
+        summary = {
+            'epochs': len(self.epochs),
+            'train_wall_s': getattr(self, '_train_total', None),
+            'samples_per_sec': float(np.median([e['samples_per_sec'] for e in measured])) if measured and self.batch_size else None,
+            'steps_per_sec': float(np.median([e['steps_per_sec'] for e in measured])) if measured else None,
+            'step_p50_ms': step_p50,
+            'cpu_cores_used': float(np.median([e['cpu_cores_used'] for e in measured])) if measured else None,
+            'cpu_utilization': float(np.median([e['cpu_utilization'] for e in measured])) if measured else None,
+        }
+
+        if self.compute_probe and step_p50 is not None:
+            compute = self.compute_probe['p50_ms']
+            wait = max(0.0, step_p50 - compute)
+            summary.update({
+                'compute_ms': compute,
+                'input_wait_ms': wait,
+                'input_wait_fraction': wait / step_p50 if step_p50 else 0.0,
+                'bound': 'input' if wait > INPUT_BOUND_RATIO * step_p50 else 'compute',
+            })
+
+        return {
+            'batch_size': self.batch_size,
+            'cpu_count': available_cpus(),
+            'threads': {
+                'intra_op': tf.config.threading.get_intra_op_parallelism_threads(),
+                'inter_op': tf.config.threading.get_inter_op_parallelism_threads(),
+            },
+            'summary': summary,
+            'compute_probe': self.compute_probe,
+            'per_epoch': self.epochs,
+        }
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+        logger.info(f"⏱️  Training metrics: {path}")
+        return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Summarize *_training_metrics.json reports')
+    parser.add_argument('paths', nargs='+', help='Report files or glob patterns')
+    args = parser.parse_args()
+
+    paths = sorted({p for pattern in args.paths for p in (glob.glob(pattern) or [pattern])})
+    print(f"{'Report':<42} {'CPUs':>4} {'samples/s':>10} {'step p50':>9} {'compute':>8} {'wait':>7} {'CPU use':>8}  bound")
+
+    for path in paths:
+        with open(path) as f:
+            s = json.load(f)
+        summary = s['summary']
+        fmt = lambda v, spec: format(v, spec) if v is not None else '-'
+        print(f"{os.path.basename(path).replace('_training_metrics.json', ''):<42} {s['cpu_count']:>4} "
+              f"{fmt(summary.get('samples_per_sec'), ',.0f'):>10} {fmt(summary.get('step_p50_ms'), '.1f'):>7}ms "
+              f"{fmt(summary.get('compute_ms'), '.1f'):>6}ms {fmt(summary.get('input_wait_ms'), '.1f'):>5}ms "
+              f"{fmt(summary.get('cpu_utilization'), '.0%'):>8}  {summary.get('bound', '-')}")
+
+
+if __name__ == '__main__':
+    main()